@@ -11,6 +11,9 @@ class DominoGame:
 		self.scores = [0, 0]  # Team scores
 		self.current_round = 0
 		self.player_hands = []
+		# hand_suit_counts[player][suit]: tiles of the hand of the player showing the suit, kept up to date
+		# as tiles are played so that pass detection does not scan the hand (see can_play_any)
+		self.hand_suit_counts = []
 		self.starting_player = 0
 		print(f"Starting a new {self.variant.capitalize()} Domino game!")
 
@@ -213,6 +216,7 @@ class DominoGame:
 		self.player_hands = [[] for _ in range(4)]
 		for i in range(4):
 			self.player_hands[i], all_pieces = self.draw_hand(all_pieces)
+		self.hand_suit_counts = [self.count_suits(hand) for hand in self.player_hands]
 		
 		if self.current_round == 0:
 			self.starting_player = self.determine_first_player()
@@ -246,6 +250,8 @@ class DominoGame:
 			return self.is_legal_first_move_venezuelan(move)
 		
 		if move is None:
+			if player_hand is self.player_hands[game_state.next_player]:
+				return not self.can_play_any(game_state.next_player)
 			return not any(self.can_play(piece) for piece in player_hand)
 		piece, side = move
 		if piece not in player_hand:
@@ -264,6 +270,23 @@ class DominoGame:
 	def can_play(self, piece):
 		return self.game_state.ends[0] in piece or self.game_state.ends[1] in piece
 
+	def count_suits(self, hand):
+		suit_counts = [0] * (self.max_pip + 1)
+		for piece in hand:
+			suit_counts[piece[0]] += 1
+			if piece[1] != piece[0]:
+				suit_counts[piece[1]] += 1
+		return suit_counts
+
+	def can_play_any(self, player):
+		# True when a tile of the hand of the player fits an end, from its suit counts
+		left_end, right_end = self.game_state.ends
+		if left_end == -1:
+			# As can_play: nothing matches the ends of the empty board
+			return False
+		suit_counts = self.hand_suit_counts[player]
+		return suit_counts[left_end] > 0 or suit_counts[right_end] > 0
+
 	def apply_move(self, move):
 		player = self.game_state.next_player
 		new_tile_counts = self.game_state.player_tile_counts.copy()
@@ -272,6 +295,9 @@ class DominoGame:
 			piece, side = move
 			self.player_hands[player].remove(piece)
 			new_tile_counts[player] -= 1
+			self.hand_suit_counts[player][piece[0]] -= 1
+			if piece[1] != piece[0]:
+				self.hand_suit_counts[player][piece[1]] -= 1
 			
 			new_played_set = self.game_state.played_set.copy()
 			new_played_set.add(piece)
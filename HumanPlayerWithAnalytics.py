@@ -1,7 +1,7 @@
 from DominoPlayer import HumanPlayer, available_moves, stats
 from collections import defaultdict, Counter
 from DominoGameState import DominoGameState
-from domino_game_analyzer import DominoTile, PlayerPosition, GameState, get_best_move_alpha_beta, list_possible_moves
+from domino_game_analyzer import DominoTile, PlayerPosition, GameState, get_best_move_alpha_beta, principal_variation, list_possible_moves
 from domino_utils import history_to_domino_tiles_history
 from domino_game_tracker import domino_game_state_our_perspective, generate_sample_from_game_state
 from domino_common_knowledge import CommonKnowledgeTracker
@@ -174,13 +174,17 @@ class HumanPlayerWithAnalytics(HumanPlayer):
                     new_state = sample_state.play_hand(tile, is_left)
                 
                 # best_move, best_score, optimal_path = get_best_move_alpha_beta(new_state, depth)
-                best_move, best_score, __ = get_best_move_alpha_beta(new_state, depth)
+                # best_move, best_score, __ = get_best_move_alpha_beta(new_state, depth)
+                # The optimal path is read back from the transposition table, the search does not build it
+                ab_cache = {}
+                best_move, best_score, __ = get_best_move_alpha_beta(new_state, depth, best_path_flag=False, ab_cache=ab_cache)
+                optimal_path = principal_variation(new_state, depth, ab_cache)
                 
                 move_analysis.append({
                     'move': move[0],
                     'resulting_best_move': best_move,
-                    'expected_score': best_score
-                    # 'optimal_path': optimal_path
+                    'expected_score': best_score,
+                    'optimal_path': optimal_path
                 })
                 if move[0] is not None:  # Pass move
                     # print(f'Move {move[0]} resulted in {best_score}')
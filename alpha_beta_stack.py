@@ -0,0 +1,279 @@
+import math
+import time
+from typing import Callable
+from domino_data_types import GameState, move, PlayerPosition, PlayerPosition_SOUTH, PlayerPosition_NORTH
+from domino_utils import list_possible_moves
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, NEGATED_FLAG
+from move_ordering import MoveOrdering
+from search_budget import SearchBudget
+from domino_tablebase import Tablebase
+from search_stats import SearchStats
+import get_best_move2
+
+# Principal variation as a linked list of (player, move, rest), built by pointing at the child's
+# list instead of copying it. It is only turned into a list for the root.
+type LinkedPath = tuple[PlayerPosition, move, 'LinkedPath']|None
+
+class _Frame:
+    """An alpha-beta node whose children are being searched."""
+    __slots__ = ('state', 'depth', 'alpha', 'beta', 'ply', 'current_player', 'is_maximizing', 'possible_moves', 'index',
+                 'child_state', 'research', 'best_score', 'best_move', 'best_path',
+                 'alpha_orig', 'beta_orig', 'entry_depth', 'canonical_key', 'negate', 'swap_ends', 'forced_moves')
+
+def prepend_forced_moves(forced_moves: list[tuple[PlayerPosition, move]], path: LinkedPath) -> LinkedPath:
+    for player, tile_and_loc_info in reversed(forced_moves):
+        path = (player, tile_and_loc_info, path)
+    return path
+
+def linked_path_to_list(path: LinkedPath) -> list[tuple[PlayerPosition, move]]:
+    best_path = []
+    while path is not None:
+        player, tile_and_loc_info, path = path
+        best_path.append((player, tile_and_loc_info))
+    return best_path
+
+def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float, cache: dict[int, tuple[int, int]] = {}, best_path_flag: bool = True, ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None, ordering: MoveOrdering|None = None, ply: int = 0, budget: SearchBudget|None = None, pvs: bool = False, count_game_stats: Callable = get_best_move2.count_game_stats, tablebase: Tablebase|None = None, stats: SearchStats|None = None, evaluate: Callable[[GameState], float]|None = None) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    """
+    Non-recursive version of get_best_move2.min_max_alpha_beta, driven by an explicit stack of frames.
+    It visits the same nodes in the same order, so results, ab_cache entries and ordering tables are
+    identical to the recursive search. The optimal path is only built when best_path_flag is set.
+
+    :param state: The current GameState
+    :param depth: The depth to search in the game tree
+    :param alpha: The best value that the maximizer currently can guarantee at that level or above
+    :param beta: The best value that the minimizer currently can guarantee at that level or above
+    :param cache: The cache dictionary to use for memoization
+    :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param ab_cache: Optional transposition table for internal nodes (see get_best_move2.min_max_alpha_beta)
+    :param ordering: Optional move ordering heuristics, updated with the cutoffs of this search
+    :param ply: Distance from the root of the search, used by the killer moves of the ordering
+    :param budget: Optional time/node budget, search_budget.SearchTimeout is raised when it runs out
+    :param pvs: Use principal variation search (see get_best_move2.min_max_alpha_beta)
+    :param count_game_stats: Evaluation of the leaves, get_best_move2 or get_best_move_venezuelan count_game_stats
+    :param tablebase: Optional endgame table probed by count_game_stats (see domino_tablebase)
+    :param stats: Optional search_stats.SearchStats, updated with the same counters as the recursive search
+    :param evaluate: Optional static evaluation of the positions at the depth limit (see get_best_move2.min_max_alpha_beta)
+    :return: A tuple of (best_move, best_score, optimal_path)
+    """
+    # A frame is pushed for every node that searches its children, which only happens before the
+    # end of the game, so the stack never grows past the longest possible rest of the game
+    frames = [_Frame() for _ in range(4 * state.tiles_left() + 4)]
+    top = -1
+
+    # The node to enter next
+    node_state, node_depth, node_alpha, node_beta, node_ply = state, depth, alpha, beta, ply
+    while True:
+        if ordering is not None:
+            ordering.nodes += 1
+        if budget is not None:
+            budget.tick()
+        if stats is not None:
+            stats.enter(node_ply)
+
+        # Follow the chain of forced moves from the node, as get_best_move2.min_max_alpha_beta does
+        forced_moves = None
+        if node_depth > 0 and not node_state.is_game_over():
+            possible_moves = list_possible_moves(node_state)
+            if len(possible_moves) == 1:
+                node_state, node_depth, possible_moves, forced_moves = get_best_move2.follow_forced_moves(node_state, node_depth, possible_moves)
+                node_ply += len(forced_moves)
+
+        # Enter the node: it is either resolved at once (leaf or table hit) or gets a frame
+        resolved = False
+        if node_depth == 0 or node_state.is_game_over():
+            game_over = node_state.is_game_over()
+            if stats is not None:
+                if game_over:
+                    stats.terminal_nodes += 1
+                else:
+                    stats.horizon_nodes += 1
+            if evaluate is not None and not game_over:
+                result_score = evaluate(node_state)
+            else:
+                _, result_score = count_game_stats(node_state, print_stats=False, cache=cache, budget=budget, tablebase=tablebase, stats=stats)
+            result_move, result_path = None, None
+            resolved = True
+        else:
+            current_player = node_state.current_player
+
+            tt_move = None
+            if ab_cache is not None:
+                horizon = 4 * node_state.tiles_left() + 4
+                entry_depth = node_depth if node_depth < horizon else horizon
+                alpha_orig, beta_orig = node_alpha, node_beta
+                canonical_key, negate, swap_ends = node_state.canonical_key()
+                entry = ab_cache.get(canonical_key)
+                if stats is not None:
+                    if entry is not None and entry[0] == entry_depth:
+                        stats.tt_hits += 1
+                    else:
+                        stats.tt_misses += 1
+                if entry is not None:
+                    cached_depth, flag, value, cached_move = entry
+                    if negate:
+                        value, flag = -value, NEGATED_FLAG[flag]
+                    if swap_ends and cached_move is not None:
+                        cached_move = (cached_move[0], not cached_move[1])
+                    if cached_depth == entry_depth:
+                        if flag == EXACT:
+                            resolved = True
+                        else:
+                            if flag == LOWER_BOUND:
+                                node_alpha = max(node_alpha, value)
+                            else:
+                                node_beta = min(node_beta, value)
+                            if node_beta <= node_alpha:
+                                resolved = True
+                        if resolved:
+                            result_move, result_score, result_path = cached_move, value, (current_player, cached_move, None)
+                    if not resolved:
+                        tt_move = cached_move
+                        if ordering is None:
+                            # Try the move stored for this state first
+                            for i, possible_move in enumerate(possible_moves):
+                                if possible_move[0] == cached_move:
+                                    if i > 0:
+                                        possible_moves.insert(0, possible_moves.pop(i))
+                                    break
+
+            if not resolved:
+                if ordering is not None:
+                    possible_moves = ordering.order_moves(possible_moves, node_ply, current_player, tt_move)
+                top += 1
+                frame = frames[top]
+                frame.state = node_state
+                frame.depth = node_depth
+                frame.alpha = node_alpha
+                frame.beta = node_beta
+                frame.ply = node_ply
+                frame.current_player = current_player
+                frame.is_maximizing = current_player in (PlayerPosition_NORTH, PlayerPosition_SOUTH)
+                frame.possible_moves = possible_moves
+                frame.index = 0
+                frame.research = False
+                frame.best_score = -math.inf if frame.is_maximizing else math.inf
+                frame.best_move = None
+                frame.best_path = None
+                frame.forced_moves = forced_moves
+                if ab_cache is not None:
+                    frame.alpha_orig, frame.beta_orig = alpha_orig, beta_orig
+                    frame.entry_depth = entry_depth
+                    frame.canonical_key, frame.negate, frame.swap_ends = canonical_key, negate, swap_ends
+
+        if resolved and forced_moves:
+            # The first forced move leads to the result of the end of the chain
+            result_move = forced_moves[0][1]
+            if best_path_flag:
+                result_path = prepend_forced_moves(forced_moves, result_path)
+
+        # Hand results back to the parents until one of them has a child left to search
+        while resolved:
+            if top < 0:
+                return result_move, result_score, linked_path_to_list(result_path) if best_path_flag else []
+            frame = frames[top]
+            score = result_score
+            alpha, beta = frame.alpha, frame.beta
+
+            if pvs and frame.index > 0 and not frame.research:
+                if (alpha + 1 <= score < beta) if frame.is_maximizing else (alpha < score <= beta - 1):
+                    # The null window search failed on the wrong side, search again with the full window
+                    frame.research = True
+                    node_state, node_depth, node_alpha, node_beta, node_ply = frame.child_state, frame.depth - 1, alpha, beta, frame.ply + 1
+                    break
+            frame.research = False
+
+            tile_and_loc_info = frame.possible_moves[frame.index][0]
+            cutoff = False
+            if frame.is_maximizing:
+                if score > frame.best_score:
+                    frame.best_score = score
+                    frame.best_move = tile_and_loc_info
+                    if best_path_flag:
+                        frame.best_path = (frame.current_player, tile_and_loc_info, result_path)
+                alpha = frame.alpha = max(alpha, frame.best_score)
+                if beta <= alpha:
+                    cutoff = True  # Beta cut-off
+            else:
+                if score < frame.best_score:
+                    frame.best_score = score
+                    frame.best_move = tile_and_loc_info
+                    if best_path_flag:
+                        frame.best_path = (frame.current_player, tile_and_loc_info, result_path)
+                beta = frame.beta = min(beta, frame.best_score)
+                if beta <= alpha:
+                    cutoff = True  # Alpha cut-off
+            if cutoff and ordering is not None:
+                ordering.record_cutoff(frame.best_move, frame.ply, frame.depth, frame.current_player)
+            if cutoff and stats is not None:
+                stats.cutoff(frame.index, frame.is_maximizing)
+
+            frame.index += 1
+            if cutoff or frame.index == len(frame.possible_moves):
+                best_score, best_move = frame.best_score, frame.best_move
+                if ab_cache is not None:
+                    # Fail-soft bounds: a score outside the original window only bounds the true value
+                    if best_score <= frame.alpha_orig:
+                        flag = UPPER_BOUND
+                    elif best_score >= frame.beta_orig:
+                        flag = LOWER_BOUND
+                    else:
+                        flag = EXACT
+                    stored_score, stored_move = best_score, best_move
+                    if frame.negate:
+                        stored_score, flag = -stored_score, NEGATED_FLAG[flag]
+                    if frame.swap_ends and stored_move is not None:
+                        stored_move = (stored_move[0], not stored_move[1])
+                    ab_cache[frame.canonical_key] = (frame.entry_depth, flag, stored_score, stored_move)
+                    if stats is not None:
+                        stats.tt_stores += 1
+                        if len(ab_cache) > stats.tt_peak_size:
+                            stats.tt_peak_size = len(ab_cache)
+                result_move, result_score, result_path = best_move, best_score, frame.best_path
+                if frame.forced_moves:
+                    result_move = frame.forced_moves[0][1]
+                    if best_path_flag:
+                        result_path = prepend_forced_moves(frame.forced_moves, result_path)
+                frame.state = frame.possible_moves = frame.child_state = frame.best_path = frame.forced_moves = None
+                top -= 1
+            else:
+                resolved = False
+
+        if resolved:
+            # Re-search of a child
+            continue
+
+        # Enter the next child of the top frame
+        frame = frames[top]
+        tile_and_loc_info = frame.possible_moves[frame.index][0]
+        if tile_and_loc_info is None:  # Pass move
+            child_state = frame.state.pass_turn()
+        else:
+            tile, is_left = tile_and_loc_info
+            child_state = frame.state.play_hand(tile, is_left)
+        frame.child_state = child_state
+        if pvs and frame.index > 0:
+            # Null windows as in get_best_move2.min_max_alpha_beta
+            if frame.is_maximizing:
+                node_alpha, node_beta = frame.alpha, frame.alpha + 1
+            else:
+                node_alpha, node_beta = frame.beta - 1, frame.beta
+        else:
+            node_alpha, node_beta = frame.alpha, frame.beta
+        node_state, node_depth, node_ply = child_state, frame.depth - 1, frame.ply + 1
+
+def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict[int, tuple[int, int]] = {}, best_path_flag: bool = True, ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None, ordering: MoveOrdering|None = None, budget: SearchBudget|None = None, algorithm: str = 'alpha_beta', count_game_stats: Callable = get_best_move2.count_game_stats, tablebase: Tablebase|None = None, stats: SearchStats|None = None, evaluate: Callable[[GameState], float]|None = None) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    """
+    Get the best move for the current player with the non-recursive alpha-beta search.
+    See get_best_move2.get_best_move_alpha_beta for the parameters, algorithm is 'alpha_beta' or 'pvs'.
+
+    :return: A tuple of (best_move, best_score, optimal_path)
+    """
+    if algorithm not in ('alpha_beta', 'pvs'):
+        raise ValueError(f"Unknown search algorithm: {algorithm}")
+    start = time.perf_counter()
+    try:
+        return min_max_alpha_beta(state, depth, -math.inf, math.inf, cache, best_path_flag, ab_cache, ordering, budget=budget, pvs=algorithm == 'pvs', count_game_stats=count_game_stats, tablebase=tablebase, stats=stats, evaluate=evaluate)
+    finally:
+        if stats is not None:
+            stats.searches += 1
+            stats.elapsed += time.perf_counter() - start
@@ -8,14 +8,18 @@ from get_best_move2 import get_best_move_alpha_beta, list_possible_moves
 from domino_utils import history_to_domino_tiles_history
 from domino_game_tracker import domino_game_state_our_perspective, generate_sample_from_game_state
 from domino_common_knowledge import CommonKnowledgeTracker
+from search_stats import SearchStats
 from statistics import mean, median, stdev, mode
 import copy
 from tqdm import tqdm
 # import get_best_move
 
 class AnalyticAgentPlayer(HumanPlayer):
-    def __init__(self, position: int = 0) -> None:
+    def __init__(self, position: int = 0, collect_stats: bool = False) -> None:
         super().__init__()
+        # Search counters of every move decision (see search_stats), only collected when collect_stats is set
+        self.collect_stats = collect_stats
+        self.search_stats: list[SearchStats] = []
         self.move_history: list[tuple[int, tuple[tuple[int, int], str]|None]] = []
         self.tile_count_history: dict[int, list[int]] = defaultdict(list)
         # self.round_scores: list[int] = []
@@ -99,6 +103,8 @@ class AnalyticAgentPlayer(HumanPlayer):
             inferred_knowledge_for_current_player[player] = tiles - final_south_hand
 
         move_scores = defaultdict(list)
+        # Counters of the searches of all samples of this move
+        move_search_stats = SearchStats() if self.collect_stats else None
 
         for _ in tqdm(range(num_samples), desc="Analyzing moves", leave=False):
             sample = generate_sample_from_game_state(
@@ -131,7 +137,8 @@ class AnalyticAgentPlayer(HumanPlayer):
             # possible_moves = list_possible_moves(sample_state, include_stats=False)
             possible_moves = list_possible_moves(sample_state)
 
-            sample_cache: dict[GameState, tuple[int, int]] = {}
+            sample_cache: dict[int, tuple[int, int]] = {}
+            sample_ab_cache: dict[int, tuple[int, int, float, move]] = {}
             for move in possible_moves:
                 if move[0] is None:
                     new_state = sample_state.pass_turn()
@@ -140,10 +147,16 @@ class AnalyticAgentPlayer(HumanPlayer):
                     new_state = sample_state.play_hand(tile, is_left)
 
                 # _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
-                _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
+                # _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False, ab_cache=sample_ab_cache)
+                _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False, ab_cache=sample_ab_cache, stats=move_search_stats)
 
                 move_scores[move[0]].append(best_score)
 
+        if move_search_stats is not None:
+            self.search_stats.append(move_search_stats)
+            if verbose:
+                print(f"\nSearch statistics:\n{move_search_stats.report()}")
+
         if not move_scores:
             if verbose:
                 print("No legal moves available. Player must pass.")
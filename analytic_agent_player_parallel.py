@@ -5,6 +5,9 @@ from DominoGameState import DominoGameState
 # from get_best_move import DominoTile, PlayerPosition, GameState, get_best_move_alpha_beta, list_possible_moves, PlayerPosition_SOUTH, PlayerPosition_names
 from domino_data_types import DominoTile, PlayerPosition, GameState, PlayerPosition_SOUTH, PlayerPosition_names, move
 from get_best_move2 import get_best_move_alpha_beta, list_possible_moves
+from solve_many import solve_many
+from static_evaluation import evaluate_international
+from search_stats import SearchStats
 from domino_utils import history_to_domino_tiles_history
 from domino_game_tracker import domino_game_state_our_perspective, generate_sample_from_game_state
 from domino_common_knowledge import CommonKnowledgeTracker
@@ -14,8 +17,16 @@ from tqdm import tqdm
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 class AnalyticAgentPlayer(HumanPlayer):
-    def __init__(self, position: int = 0) -> None:
+    def __init__(self, position: int = 0, sample_time_limit: float|None = None, samples_per_task: int = 4, collect_stats: bool = False) -> None:
         super().__init__()
+        # Search time per sample, None for exact unbudgeted searches. A sample whose search does not finish in time
+        # is scored by the static evaluation of the moves instead (see SearchStats.budget_fallbacks)
+        self.sample_time_limit = sample_time_limit
+        # Samples searched by each worker task, with tables shared across the samples of the task
+        self.samples_per_task = samples_per_task
+        # Search counters of every move decision (see search_stats), only collected when collect_stats is set
+        self.collect_stats = collect_stats
+        self.search_stats: list[SearchStats] = []
         self.move_history: list[tuple[int, tuple[tuple[int, int], str]|None]] = []
         self.tile_count_history: dict[int, list[int]] = defaultdict(list)
         # self.round_scores: list[int] = []
@@ -78,7 +89,7 @@ class AnalyticAgentPlayer(HumanPlayer):
             print(f"  {PlayerPosition_names[player]}: {count}")
         print("----------------------------\n")
 
-    def sample_and_search(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> list[tuple[move, float]]:
+    def generate_sample_state(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> GameState:
         sample = generate_sample_from_game_state(
             # PlayerPosition.SOUTH,
             PlayerPosition_SOUTH,
@@ -95,7 +106,7 @@ class AnalyticAgentPlayer(HumanPlayer):
             frozenset(sample['W'])
         )
 
-        sample_state = GameState(
+        return GameState(
             player_hands=sample_hands,
             # current_player=PlayerPosition.SOUTH,
             current_player=PlayerPosition_SOUTH,
@@ -104,25 +115,31 @@ class AnalyticAgentPlayer(HumanPlayer):
             consecutive_passes=0
         )
 
-        depth = 24
+    def sample_and_search(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> list[tuple[move, float]]:
+        return self.sample_batch_and_search(1, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends)[0]
 
-        # possible_moves = list_possible_moves(sample_state, include_stats=False)
-        possible_moves = list_possible_moves(sample_state)
-        move_scores: list[tuple[move, float]] = []
+    def sample_batch_and_search_stats(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> tuple[list[list[tuple[move, float]]], SearchStats|None]:
+        # Runs in the worker processes, the counters are sent back with the scores
+        stats = SearchStats() if self.collect_stats else None
+        return self.sample_batch_and_search(num_samples, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends, stats=stats), stats
 
-        sample_cache: dict[GameState, tuple[int, int]] = {}
-        for move in possible_moves:
-            if move[0] is None:
-                new_state = sample_state.pass_turn()
-            else:
-                tile, is_left = move[0]
-                new_state = sample_state.play_hand(tile, is_left)
+    def sample_batch_and_search(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], stats: SearchStats|None = None) -> list[list[tuple[move, float]]]:
+        sample_states = [
+            self.generate_sample_state(final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends)
+            for _ in range(num_samples)
+        ]
 
-            # _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
-            _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
-            move_scores.append((move[0], best_score))
-        # return move[0], best_score
-        return move_scores
+        depth = 24
+
+        # South's moves only depend on its hand and the board ends, they are the same in every sample
+        possible_moves = list_possible_moves(sample_states[0])
+
+        # The samples of a batch share their tables, see solve_many
+        batch_cache: dict[int, tuple[int, int]] = {}
+        batch_ab_cache: dict[int, tuple[int, int, float, move]] = {}
+        # The usual search of depth after each move, a single iteration
+        return solve_many(sample_states, depth + 1, batch_cache, batch_ab_cache, time_limit=self.sample_time_limit,
+                          possible_moves=possible_moves, stats=stats, fallback_evaluate=evaluate_international)
 
     def get_best_move(self, final_south_hand: set[DominoTile], remaining_tiles: set[DominoTile], 
                       knowledge_tracker: CommonKnowledgeTracker, player_tiles_count: dict[PlayerPosition, int], 
@@ -196,23 +213,38 @@ class AnalyticAgentPlayer(HumanPlayer):
             # for move, score in sample_scores:
             #     move_scores[move].append(score)
 
+        # Counters of the searches of all samples of this move
+        move_search_stats = SearchStats() if self.collect_stats else None
+
         # Use ProcessPoolExecutor to parallelize the execution
         with ProcessPoolExecutor() as executor:
+            # Tasks of samples_per_task samples, each searched with tables shared across its samples
             futures = [
                 executor.submit(
-                    self.sample_and_search,
+                    self.sample_batch_and_search_stats,
+                    min(self.samples_per_task, num_samples - start),
                     final_south_hand,
                     final_remaining_tiles_without_south_tiles,
                     player_tiles_count,
                     inferred_knowledge_for_current_player,
                     board_ends
                 )
-                for _ in range(num_samples)
+                for start in range(0, num_samples, self.samples_per_task)
             ]
-            for future in tqdm(as_completed(futures), total=num_samples, desc="Analyzing moves", leave=False):
-                sample_scores = future.result()
-                for move, score in sample_scores:
-                    move_scores[move].append(score)
+            with tqdm(total=num_samples, desc="Analyzing moves", leave=False) as progress:
+                for future in as_completed(futures):
+                    batch_scores, batch_stats = future.result()
+                    if batch_stats is not None:
+                        move_search_stats.merge(batch_stats)
+                    for sample_scores in batch_scores:
+                        for move, score in sample_scores:
+                            move_scores[move].append(score)
+                    progress.update(len(batch_scores))
+
+        if move_search_stats is not None:
+            self.search_stats.append(move_search_stats)
+            if verbose:
+                print(f"\nSearch statistics:\n{move_search_stats.report()}")
 
         if not move_scores:
             if verbose:
@@ -3,19 +3,46 @@ from collections import defaultdict
 from DominoGameState import DominoGameState
 from domino_data_types import DominoTile, PlayerPosition, GameState, PlayerPosition_SOUTH, PlayerPosition_names, move
 from get_best_move2 import get_best_move_alpha_beta
+from solve_many import solve_many
+from static_evaluation import evaluate_international
+from search_stats import SearchStats
 # from get_best_move_venezuelan import get_best_move_alpha_beta
 from domino_utils import history_to_domino_tiles_history, list_possible_moves, list_possible_moves_from_hand
-from domino_game_tracker import domino_game_state_our_perspective, generate_sample_from_game_state
+from domino_game_tracker import domino_game_state_our_perspective, generate_sample_from_game_state, generate_samples_from_game_state
 from domino_common_knowledge import CommonKnowledgeTracker
+from opponent_model import OpponentModel, DealLikelihood, weighted_mean_std, normalized_weights
 from statistics import mean, median, stdev, mode
-import copy, time
+import copy, math, time
 from tqdm import tqdm
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from scipy import stats as scipy_stats
 
+def confidence_interval(mean_score: float, std_dev: float, n: float, confidence_level: float) -> tuple[float, float]:
+    """
+    t interval of the mean of n samples, n being the effective sample size of weighted samples (see weighted_mean_std).
+    With a single effective sample the spread is unknown: the interval is unbounded, so that the move is neither
+    pruned nor used to prune the others.
+    """
+    if n <= 1:
+        return -math.inf, math.inf
+    if std_dev == 0:
+        return mean_score, mean_score
+    return scipy_stats.t.interval(confidence=confidence_level, df=n-1, loc=mean_score, scale=std_dev/n**0.5)
+
 class AnalyticAgentPlayer(HumanPlayer):
-    def __init__(self, position: int = 0) -> None:
+    def __init__(self, position: int = 0, sample_time_limit: float|None = None, samples_per_task: int = 2, collect_stats: bool = False, opponent_model: OpponentModel|None = None) -> None:
         super().__init__()
+        # Policy of the other players, the samples are weighted by the likelihood of their plays (see DealLikelihood
+        # and opponent_model.DEFAULT_OPPONENT_MODEL). None (the default) weighs every sample the same
+        self.opponent_model = opponent_model
+        # Search time per sample, None for exact unbudgeted searches. A sample whose search does not finish in time
+        # is scored by the static evaluation of the moves instead (see SearchStats.budget_fallbacks)
+        self.sample_time_limit = sample_time_limit
+        # Samples searched by each worker task, with tables shared across the samples of the task
+        self.samples_per_task = samples_per_task
+        # Search counters of every move decision (see search_stats), only collected when collect_stats is set
+        self.collect_stats = collect_stats
+        self.search_stats: list[SearchStats] = []
         self.move_history: list[tuple[int, tuple[tuple[int, int], str]|None]] = []
         self.tile_count_history: dict[int, list[int]] = defaultdict(list)
         # self.round_scores: list[int] = []
@@ -51,7 +78,8 @@ class AnalyticAgentPlayer(HumanPlayer):
         if verbose:
             self.print_verbose_info(_player_hand, _unplayed_tiles, _knowledge_tracker, _player_tiles_count, _starting_player)
 
-        best_move = self.get_best_move(set(_player_hand), _remaining_tiles, _knowledge_tracker, _player_tiles_count, _board_ends, verbose=verbose)
+        best_move = self.get_best_move(set(_player_hand), _remaining_tiles, _knowledge_tracker, _player_tiles_count, _board_ends, verbose=verbose,
+                                       history=_moves, starting_player=_starting_player)
 
         if best_move is None:
             return None
@@ -78,7 +106,7 @@ class AnalyticAgentPlayer(HumanPlayer):
         print("----------------------------\n")
 
 
-    def sample_and_search(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None) -> list[tuple[move, float]]:
+    def generate_sample_state(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> GameState:
         sample = generate_sample_from_game_state(
             PlayerPosition_SOUTH,
             final_south_hand,
@@ -94,7 +122,7 @@ class AnalyticAgentPlayer(HumanPlayer):
             frozenset(sample['W'])
         )
 
-        sample_state = GameState(
+        return GameState(
             player_hands=sample_hands,
             current_player=PlayerPosition_SOUTH,
             left_end=board_ends[0],
@@ -102,30 +130,68 @@ class AnalyticAgentPlayer(HumanPlayer):
             consecutive_passes=0
         )
 
-        depth = 2 * (28 + 4)
+    def generate_sample_states(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> list[GameState]:
+        # The deals of the batch are drawn at once, see generate_samples
+        tiles, owners = generate_samples_from_game_state(
+            num_samples,
+            PlayerPosition_SOUTH,
+            final_south_hand,
+            final_remaining_tiles_without_south_tiles,
+            player_tiles_count,
+            inferred_knowledge_for_current_player
+        )
+        south_hand = frozenset(final_south_hand)
+        sample_states = []
+        for row in owners.tolist():
+            # Owners are 0 for N, 1 for E and 2 for W
+            sample_hands: tuple[list[DominoTile], list[DominoTile], list[DominoTile]] = ([], [], [])
+            for tile, owner in zip(tiles, row):
+                sample_hands[owner].append(tile)
+            sample_states.append(GameState(
+                player_hands=(south_hand, frozenset(sample_hands[1]), frozenset(sample_hands[0]), frozenset(sample_hands[2])),
+                current_player=PlayerPosition_SOUTH,
+                left_end=board_ends[0],
+                right_end=board_ends[1],
+                consecutive_passes=0
+            ))
+        return sample_states
 
-        if possible_moves is None:
-            possible_moves = list_possible_moves(sample_state)
-        move_scores: list[tuple[move, float]] = []
+    def sample_and_search(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None) -> list[tuple[move, float]]:
+        return self.sample_batch_and_search(1, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends, possible_moves)[0]
 
-        sample_cache: dict[GameState, tuple[int, int]] = {}
-        for move in possible_moves:
-            if move[0] is None:
-                new_state = sample_state.pass_turn()
-            else:
-                tile, is_left = move[0]
-                new_state = sample_state.play_hand(tile, is_left)
+    def sample_batch_and_search_stats(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None, likelihood: DealLikelihood|None = None) -> tuple[list[list[tuple[move, float]]], list[float], SearchStats|None]:
+        # Runs in the worker processes, the counters and the log weights of the samples are sent back with the scores
+        stats = SearchStats() if self.collect_stats else None
+        sample_states = self.generate_sample_states(num_samples, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends)
+        log_weights = [likelihood.log_weight(sample_state.player_hands) if likelihood is not None else 0.0 for sample_state in sample_states]
+        batch_scores = self.sample_batch_and_search(num_samples, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends, possible_moves,
+                                                    stats=stats, sample_states=sample_states)
+        return batch_scores, log_weights, stats
+
+    def sample_batch_and_search(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None, stats: SearchStats|None = None, sample_states: list[GameState]|None = None) -> list[list[tuple[move, float]]]:
+        if sample_states is None:
+            sample_states = self.generate_sample_states(num_samples, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends)
 
-            # _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
-            _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
-            assert best_score % 1 == 0.0, f"Score is not an integer: {best_score}, state: {new_state}"
-            move_scores.append((move[0], best_score))
-        # return move[0], best_score
-        return move_scores
+        depth = 2 * (28 + 4)
+
+        if possible_moves is None:
+            possible_moves = list_possible_moves(sample_states[0])
+
+        # The samples of a batch share their tables, see solve_many
+        batch_cache: dict[int, tuple[int, int]] = {}
+        batch_ab_cache: dict[int, tuple[int, int, float, move]] = {}
+        batch_scores = solve_many(sample_states, depth + 1, batch_cache, batch_ab_cache, time_limit=self.sample_time_limit,
+                                  possible_moves=possible_moves, stats=stats, fallback_evaluate=evaluate_international)
+        for sample_state, move_scores in zip(sample_states, batch_scores):
+            for _, best_score in move_scores:
+                # Exact unless a search ran out of time and fell back to the static evaluation
+                assert best_score % 1 == 0.0 or self.sample_time_limit is not None, f"Score is not an integer: {best_score}, state: {sample_state}"
+        return batch_scores
 
     def get_best_move(self, final_south_hand: set[DominoTile], remaining_tiles: set[DominoTile], 
                       knowledge_tracker: CommonKnowledgeTracker, player_tiles_count: dict[PlayerPosition, int], 
-                      board_ends: tuple[int|None,int|None], verbose: bool = False) -> tuple[DominoTile, bool] | None:
+                      board_ends: tuple[int|None,int|None], verbose: bool = False,
+                      history: list[move]|None = None, starting_player: PlayerPosition = PlayerPosition_SOUTH) -> tuple[DominoTile, bool] | None:
 
         inferred_knowledge: dict[PlayerPosition, set[DominoTile]] = {
             # player: set() for player in PlayerPosition
@@ -145,6 +211,9 @@ class AnalyticAgentPlayer(HumanPlayer):
             inferred_knowledge_for_current_player[player] = tiles - final_south_hand
 
         move_scores = defaultdict(list)
+        # Log weights of the samples of move_scores, see DealLikelihood
+        move_log_weights: dict[move, list[float]] = defaultdict(list)
+        likelihood = DealLikelihood.from_history(history, starting_player, self.opponent_model) if self.opponent_model is not None and history else None
 
         # Use ProcessPoolExecutor to parallelize the execution
         total_samples = 0
@@ -158,36 +227,48 @@ class AnalyticAgentPlayer(HumanPlayer):
         start_time = time.time()
         time_limit = 90  # 30 seconds time limit
 
+        # Counters of the searches of all samples of this move
+        move_search_stats = SearchStats() if self.collect_stats else None
+
         with ProcessPoolExecutor() as executor:
             
             while total_samples < max_samples:
+                round_size = min(batch_size, max_samples - total_samples)
+                # Tasks of samples_per_task samples, each searched with tables shared across its samples
                 futures = [
                     executor.submit(
-                        self.sample_and_search,
+                        self.sample_batch_and_search_stats,
+                        min(self.samples_per_task, round_size - start),
                         final_south_hand,
                         final_remaining_tiles_without_south_tiles,
                         player_tiles_count,
                         inferred_knowledge_for_current_player,
                         board_ends,
-                        possible_moves
+                        possible_moves,
+                        likelihood
                     )
-                    for _ in range(min(batch_size, max_samples - total_samples))
+                    for start in range(0, round_size, self.samples_per_task)
                 ]
-                for future in tqdm(as_completed(futures), total=len(futures), desc=f"Analyzing moves (total: {total_samples})", leave=False):
-                    sample_scores = future.result()
-                    for move, score in sample_scores:
-                        assert score % 1 == 0.0, f"Score is not an integer: {score}"
-                        move_scores[move].append(score)
-                
-                total_samples += len(futures)
+                with tqdm(total=round_size, desc=f"Analyzing moves (total: {total_samples})", leave=False) as progress:
+                    for future in as_completed(futures):
+                        batch_scores, batch_log_weights, batch_stats = future.result()
+                        if batch_stats is not None:
+                            move_search_stats.merge(batch_stats)
+                        for sample_scores, log_weight in zip(batch_scores, batch_log_weights):
+                            for move, score in sample_scores:
+                                assert score % 1 == 0.0 or self.sample_time_limit is not None, f"Score is not an integer: {score}"
+                                move_scores[move].append(score)
+                                move_log_weights[move].append(log_weight)
+                            progress.update(1)
+
+                total_samples += round_size
 
                 # Calculate confidence intervals
                 move_stats = {}
                 for move, scores in move_scores.items():
-                    n = len(scores)
-                    mean_score = mean(scores)
-                    std_dev = stdev(scores) if n > 1 else 0
-                    ci = scipy_stats.t.interval(confidence=confidence_level, df=n-1, loc=mean_score, scale=std_dev/n**0.5)
+                    # Weighted by the likelihood of the samples, with their effective number in place of n
+                    mean_score, std_dev, n = weighted_mean_std(scores, normalized_weights(move_log_weights[move]))
+                    ci = confidence_interval(mean_score, std_dev, n, confidence_level)
                     move_stats[move] = {"mean": mean_score, "ci_lower": ci[0], "ci_upper": ci[1]}
 
                 # Check if time limit is exceeded
@@ -197,7 +278,7 @@ class AnalyticAgentPlayer(HumanPlayer):
                 
                 # Print statistics after each batch
                 if verbose:
-                    self.print_move_statistics(move_scores, total_samples)
+                    self.print_move_statistics(move_scores, total_samples, move_log_weights)
 
                 if not move_scores or len(move_scores) == 1:
                     # If there's only one move or a pass, we're done after min_samples
@@ -219,45 +300,52 @@ class AnalyticAgentPlayer(HumanPlayer):
                     continue
 
 
+        if move_search_stats is not None:
+            self.search_stats.append(move_search_stats)
+            if verbose:
+                print(f"\nSearch statistics:\n{move_search_stats.report()}")
+
         if not move_scores:
             if verbose:
                 print("No legal moves available. Player must pass.")
             return None
 
         if verbose:
-            self.print_move_statistics(move_scores, total_samples)
+            self.print_move_statistics(move_scores, total_samples, move_log_weights)
             # Calculate the time taken to find the best move
             time_taken = time.time() - start_time
             print(f"\nTime taken to find the best move: {time_taken:.2f} seconds")
 
-        best_move = max(move_scores, key=lambda x: mean(move_scores[x]))
+        best_move = max(move_scores, key=lambda x: weighted_mean_std(move_scores[x], normalized_weights(move_log_weights[x]))[0])
         return best_move
 
-    def print_move_statistics(self, move_scores: dict[move, list[float]], num_samples: int) -> None:
+    def print_move_statistics(self, move_scores: dict[move, list[float]], num_samples: int, move_log_weights: dict[move, list[float]]|None = None) -> None:
         print(f"\nMove Statistics (based on {num_samples} samples):")
 
         # Calculate statistics for each move
         move_statistics = {}
         for move, scores in move_scores.items():
             if len(scores) > 1:                
-                n = len(scores)
-                mean_score = mean(scores)
-                std_dev = stdev(scores)
-                confidence_interval = scipy_stats.t.interval(confidence=0.95, df=n-1, loc=mean_score, scale=std_dev/n**0.5)
+                # The mean, deviation and interval are weighted by the likelihood of the samples
+                weights = normalized_weights(move_log_weights[move]) if move_log_weights is not None else [1.0] * len(scores)
+                mean_score, std_dev, n = weighted_mean_std(scores, weights)
+                move_ci = confidence_interval(mean_score, std_dev, n, 0.95)
                 move_statistics[move] = {
-                    "count": n,
+                    "count": len(scores),
+                    "effective_count": n,
                     "mean": mean_score,
                     "std_dev": std_dev,
                     "median": median(scores),
                     "mode": mode(scores),
                     "min": min(scores),
                     "max": max(scores),
-                    "ci_lower": confidence_interval[0],
-                    "ci_upper": confidence_interval[1]
+                    "ci_lower": move_ci[0],
+                    "ci_upper": move_ci[1]
                 }
             else:
                 move_statistics[move] = {
                     "count": len(scores),
+                    "effective_count": len(scores),
                     "mean": scores[0],
                     "std_dev": 0,
                     "median": scores[0],
@@ -281,7 +369,7 @@ class AnalyticAgentPlayer(HumanPlayer):
                 move_str = f"Play {tile} on the {direction}"
 
             print(f"\nMove: {move_str}")
-            print(f"  Count: {stats['count']}")
+            print(f"  Count: {stats['count']} (effective: {stats['effective_count']:.1f})")
             print(f"  Mean Score: {stats['mean']:.4f}")
             print(f"  Standard Deviation: {stats['std_dev']:.4f}")
             print(f"  Median Score: {stats['median']:.4f}")
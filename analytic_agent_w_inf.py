@@ -4,6 +4,9 @@ from collections import defaultdict
 from DominoGameState import DominoGameState
 from domino_data_types import PLAYERS, PLAYERS_INDEX, DominoTile, PlayerPosition, GameState, PlayerPosition_SOUTH, PlayerPosition_names, PlayerTiles, PlayerTiles4, move
 from get_best_move2 import get_best_move_alpha_beta
+from solve_many import solve_many
+from static_evaluation import evaluate_international
+from search_stats import SearchStats
 from domino_utils import history_to_domino_tiles_history, list_possible_moves, list_possible_moves_from_hand
 from domino_game_tracker import domino_game_state_our_perspective, generate_sample_from_game_state
 from domino_common_knowledge import CommonKnowledgeTracker
@@ -15,8 +18,16 @@ from inference import probability_from_another_perspective
 from scipy import stats as scipy_stats
 
 class AnalyticAgentPlayer(HumanPlayer):
-    def __init__(self, position: int = 0) -> None:
+    def __init__(self, position: int = 0, sample_time_limit: float|None = None, samples_per_task: int = 2, collect_stats: bool = False) -> None:
         super().__init__()
+        # Search time per sample, None for exact unbudgeted searches. A sample whose search does not finish in time
+        # is scored by the static evaluation of the moves instead (see SearchStats.budget_fallbacks)
+        self.sample_time_limit = sample_time_limit
+        # Samples searched by each worker task, with tables shared across the samples of the task
+        self.samples_per_task = samples_per_task
+        # Search counters of every move decision (see search_stats), only collected when collect_stats is set
+        self.collect_stats = collect_stats
+        self.search_stats: list[SearchStats] = []
         self.move_history: list[tuple[int, tuple[tuple[int, int], str]|None]] = []
         self.tile_count_history: dict[int, list[int]] = defaultdict(list)
         self.position = position
@@ -205,7 +216,7 @@ class AnalyticAgentPlayer(HumanPlayer):
             print(f"  {PlayerPosition_names[player]}: {count}")
         print("----------------------------\n")
 
-    def sample_and_search(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None) -> list[tuple[move, float]]:
+    def generate_sample_state(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None]) -> GameState:
         sample = generate_sample_from_game_state(
             PlayerPosition_SOUTH,
             final_south_hand,
@@ -221,7 +232,7 @@ class AnalyticAgentPlayer(HumanPlayer):
             frozenset(sample['W'])
         )
 
-        sample_state = GameState(
+        return GameState(
             player_hands=sample_hands,
             current_player=PlayerPosition_SOUTH,
             left_end=board_ends[0],
@@ -229,23 +240,31 @@ class AnalyticAgentPlayer(HumanPlayer):
             consecutive_passes=0
         )
 
+    def sample_and_search(self, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None) -> list[tuple[move, float]]:
+        return self.sample_batch_and_search(1, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends, possible_moves)[0]
+
+    def sample_batch_and_search_stats(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None) -> tuple[list[list[tuple[move, float]]], SearchStats|None]:
+        # Runs in the worker processes, the counters are sent back with the scores
+        stats = SearchStats() if self.collect_stats else None
+        return self.sample_batch_and_search(num_samples, final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends, possible_moves, stats=stats), stats
+
+    def sample_batch_and_search(self, num_samples: int, final_south_hand: set[DominoTile], final_remaining_tiles_without_south_tiles: set[DominoTile], player_tiles_count: dict[PlayerPosition, int], inferred_knowledge_for_current_player: dict[PlayerPosition, set[DominoTile]], board_ends: tuple[int|None,int|None], possible_moves: list[tuple[tuple[DominoTile, bool] | None, int | None, float | None]]|None = None, stats: SearchStats|None = None) -> list[list[tuple[move, float]]]:
+        sample_states = [
+            self.generate_sample_state(final_south_hand, final_remaining_tiles_without_south_tiles, player_tiles_count, inferred_knowledge_for_current_player, board_ends)
+            for _ in range(num_samples)
+        ]
+
         depth = 99 # Set it high enough, that it is never reached in practice, so the score is an integer
 
         if possible_moves is None:
-            possible_moves = list_possible_moves(sample_state)
-        move_scores: list[tuple[move, float]] = []
+            possible_moves = list_possible_moves(sample_states[0])
 
-        sample_cache: dict[GameState, tuple[int, int]] = {}
-        for move in possible_moves:
-            if move[0] is None:
-                new_state = sample_state.pass_turn()
-            else:
-                tile, is_left = move[0]
-                new_state = sample_state.play_hand(tile, is_left)
-
-            _, best_score, _ = get_best_move_alpha_beta(new_state, depth, sample_cache, best_path_flag=False)
-            move_scores.append((move[0], best_score))
-        return move_scores
+        # The samples of a batch share their tables, see solve_many
+        batch_cache: dict[int, tuple[int, int]] = {}
+        batch_ab_cache: dict[int, tuple[int, int, float, move]] = {}
+        batch_scores = solve_many(sample_states, depth + 1, batch_cache, batch_ab_cache, time_limit=self.sample_time_limit,
+                                  possible_moves=possible_moves, stats=stats, fallback_evaluate=evaluate_international)
+        return batch_scores
 
     def get_best_move(self, final_south_hand: set[DominoTile], remaining_tiles: set[DominoTile], 
                       knowledge_tracker: CommonKnowledgeTracker, player_tiles_count: dict[PlayerPosition, int], 
@@ -282,12 +301,18 @@ class AnalyticAgentPlayer(HumanPlayer):
         start_time = time.time()
         time_limit = 60  # 30 seconds time limit
 
+        # Counters of the searches of all samples of this move
+        move_search_stats = SearchStats() if self.collect_stats else None
+
         with ProcessPoolExecutor() as executor:
             
             while total_samples < max_samples:
+                round_size = min(batch_size, max_samples - total_samples)
+                # Tasks of samples_per_task samples, each searched with tables shared across its samples
                 futures = [
                     executor.submit(
-                        self.sample_and_search,
+                        self.sample_batch_and_search_stats,
+                        min(self.samples_per_task, round_size - start),
                         final_south_hand,
                         final_remaining_tiles_without_south_tiles,
                         player_tiles_count,
@@ -295,14 +320,19 @@ class AnalyticAgentPlayer(HumanPlayer):
                         board_ends,
                         possible_moves
                     )
-                    for _ in range(min(batch_size, max_samples - total_samples))
+                    for start in range(0, round_size, self.samples_per_task)
                 ]
-                for future in tqdm(as_completed(futures), total=len(futures), desc=f"Analyzing moves (total: {total_samples})", leave=False):
-                    sample_scores = future.result()
-                    for move, score in sample_scores:
-                        move_scores[move].append(score)
-                
-                total_samples += len(futures)
+                with tqdm(total=round_size, desc=f"Analyzing moves (total: {total_samples})", leave=False) as progress:
+                    for future in as_completed(futures):
+                        batch_scores, batch_stats = future.result()
+                        if batch_stats is not None:
+                            move_search_stats.merge(batch_stats)
+                        for sample_scores in batch_scores:
+                            for move, score in sample_scores:
+                                move_scores[move].append(score)
+                            progress.update(1)
+
+                total_samples += round_size
 
                 # Calculate confidence intervals
                 move_stats = {}
@@ -342,6 +372,11 @@ class AnalyticAgentPlayer(HumanPlayer):
                     continue
 
 
+        if move_search_stats is not None:
+            self.search_stats.append(move_search_stats)
+            if verbose:
+                print(f"\nSearch statistics:\n{move_search_stats.report()}")
+
         if not move_scores:
             if verbose:
                 print("No legal moves available. Player must pass.")
@@ -0,0 +1,255 @@
+from domino_data_types import DominoTile, GameState, PlayerPosition
+
+# Packed state layout (a single Python int):
+#   bits   0..111  one 28-bit tile mask per player hand (player p at bit 28 * p)
+#   bits 112..114  left end  (EMPTY_END when the board is empty)
+#   bits 115..117  right end (EMPTY_END when the board is empty)
+#   bits 118..119  current player
+#   bits 120..122  consecutive passes
+type PackedState = int
+type PackedMove = tuple[int, bool]|None
+
+NUM_TILES = 28
+HAND_BITS = NUM_TILES
+HAND_MASK = (1 << HAND_BITS) - 1
+ALL_HANDS_MASK = (1 << (4 * HAND_BITS)) - 1
+
+LEFT_SHIFT = 4 * HAND_BITS
+RIGHT_SHIFT = LEFT_SHIFT + 3
+PLAYER_SHIFT = RIGHT_SHIFT + 3
+PASSES_SHIFT = PLAYER_SHIFT + 2
+
+EMPTY_END = 7
+END_MASK = 0b111
+PLAYER_MASK = 0b11
+PASSES_MASK = 0b111
+
+# Clears ends, current player and passes, keeping the hands
+STATE_INFO_CLEAR = ALL_HANDS_MASK
+ENDS_FIELD_MASK = (END_MASK << LEFT_SHIFT) | (END_MASK << RIGHT_SHIFT)
+
+TILES: list[DominoTile] = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+TILE_INDEX: dict[DominoTile, int] = {tile: i for i, tile in enumerate(TILES)}
+TILE_PIPS: list[int] = [tile.get_pip_sum() for tile in TILES]
+
+# SUIT_MASKS[s] has a bit set for every tile that shows suit s
+SUIT_MASKS: list[int] = [sum(1 << i for i, tile in enumerate(TILES) if suit in (tile.top, tile.bottom)) for suit in range(7)]
+
+# OTHER_END[tile_index][suit] is the end left open after connecting the tile on that suit
+OTHER_END: list[list[int]] = [[tile.get_other_end(suit) for suit in range(7)] for tile in TILES]
+
+# Packed ends after opening the board with a tile
+TILE_ENDS_PACKED: list[int] = [(tile.top << LEFT_SHIFT) | (tile.bottom << RIGHT_SHIFT) for tile in TILES]
+
+# Pip sums of 14-bit halves of a hand mask, so a hand's pip total is two table lookups
+_HALF_BITS = HAND_BITS // 2
+_HALF_MASK = (1 << _HALF_BITS) - 1
+
+
+def _half_pip_table(offset: int) -> list[int]:
+    table = [0] * (1 << _HALF_BITS)
+    for mask in range(1, 1 << _HALF_BITS):
+        low = mask & -mask
+        table[mask] = table[mask ^ low] + TILE_PIPS[offset + low.bit_length() - 1]
+    return table
+
+
+PIP_SUM_LO: list[int] = _half_pip_table(0)
+PIP_SUM_HI: list[int] = _half_pip_table(_HALF_BITS)
+
+
+def hand_pip_sum(hand: int) -> int:
+    return PIP_SUM_LO[hand & _HALF_MASK] + PIP_SUM_HI[hand >> _HALF_BITS]
+
+
+def tiles_to_mask(tiles: frozenset[DominoTile]|set[DominoTile]|list[DominoTile]) -> int:
+    mask = 0
+    for tile in tiles:
+        mask |= 1 << TILE_INDEX[tile]
+    return mask
+
+
+def mask_to_tiles(mask: int) -> frozenset[DominoTile]:
+    tiles = []
+    while mask:
+        low = mask & -mask
+        tiles.append(TILES[low.bit_length() - 1])
+        mask ^= low
+    return frozenset(tiles)
+
+
+def pack_state(hands: tuple[int, int, int, int]|list[int], current_player: PlayerPosition, left_end: int|None, right_end: int|None, consecutive_passes: int) -> PackedState:
+    packed = hands[0] | (hands[1] << HAND_BITS) | (hands[2] << (2 * HAND_BITS)) | (hands[3] << (3 * HAND_BITS))
+    packed |= (EMPTY_END if left_end is None else left_end) << LEFT_SHIFT
+    packed |= (EMPTY_END if right_end is None else right_end) << RIGHT_SHIFT
+    packed |= current_player << PLAYER_SHIFT
+    packed |= consecutive_passes << PASSES_SHIFT
+    return packed
+
+
+def encode_state(state: GameState) -> PackedState:
+    """
+    Convert a GameState into its packed integer representation.
+
+    :param state: The GameState to encode
+    :return: The packed state
+    """
+    return pack_state(
+        [tiles_to_mask(hand) for hand in state.player_hands],
+        state.current_player,
+        state.left_end,
+        state.right_end,
+        state.consecutive_passes
+    )
+
+
+def decode_state(packed: PackedState) -> GameState:
+    """
+    Convert a packed state back into a GameState.
+
+    :param packed: The packed state
+    :return: The equivalent GameState
+    """
+    left_end = (packed >> LEFT_SHIFT) & END_MASK
+    right_end = (packed >> RIGHT_SHIFT) & END_MASK
+    return GameState(
+        player_hands=tuple(mask_to_tiles(get_hand(packed, player)) for player in range(4)),
+        current_player=get_current_player(packed),
+        left_end=None if left_end == EMPTY_END else left_end,
+        right_end=None if right_end == EMPTY_END else right_end,
+        consecutive_passes=get_consecutive_passes(packed)
+    )
+
+
+def get_hand(packed: PackedState, player: PlayerPosition) -> int:
+    return (packed >> (HAND_BITS * player)) & HAND_MASK
+
+
+def get_current_player(packed: PackedState) -> PlayerPosition:
+    return (packed >> PLAYER_SHIFT) & PLAYER_MASK
+
+
+def get_consecutive_passes(packed: PackedState) -> int:
+    return (packed >> PASSES_SHIFT) & PASSES_MASK
+
+
+def get_ends(packed: PackedState) -> tuple[int, int]:
+    return (packed >> LEFT_SHIFT) & END_MASK, (packed >> RIGHT_SHIFT) & END_MASK
+
+
+def play_tile(packed: PackedState, tile_index: int, left: bool) -> PackedState:
+    """
+    Play a tile from the current player's hand. The move is assumed to be legal.
+
+    :param packed: The packed state
+    :param tile_index: Index of the tile in TILES
+    :param left: True to play on the left end, False for the right end
+    :return: The packed state after the move
+    """
+    current_player = (packed >> PLAYER_SHIFT) & PLAYER_MASK
+    left_end = (packed >> LEFT_SHIFT) & END_MASK
+    right_end = (packed >> RIGHT_SHIFT) & END_MASK
+
+    if left_end == EMPTY_END:
+        tile = TILES[tile_index]
+        left_end, right_end = tile.top, tile.bottom
+    elif left:
+        left_end = OTHER_END[tile_index][left_end]
+    else:
+        right_end = OTHER_END[tile_index][right_end]
+
+    hands = (packed & STATE_INFO_CLEAR) ^ (1 << (HAND_BITS * current_player + tile_index))
+    return (hands
+            | (left_end << LEFT_SHIFT)
+            | (right_end << RIGHT_SHIFT)
+            | (((current_player + 1) & PLAYER_MASK) << PLAYER_SHIFT))
+
+
+def pass_turn(packed: PackedState) -> PackedState:
+    current_player = (packed >> PLAYER_SHIFT) & PLAYER_MASK
+    passes = (packed >> PASSES_SHIFT) & PASSES_MASK
+    packed &= ~((PLAYER_MASK << PLAYER_SHIFT) | (PASSES_MASK << PASSES_SHIFT))
+    return packed | (((current_player + 1) & PLAYER_MASK) << PLAYER_SHIFT) | ((passes + 1) << PASSES_SHIFT)
+
+
+def is_game_over(packed: PackedState) -> bool:
+    if (packed >> PASSES_SHIFT) & PASSES_MASK == 4:
+        return True
+    return not (packed & HAND_MASK
+                and (packed >> HAND_BITS) & HAND_MASK
+                and (packed >> (2 * HAND_BITS)) & HAND_MASK
+                and (packed >> (3 * HAND_BITS)) & HAND_MASK)
+
+
+def list_possible_moves(packed: PackedState) -> list[PackedMove]:
+    """
+    List the legal moves of the current player, using the per-suit tile masks.
+
+    :param packed: The packed state
+    :return: A list of (tile_index, is_left) moves, or [None] if the player must pass
+    """
+    hand = (packed >> (HAND_BITS * ((packed >> PLAYER_SHIFT) & PLAYER_MASK))) & HAND_MASK
+    left_end = (packed >> LEFT_SHIFT) & END_MASK
+    moves: list[PackedMove] = []
+
+    if left_end == EMPTY_END:
+        playable_left, playable_right = hand, 0
+    else:
+        right_end = (packed >> RIGHT_SHIFT) & END_MASK
+        playable_left = hand & SUIT_MASKS[left_end]
+        playable_right = hand & SUIT_MASKS[right_end] if left_end != right_end else 0
+
+    while playable_left:
+        low = playable_left & -playable_left
+        moves.append((low.bit_length() - 1, True))
+        playable_left ^= low
+    while playable_right:
+        low = playable_right & -playable_right
+        moves.append((low.bit_length() - 1, False))
+        playable_right ^= low
+
+    if not moves:
+        moves.append(None)
+    return moves
+
+
+def apply_move(packed: PackedState, move: PackedMove) -> PackedState:
+    if move is None:
+        return pass_turn(packed)
+    return play_tile(packed, move[0], move[1])
+
+
+def determine_winning_pair(packed: PackedState) -> tuple[int, int, int]:
+    hand_0 = packed & HAND_MASK
+    hand_1 = (packed >> HAND_BITS) & HAND_MASK
+    hand_2 = (packed >> (2 * HAND_BITS)) & HAND_MASK
+    hand_3 = (packed >> (3 * HAND_BITS)) & HAND_MASK
+
+    pair_0_pips = hand_pip_sum(hand_0) + hand_pip_sum(hand_2)
+    pair_1_pips = hand_pip_sum(hand_1) + hand_pip_sum(hand_3)
+
+    # Check if a player has run out of tiles
+    for i, hand in enumerate((hand_0, hand_1, hand_2, hand_3)):
+        if hand == 0:
+            return i % 2, pair_0_pips, pair_1_pips
+
+    # If we're here, the game must be blocked
+    if pair_1_pips == pair_0_pips:
+        result = -1
+    else:
+        result = 1 if pair_1_pips < pair_0_pips else 0
+    return result, pair_0_pips, pair_1_pips
+
+
+def move_to_domino_move(packed_move: PackedMove) -> tuple[DominoTile, bool]|None:
+    if packed_move is None:
+        return None
+    tile_index, is_left = packed_move
+    return TILES[tile_index], is_left
+
+
+def domino_move_to_packed(domino_move: tuple[DominoTile, bool]|None) -> PackedMove:
+    if domino_move is None:
+        return None
+    tile, is_left = domino_move
+    return TILE_INDEX[tile], is_left
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import random
+from dataclasses import dataclass, field
 from collections import namedtuple
 
 type move = tuple[DominoTile, bool]|None
@@ -58,6 +59,42 @@ class DominoTile:
     def get_pip_sum(self) -> int:
         return self.top + self.bottom
 
+# Zobrist tables for GameState keys. A fixed seed keeps keys stable across processes,
+# so caches built in worker processes or saved to disk stay valid.
+_zobrist_rng = random.Random(0x5EED_D0)
+# Kept below 61 bits so hash(state) == state.key (larger ints get reduced by hash())
+ZOBRIST_BITS = 60
+# ZOBRIST_TILE[player][hash(tile)]: tile held by player (DominoTile hash is (top<<3)+bottom)
+ZOBRIST_TILE: list[list[int]] = [[_zobrist_rng.getrandbits(ZOBRIST_BITS) for _ in range(7 << 3)] for _ in range(4)]
+# Index 7 is used for an empty board (end is None)
+ZOBRIST_LEFT_END: list[int] = [_zobrist_rng.getrandbits(ZOBRIST_BITS) for _ in range(8)]
+ZOBRIST_RIGHT_END: list[int] = [_zobrist_rng.getrandbits(ZOBRIST_BITS) for _ in range(8)]
+ZOBRIST_PLAYER: list[int] = [_zobrist_rng.getrandbits(ZOBRIST_BITS) for _ in range(4)]
+ZOBRIST_PASSES: list[int] = [_zobrist_rng.getrandbits(ZOBRIST_BITS) for _ in range(5)]
+
+# ZOBRIST_ROTATED_TILE[player][hash(tile)][r]: tile held by player, in the frame where seat r is SOUTH
+ZOBRIST_ROTATED_TILE: list[list[tuple[int, int, int, int]]] = [
+    [(ZOBRIST_TILE[player][t], ZOBRIST_TILE[(player - 1) % 4][t], ZOBRIST_TILE[(player - 2) % 4][t], ZOBRIST_TILE[(player - 3) % 4][t])
+     for t in range(7 << 3)]
+    for player in range(4)
+]
+
+def _zobrist_end(end: int|None) -> int:
+    return 7 if end is None else end
+
+# Suit index of a hand (see GameState.suit_index): bit 7 * suit + other_end is set for every tile of the hand
+# showing suit, so the 7-bit field of a suit selects the tiles of the hand that can be played on it.
+# SUIT_INDEX_BITS[hash(tile)]: the bits of a tile (a double sets a single bit)
+SUIT_INDEX_BITS: list[int] = [0] * (7 << 3)
+for _top in range(7):
+    for _bottom in range(_top, 7):
+        SUIT_INDEX_BITS[(_top << 3) + _bottom] = (1 << (7 * _top + _bottom)) | (1 << (7 * _bottom + _top))
+# SUIT_TILES[suit][field]: the tiles of a suit selected by a field, as DominoTile.new_tile makes them
+SUIT_TILES: list[list[tuple[DominoTile, ...]]] = [
+    [tuple(DominoTile.new_tile(suit, other_end) for other_end in range(7) if field >> other_end & 1) for field in range(128)]
+    for suit in range(7)
+]
+
 # @dataclass(frozen=True)
 @dataclass
 class GameState:
@@ -66,9 +103,131 @@ class GameState:
     left_end: int|None
     right_end: int|None
     consecutive_passes: int
+    # Zobrist key, computed from scratch only when not supplied (play_hand/pass_turn pass it in updated)
+    key: int = field(default=None, compare=False, repr=False) # type: ignore[assignment]
+    # hand_keys[r]: Zobrist key of the tile ownership with seats rotated so that seat r is SOUTH,
+    # maintained incrementally like key (see canonical_key)
+    hand_keys: tuple[int, int, int, int] = field(default=None, compare=False, repr=False) # type: ignore[assignment]
+    # suit_counts[7 * pair + suit]: ends of suit `suit` on the tiles held by the pair (a double counts twice),
+    # maintained incrementally like key (see is_blocked)
+    suit_counts: tuple[int, ...] = field(default=None, compare=False, repr=False) # type: ignore[assignment]
+    # suit_index[player]: the tiles of each suit in the hand of the player, maintained incrementally like key
+    # (see SUIT_INDEX_BITS and domino_utils.list_possible_moves)
+    suit_index: tuple[int, int, int, int] = field(default=None, compare=False, repr=False) # type: ignore[assignment]
+    # Pips and number of tiles in each hand, maintained incrementally for the end of game tests and scoring
+    pip_sums: tuple[int, int, int, int] = field(default=None, compare=False, repr=False) # type: ignore[assignment]
+    tile_counts: tuple[int, int, int, int] = field(default=None, compare=False, repr=False) # type: ignore[assignment]
+
+    def __post_init__(self) -> None:
+        if self.key is None:
+            self.key = self.compute_key()
+        if self.hand_keys is None:
+            self.hand_keys = self.compute_hand_keys()
+        if self.suit_counts is None:
+            self.suit_counts = self.compute_suit_counts()
+        if self.suit_index is None:
+            self.suit_index = self.compute_suit_index()
+        if self.pip_sums is None:
+            self.pip_sums = self.compute_pip_sums()
+        if self.tile_counts is None:
+            hands = self.player_hands
+            self.tile_counts = (len(hands[0]), len(hands[1]), len(hands[2]), len(hands[3]))
+
+    def compute_key(self) -> int:
+        key = 0
+        for player, hand in enumerate(self.player_hands):
+            zobrist_player_tiles = ZOBRIST_TILE[player]
+            for tile in hand:
+                key ^= zobrist_player_tiles[hash(tile)]
+        key ^= ZOBRIST_LEFT_END[_zobrist_end(self.left_end)]
+        key ^= ZOBRIST_RIGHT_END[_zobrist_end(self.right_end)]
+        key ^= ZOBRIST_PLAYER[self.current_player]
+        key ^= ZOBRIST_PASSES[self.consecutive_passes]
+        return key
+
+    def compute_hand_keys(self) -> tuple[int, int, int, int]:
+        hand_keys = [0, 0, 0, 0]
+        for player, hand in enumerate(self.player_hands):
+            for tile in hand:
+                rotated = ZOBRIST_ROTATED_TILE[player][hash(tile)]
+                for r in range(4):
+                    hand_keys[r] ^= rotated[r]
+        return hand_keys[0], hand_keys[1], hand_keys[2], hand_keys[3]
+
+    def compute_suit_counts(self) -> tuple[int, ...]:
+        suit_counts = [0] * 14
+        for player, hand in enumerate(self.player_hands):
+            base = 7 * (player & 1)
+            for tile in hand:
+                suit_counts[base + tile.top] += 1
+                suit_counts[base + tile.bottom] += 1
+        return tuple(suit_counts)
+
+    def compute_suit_index(self) -> tuple[int, int, int, int]:
+        suit_index = [0, 0, 0, 0]
+        for player, hand in enumerate(self.player_hands):
+            for tile in hand:
+                suit_index[player] |= SUIT_INDEX_BITS[hash(tile)]
+        return suit_index[0], suit_index[1], suit_index[2], suit_index[3]
+
+    def suit_tiles(self, player: int, suit: int) -> tuple[DominoTile, ...]:
+        # Tiles of the hand of a player that show a suit
+        return SUIT_TILES[suit][(self.suit_index[player] >> (7 * suit)) & 127]
+
+    def can_play(self, player: int) -> bool:
+        """True when a tile of the hand of the player fits an end of the board, i.e. it cannot pass."""
+        if self.left_end is None:
+            return self.tile_counts[player] > 0
+        suit_index = self.suit_index[player]
+        return bool((suit_index >> (7 * self.left_end)) & 127 or (suit_index >> (7 * self.right_end)) & 127) # type: ignore[operator]
+
+    def compute_pip_sums(self) -> tuple[int, int, int, int]:
+        hands = self.player_hands
+        return (sum(tile.top + tile.bottom for tile in hands[0]), sum(tile.top + tile.bottom for tile in hands[1]),
+                sum(tile.top + tile.bottom for tile in hands[2]), sum(tile.top + tile.bottom for tile in hands[3]))
+
+    def pair_pips(self, pair: int) -> int:
+        # Pips left in the hands of a pair
+        return self.pip_sums[pair] + self.pip_sums[pair + 2]
+
+    def tiles_left(self) -> int:
+        tile_counts = self.tile_counts
+        return tile_counts[0] + tile_counts[1] + tile_counts[2] + tile_counts[3]
+
+    def is_blocked(self) -> bool:
+        """
+        True when no tile left in any hand matches an end of the board: everyone would pass until
+        the fourth pass ends the game, so the state is already a blocked game.
+        """
+        left_end, right_end = self.left_end, self.right_end
+        if left_end is None:
+            return False
+        suit_counts = self.suit_counts
+        return (suit_counts[left_end] == 0 and suit_counts[7 + left_end] == 0
+                and suit_counts[right_end] == 0 and suit_counts[7 + right_end] == 0)
+
+    def canonical_key(self) -> tuple[int, bool, bool]:
+        """
+        Key shared by the states that are the same game up to symmetry: seats rotated so that the
+        player to move is SOUTH (rotating by one seat swaps the teams, so the score changes sign),
+        and the board ends swapped so that the left end is the smaller one.
+
+        :return: A tuple of (key, negate, swap_ends). negate is True when scores of the canonical state
+                 are those of this state negated, swap_ends when left moves of this state are right
+                 moves of the canonical state.
+        """
+        left_end = _zobrist_end(self.left_end)
+        right_end = _zobrist_end(self.right_end)
+        swap_ends = left_end > right_end
+        if swap_ends:
+            left_end, right_end = right_end, left_end
+        key = (self.hand_keys[self.current_player]
+               ^ ZOBRIST_LEFT_END[left_end] ^ ZOBRIST_RIGHT_END[right_end]
+               ^ ZOBRIST_PASSES[self.consecutive_passes])
+        return key, self.current_player & 1 == 1, swap_ends
 
     def __hash__(self) -> int:
-        return hash((self.player_hands, self.current_player, self.left_end, self.right_end, self.consecutive_passes))
+        return self.key
 
     @classmethod
     def new_game(cls, player_hands: list[list[DominoTile]]) -> 'GameState':
@@ -94,27 +253,67 @@ class GameState:
             new_left_end = self.left_end
             new_right_end = tile.get_other_end(self.right_end)
 
+        new_player = next_player(self.current_player)
+        tile_hash = hash(tile)
+        new_key = (self.key
+                   ^ ZOBRIST_TILE[self.current_player][tile_hash]
+                   ^ ZOBRIST_LEFT_END[_zobrist_end(self.left_end)] ^ ZOBRIST_LEFT_END[new_left_end]
+                   ^ ZOBRIST_RIGHT_END[_zobrist_end(self.right_end)] ^ ZOBRIST_RIGHT_END[new_right_end]
+                   ^ ZOBRIST_PLAYER[self.current_player] ^ ZOBRIST_PLAYER[new_player]
+                   ^ ZOBRIST_PASSES[self.consecutive_passes] ^ ZOBRIST_PASSES[0])
+        hand_keys = self.hand_keys
+        rotated = ZOBRIST_ROTATED_TILE[self.current_player][tile_hash]
+        new_hand_keys = (hand_keys[0] ^ rotated[0], hand_keys[1] ^ rotated[1], hand_keys[2] ^ rotated[2], hand_keys[3] ^ rotated[3])
+        new_suit_counts = list(self.suit_counts)
+        base = 7 * (self.current_player & 1)
+        new_suit_counts[base + tile.top] -= 1
+        new_suit_counts[base + tile.bottom] -= 1
+        player = self.current_player
+        new_suit_index = list(self.suit_index)
+        new_suit_index[player] &= ~SUIT_INDEX_BITS[tile_hash]
+        new_pip_sums = list(self.pip_sums)
+        new_pip_sums[player] -= tile.top + tile.bottom
+        new_tile_counts = list(self.tile_counts)
+        new_tile_counts[player] -= 1
+
         return GameState(
             player_hands=tuple(new_hands),
             # current_player=self.current_player.next(),
-            current_player=next_player(self.current_player),
+            current_player=new_player,
             left_end=new_left_end,
             right_end=new_right_end,
-            consecutive_passes=0
+            consecutive_passes=0,
+            key=new_key,
+            hand_keys=new_hand_keys,
+            suit_counts=tuple(new_suit_counts),
+            suit_index=tuple(new_suit_index), # type: ignore[arg-type]
+            pip_sums=tuple(new_pip_sums), # type: ignore[arg-type]
+            tile_counts=tuple(new_tile_counts) # type: ignore[arg-type]
         )
 
     def pass_turn(self) -> 'GameState':
+        new_player = next_player(self.current_player)
+        new_key = (self.key
+                   ^ ZOBRIST_PLAYER[self.current_player] ^ ZOBRIST_PLAYER[new_player]
+                   ^ ZOBRIST_PASSES[self.consecutive_passes] ^ ZOBRIST_PASSES[self.consecutive_passes + 1])
         return GameState(
             player_hands=self.player_hands,
             # current_player=self.current_player.next(),
-            current_player=next_player(self.current_player),
+            current_player=new_player,
             left_end=self.left_end,
             right_end=self.right_end,
-            consecutive_passes=self.consecutive_passes + 1
+            consecutive_passes=self.consecutive_passes + 1,
+            key=new_key,
+            hand_keys=self.hand_keys,
+            suit_counts=self.suit_counts,
+            suit_index=self.suit_index,
+            pip_sums=self.pip_sums,
+            tile_counts=self.tile_counts
         )
 
     def is_game_over(self) -> bool:
-        return any(len(hand) == 0 for hand in self.player_hands) or self.consecutive_passes == 4
+        # A blocked board ends the game at once instead of after four passes
+        return 0 in self.tile_counts or self.consecutive_passes == 4 or self.is_blocked()
     # def is_game_over(self) -> bool:
     #     cy_state = GameStateCy(
     #         self.player_hands,
@@ -1,185 +1,19 @@
 import pickle
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, FrozenSet
-from enum import Enum
-from collections import deque
+from typing import Optional
 import argparse
+from domino_data_types import DominoTile, GameState, move, PlayerPosition, PlayerPosition_SOUTH, PlayerPosition_EAST, PlayerPosition_NORTH, PlayerPosition_WEST, PlayerPosition_names, next_player
+from domino_utils import setup_game_state
+from get_best_move2 import count_game_stats, determine_winning_pair, min_max_alpha_beta, get_best_move_alpha_beta, principal_variation
+from transposition_table import TranspositionTable
+from parallel_search import get_best_move_alpha_beta_parallel
 
 # from game_state_cy import GameStateCy
 
 
-type PlayerPosition = int
-
-PlayerPosition_SOUTH = 0
-PlayerPosition_EAST = 1
-PlayerPosition_NORTH = 2
-PlayerPosition_WEST = 3
-
-def next_player(pos: PlayerPosition)-> PlayerPosition:
-    return (pos + 1) % 4
-
-PlayerPosition_names = ['SOUTH', 'EAST', 'NORTH', 'WEST']
-
-# class PlayerPosition(Enum):
-#     SOUTH = 0
-#     EAST = 1
-#     NORTH = 2
-#     WEST = 3
-
-#     def next(self):
-#         return PlayerPosition((self.value + 1) % 4)
-
-@dataclass(frozen=True)
-class DominoTile:
-    top: int
-    bottom: int
-
-    @classmethod
-    def new_tile(cls, top: int, bottom: int) -> 'DominoTile':
-        return cls(min(top, bottom), max(top, bottom))
-
-    @classmethod
-    def loi_to_domino_tiles(cls, tuple_list: list[tuple[int, int]]) -> list['DominoTile']:
-        return [DominoTile.new_tile(left, right) for left, right in tuple_list]
-
-    def __repr__(self):
-        return f"{self.top}|{self.bottom}"
-
-    def can_connect(self, end: Optional[int]) -> bool:
-        if end is None:  # This allows any tile to be played on an empty board
-            return True
-        return self.top == end or self.bottom == end
-
-    def get_other_end(self, connected_end: int) -> int:
-        return self.bottom if connected_end == self.top else self.top
-
-    def get_pip_sum(self) -> int:
-        return self.top + self.bottom
-
-@dataclass(frozen=True)
-class GameState:
-    player_hands: Tuple[FrozenSet[DominoTile], ...]
-    current_player: PlayerPosition
-    left_end: Optional[int]
-    right_end: Optional[int]
-    consecutive_passes: int
-
-    def __hash__(self):
-        return hash((self.player_hands, self.current_player, self.left_end, self.right_end, self.consecutive_passes))
-
-    # @classmethod
-    # def new_game(cls, player_hands: list[list[DominoTile]]):
-    #     return cls(
-    #         # player_hands=tuple(frozenset(DominoTile(top, bottom) for top, bottom in hand) for hand in player_hands),
-    #         player_hands=tuple(frozenset(tile for tile in hand) for hand in player_hands),
-    #         current_player=PlayerPosition.SOUTH,
-    #         left_end=None,
-    #         right_end=None,
-    #         consecutive_passes=0
-    #     )
-
-    @classmethod
-    def new_game(cls, player_hands: list[list[DominoTile]]):
-        return cls(
-            # player_hands=tuple(frozenset(DominoTile(top, bottom) for top, bottom in hand) for hand in player_hands),
-            player_hands=tuple(frozenset(tile for tile in hand) for hand in player_hands),
-            current_player=PlayerPosition_SOUTH,
-            left_end=None,
-            right_end=None,
-            consecutive_passes=0
-        )
-
-    # def play_hand(self, tile: DominoTile, left: bool) -> 'GameState':
-    #     new_hands = list(self.player_hands)
-    #     new_hands[self.current_player.value] = self.player_hands[self.current_player.value] - frozenset([tile])
-
-    #     if self.left_end is None or self.right_end is None:
-    #         new_left_end, new_right_end = tile.top, tile.bottom
-    #     elif left:
-    #         new_left_end = tile.get_other_end(self.left_end)
-    #         new_right_end = self.right_end
-    #     else:
-    #         new_left_end = self.left_end
-    #         new_right_end = tile.get_other_end(self.right_end)
-
-    #     return GameState(
-    #         player_hands=tuple(new_hands),
-    #         current_player=self.current_player.next(),
-    #         left_end=new_left_end,
-    #         right_end=new_right_end,
-    #         consecutive_passes=0
-    #     )
-
-    def play_hand(self, tile: DominoTile, left: bool) -> 'GameState':
-        new_hands = list(self.player_hands)
-        new_hands[self.current_player] = self.player_hands[self.current_player] - frozenset([tile])
-
-        if self.left_end is None or self.right_end is None:
-            new_left_end, new_right_end = tile.top, tile.bottom
-        elif left:
-            new_left_end = tile.get_other_end(self.left_end)
-            new_right_end = self.right_end
-        else:
-            new_left_end = self.left_end
-            new_right_end = tile.get_other_end(self.right_end)
-
-        return GameState(
-            player_hands=tuple(new_hands),
-            # current_player=self.current_player.next(),
-            current_player=next_player(self.current_player),
-            left_end=new_left_end,
-            right_end=new_right_end,
-            consecutive_passes=0
-        )
-
-    def pass_turn(self) -> 'GameState':
-        return GameState(
-            player_hands=self.player_hands,
-            # current_player=self.current_player.next(),
-            current_player=next_player(self.current_player),
-            left_end=self.left_end,
-            right_end=self.right_end,
-            consecutive_passes=self.consecutive_passes + 1
-        )
-
-    def is_game_over(self) -> bool:
-        return any(len(hand) == 0 for hand in self.player_hands) or self.consecutive_passes == 4
-    # def is_game_over(self) -> bool:
-    #     cy_state = GameStateCy(
-    #         self.player_hands,
-    #         self.current_player.value,
-    #         self.left_end if self.left_end is not None else -1,
-    #         self.right_end if self.right_end is not None else -1,
-    #         self.consecutive_passes
-    #     )
-    #     return cy_state.is_game_over()
-    # def is_game_over(self) -> bool:
-    #     return GameStateCy.static_is_game_over(self.player_hands, self.consecutive_passes)
-
-    def get_current_hand(self) -> FrozenSet[DominoTile]:
-        # return self.player_hands[self.current_player.value]
-        return self.player_hands[self.current_player]
-
-def determine_winning_pair(state: GameState) -> tuple[int, int, int]:
-
-    pair_0_pips = sum(tile.get_pip_sum() for hand in state.player_hands[::2] for tile in hand)
-    pair_1_pips = sum(tile.get_pip_sum() for hand in state.player_hands[1::2] for tile in hand)
-
-    # Check if a player has run out of tiles
-    for i, hand in enumerate(state.player_hands):
-        if len(hand) == 0:
-            # print(f'player {i} domino')
-            return i % 2, pair_0_pips, pair_1_pips
-
-    # If we're here, the game must be blocked
-    if pair_1_pips == pair_0_pips:
-        result = -1
-    else:
-        result = 1 if pair_1_pips < pair_0_pips else 0
-    return result, pair_0_pips, pair_1_pips
+# GameState, the solver and the game setup used to be duplicated here, they are now
+# shared with the agents (domino_data_types, get_best_move2 and domino_utils)
 
-
-def list_possible_moves(state: GameState, cache: dict = {}, include_stats: bool = True) -> list[tuple[tuple[DominoTile, bool]|None, Optional[int], Optional[float]]]:
+def list_possible_moves(state: GameState, cache: dict|TranspositionTable = {}, include_stats: bool = True) -> list[tuple[tuple[DominoTile, bool]|None, Optional[int], Optional[float]]]:
     """
     List all possible moves for the current player in the given game state,
     optionally including the number of possible outcomes and expected score for each move.
@@ -245,234 +79,11 @@ def list_possible_moves(state: GameState, cache: dict = {}, include_stats: bool
 
 
 
-cache_hit: int = 0
-cache_miss: int = 0
-
-def count_game_stats(initial_state: GameState, print_stats: bool = True, cache: dict = {}) -> tuple[int, float]:
-    global cache_hit, cache_miss
-    
-    # stack: list[tuple[GameState, list[tuple[DominoTile, bool]]]] = [(initial_state, [])]  # Stack contains (state, path) pairs
-    stack: list[tuple[GameState, list[GameState]]] = [(initial_state, [])]  # Stack contains (state, path) pairs
-    winning_stats = {-1: 0, 0: 0, 1: 0}
-    
-    while stack:
-        state, path = stack.pop()
-
-        if state in cache:
-            cache_hit += 1
-            total_games, total_score = cache[state]
-            
-            # Update all states in the path with this result
-            for path_state in reversed(path):
-                if path_state in cache:
-                    cache[path_state] = (
-                        cache[path_state][0] + total_games,
-                        cache[path_state][1] + total_score
-                    )
-                else:
-                    cache[path_state] = (total_games, total_score)
-            
-            continue
-        
-        cache_miss += 1
-
-        if state.is_game_over():
-            winner, pair_0_pips, pair_1_pips = determine_winning_pair(state)
-            winning_stats[winner] += 1
-            score = 0 if winner == -1 else (pair_0_pips + pair_1_pips) * (1 if winner == 0 else -1)
-            total_games, total_score = 1, score
-            
-            # Cache the result for this terminal state
-            cache[state] = (total_games, total_score)
-            
-            # Update all states in the path with this result
-            for path_state in reversed(path):
-                if path_state in cache:
-                    cache[path_state] = (
-                        cache[path_state][0] + total_games,
-                        cache[path_state][1] + total_score
-                    )
-                else:
-                    cache[path_state] = (total_games, total_score)
-        else:
-            current_hand = state.get_current_hand()
-            moves = []
-
-            # Generate possible moves
-            if state.right_end is None and state.left_end is None:
-                moves = [(tile, True) for tile in current_hand]
-            else:
-                for tile in current_hand:
-                    if tile.can_connect(state.left_end):
-                        moves.append((tile, True))
-                    if tile.can_connect(state.right_end) and state.left_end != state.right_end:
-                        moves.append((tile, False))
-
-            # If no moves are possible, pass the turn
-            if not moves:
-                new_state = state.pass_turn()
-                stack.append((new_state, path + [state]))
-            else:
-                for tile, left in moves:
-                    new_state = state.play_hand(tile, left)
-                    stack.append((new_state, path + [state]))
-
-    # Calculate final statistics
-    total_games, total_score = cache[initial_state]
-    exp_score = total_score / total_games if total_games > 0 else 0
-
-    if print_stats:
-        print(f"Number of possible game outcomes: {total_games}")
-        print('Winning stats:', winning_stats)
-        print(f'Expected score: {exp_score:.4f}')
-        print(f'Cache hits: {cache_hit}')        
-        print(f'Cache misses: {cache_miss}')
-        print(f'Total cached states: {len(cache)}')
-
-    return total_games, exp_score
-
-import math
-
-def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float, cache: dict = {}, best_path_flag: bool = True) -> tuple[Optional[tuple[DominoTile, bool]], float, list[tuple[PlayerPosition, Optional[Tuple[DominoTile, bool]]]]]:
-    """
-    Implement the min-max algorithm with alpha-beta pruning for the domino game, including the optimal path.
-    
-    :param state: The current GameState
-    :param depth: The depth to search in the game tree
-    :param alpha: The best value that the maximizer currently can guarantee at that level or above
-    :param beta: The best value that the minimizer currently can guarantee at that level or above
-    :param cache: The cache dictionary to use for memoization
-    :param best_path_flag: Flag to indicate if best_path is needed or not    
-    :return: A tuple of (best_move, best_score, optimal_path)
-    """
-    if depth == 0 or state.is_game_over():
-        _, total_score = count_game_stats(state, print_stats=False, cache=cache)
-        return None, total_score, []
-
-    current_player = state.current_player
-    # is_maximizing = current_player in (PlayerPosition.NORTH, PlayerPosition.SOUTH)
-    is_maximizing = current_player in (PlayerPosition_NORTH, PlayerPosition_SOUTH)
-    
-    best_move = None
-    best_path = []
-    
-    possible_moves = list_possible_moves(state, cache, include_stats=False)
-    
-    if is_maximizing:
-        best_score = -math.inf
-        for move in possible_moves:
-            tile_and_loc_info, _, _ = move
-            # tile, is_left = tile_info if tile_info is not None else (None, None)
-            
-            # if tile is None:  # Pass move
-            if tile_and_loc_info is None:  # Pass move
-                new_state = state.pass_turn()
-            else:
-                # assert is_left is not None
-                tile, is_left = tile_and_loc_info
-                new_state = state.play_hand(tile, is_left)
-            
-            _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache)
-            
-            if score > best_score:
-                best_score = score
-                # best_move = (tile, is_left)
-                # best_path = [(current_player, (tile, is_left))] + path
-                best_move = tile_and_loc_info
-                if best_path_flag:
-                    best_path = [(current_player, tile_and_loc_info)] + path
-            
-            alpha = max(alpha, best_score)
-            if beta <= alpha:
-                break  # Beta cut-off
-    else:
-        best_score = math.inf
-        for move in possible_moves:
-            tile_and_loc_info, _, _ = move
-            # tile, is_left = tile_and_loc_info if tile_and_loc_info is not None else (None, None)
-            
-            # if tile is None:  # Pass move
-            if tile_and_loc_info is None:  # Pass move
-                new_state = state.pass_turn()
-            else:
-                # assert is_left is not None
-                tile, is_left = tile_and_loc_info
-                new_state = state.play_hand(tile, is_left)
-            
-            _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache)
-            
-            if score < best_score:
-                best_score = score
-                # best_move = (tile, is_left)
-                best_move = tile_and_loc_info
-                # best_path = [(current_player, (tile, is_left))] + path
-                if best_path_flag:
-                    best_path = [(current_player, tile_and_loc_info)] + path
-            
-            beta = min(beta, best_score)
-            if beta <= alpha:
-                break  # Alpha cut-off
-    
-    return best_move, best_score, best_path
-
-def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict = {}, best_path_flag: bool = True) -> tuple[Optional[tuple[DominoTile, bool]], float, list[tuple[PlayerPosition, Optional[tuple[DominoTile, bool]]]]]:
-    """
-    Get the best move for the current player using the min-max algorithm with alpha-beta pruning, including the optimal path.
-    
-    :param state: The current GameState
-    :param depth: The depth to search in the game tree
-    :param cache: The cache dictionary to use for memoization
-    :param best_path_flag: Flag to indicate if best_path is needed or not
-    :return: A tuple of (best_move, best_score, optimal_path)
-    """
-    return min_max_alpha_beta(state, depth, -math.inf, math.inf, cache, best_path_flag)
-
-
-def setup_game_state(
-    initial_hands: list[list[DominoTile]], 
-    starting_player: PlayerPosition, 
-    first_moves: list[Optional[tuple[DominoTile, bool]]]
-) -> GameState:
-    """
-    Set up a game state based on initial hands, starting player, and first moves.
-
-    :param initial_hands: List of initial hands for each player, where each hand is a list of DominoTile objects
-    :param starting_player: The player who starts the game
-    :param first_moves: List of first moves. Each move is a tuple (DominoTile, bool) or None for pass
-    :return: The resulting GameState after applying the first moves
-    """
-    # Initialize the game state with the given hands
-    state = GameState.new_game([[tile for tile in hand] for hand in initial_hands])
-    
-    # Set the starting player
-    state = GameState(
-        player_hands=state.player_hands,
-        current_player=starting_player,
-        left_end=state.left_end,
-        right_end=state.right_end,
-        consecutive_passes=state.consecutive_passes
-    )
-
-    # Apply the first moves
-    for move in first_moves:
-        if move is None:
-            state = state.pass_turn()
-        else:
-            tile, left = move
-            # Find and play the tile from the current player's hand
-            if tile not in state.get_current_hand():
-                print('state.get_current_hand()',state.get_current_hand())
-                raise ValueError(f"Tile {tile} not found in current player's hand")
-            state = state.play_hand(tile, left)
-
-    return state
-
-
 def analyze_moves_backward(initial_hands: list[list[DominoTile]],
                            starting_player: PlayerPosition,
                            moves: list[Optional[tuple[DominoTile, bool]]],
                            from_move: int = 0,
-                           cache: dict = {}) -> list[tuple[PlayerPosition, Optional[tuple[DominoTile, bool]], int, float, float]]:
+                           cache: dict|TranspositionTable = {}) -> list[tuple[PlayerPosition, Optional[tuple[DominoTile, bool]], int, float, float]]:
     results: list[tuple[PlayerPosition, Optional[tuple[DominoTile, bool]], int, float, float]] = []
     
     print("\nMove Analysis (working backwards):")
@@ -509,15 +120,36 @@ def analyze_moves_backward(initial_hands: list[list[DominoTile]],
     
     return results
 
-def load_cache(filename: str) -> dict:
+def load_cache(filename: str, max_bytes: int|None = None) -> dict|TranspositionTable:
+    """
+    Load a pickled cache.
+
+    Caches saved before the solvers were keyed on Zobrist keys (see GameState.canonical_key) are keyed on
+    GameState objects, which match no state of the current solvers: they are not loaded.
+
+    :param filename: The cache file
+    :param max_bytes: If given, the cache is loaded into a TranspositionTable with this memory budget
+    :return: The loaded cache, or an empty one if the file does not exist or is from an older version
+    """
+    cache: dict|TranspositionTable = {} if max_bytes is None else TranspositionTable(max_bytes)
     try:
         with open(filename, 'rb') as f:
-            return pickle.load(f)
+            loaded = pickle.load(f)
     except FileNotFoundError:
         print(f"Cache file {filename} not found. Starting with an empty cache.")
-        return {}
-
-def save_cache(cache: dict, filename: str):
+        return cache
+    except (AttributeError, TypeError, pickle.UnpicklingError) as e:
+        print(f"Cache file {filename} could not be loaded ({e}). Starting with an empty cache.")
+        return cache
+    if any(not isinstance(key, int) for key in loaded):
+        print(f"Cache file {filename} is not keyed on Zobrist keys, it was saved by an older version. Starting with an empty cache.")
+        return cache
+    if max_bytes is None:
+        return loaded
+    cache.update(loaded)
+    return cache
+
+def save_cache(cache: dict|TranspositionTable, filename: str):
     with open(filename, 'wb') as f:
         pickle.dump(cache, f)
 
@@ -525,16 +157,16 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Domino Game Analyzer")
     parser.add_argument("--cache", type=str, help="Specify a cache file to use")
     parser.add_argument("--min-max-only", action="store_true", help="Run only the min-max algorithm")    
+    parser.add_argument("--cache-size-mb", type=int, default=1024, help="Memory budget of the transposition table in MB (0 for an unbounded dict)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes for the min-max search (0 for the serial search, see parallel_search)")
+    parser.add_argument("--split-ply", type=int, choices=[1, 2], default=1, help="Ply at which the parallel search splits the tree")
     args = parser.parse_args()
 
-    cache = {}
+    max_bytes = args.cache_size_mb * 1024 * 1024 if args.cache_size_mb > 0 else None
+    cache: dict|TranspositionTable = {} if max_bytes is None else TranspositionTable(max_bytes)
     if args.cache:
-        try:
-            with open(args.cache, 'rb') as f:
-                cache = pickle.load(f)
-            print(f"Loaded cache from {args.cache}")
-        except FileNotFoundError:
-            print(f"Cache file {args.cache} not found. Starting with an empty cache.")
+        cache = load_cache(args.cache, max_bytes)
+        print(f"Loaded {len(cache)} cached states from {args.cache}")
 
 
     initial_hands_orig = [
@@ -544,7 +176,7 @@ def main() -> None:
     [(4,4), (2,4), (2,2), (1,6), (5,5), (0,1), (3,5)]
     ]
 
-    initial_hands: list[list[DominoTile]]
+    initial_hands: list[list[DominoTile]] = []
     for i, _hand in enumerate(initial_hands_orig):
         initial_hands.append([DominoTile.new_tile(*t) for t in _hand])
 
@@ -643,7 +275,15 @@ def main() -> None:
     print("\nBest move and optimal path using Min-Max algorithm with Alpha-Beta pruning:")
     depth = 24  # You can adjust this depth based on your performance requirements
     # best_move, best_score, optimal_path = get_best_move(final_state, depth, cache=cache)
-    best_move, best_score, optimal_path = get_best_move_alpha_beta(final_state, depth, cache=cache)
+    if args.workers > 0:
+        # The workers have their own caches, the cache above is not used by the search
+        best_move, best_score, optimal_path = get_best_move_alpha_beta_parallel(final_state, depth, args.workers, split_ply=args.split_ply)
+    else:
+        # best_move, best_score, optimal_path = get_best_move_alpha_beta(final_state, depth, cache=cache)
+        # The optimal path is read back from the transposition table instead of being built at every node
+        ab_cache: dict[int, tuple[int, int, float, move]] = {}
+        best_move, best_score, _ = get_best_move_alpha_beta(final_state, depth, cache=cache, best_path_flag=False, ab_cache=ab_cache)
+        optimal_path = principal_variation(final_state, depth, ab_cache)
     if best_move is None:
         print(f"Best move: Pass, Expected score: {best_score:.4f}")
     else:
@@ -663,9 +303,11 @@ def main() -> None:
             print(f"{i+1}. {PlayerPosition_names[player]}: Play {tile} on the {direction}")
 
 
+    if isinstance(cache, TranspositionTable):
+        print(f"\nTransposition table: {cache.stats()}")
+
     if args.cache:
-        with open(args.cache, 'wb') as f:
-            pickle.dump(cache, f)
+        save_cache(cache, args.cache)
         print(f"Saved cache to {args.cache}")
 
 if __name__ == "__main__":
@@ -9,7 +9,8 @@ from domino_utils import list_possible_moves
 from collections import defaultdict
 # from domino_game_analyzer import GameState, PlayerPosition, DominoTile, setup_game_state
 from domino_common_knowledge import CommonKnowledgeTracker
-from domino_probability_calc import calculate_tile_probabilities, generate_sample
+from domino_probability_calc import calculate_tile_probabilities, generate_sample, generate_samples
+import numpy as np
 import copy
 
 
@@ -83,13 +84,11 @@ def domino_game_state_our_perspective(
     # Return the current player, remaining tiles, board ends, tile counts, and the knowledge tracker
     return current_player, remaining_tiles, board_ends, player_tiles_count, knowledge_tracker
 
-def generate_sample_from_game_state(
-    current_player: PlayerPosition,
-    south_hand: set[DominoTile],
+def sample_arguments(
     remaining_tiles: set[DominoTile],
     player_tiles_count: dict[PlayerPosition, int],
     inferred_knowledge: dict[PlayerPosition, set[DominoTile]]
-) -> dict[str, set[DominoTile]]:
+) -> tuple[dict[str, set[DominoTile]], PlayerTiles]:
 
     # Convert inferred_knowledge to the format expected by generate_sample
     not_with: dict[str, set[DominoTile]] = {
@@ -97,9 +96,6 @@ def generate_sample_from_game_state(
         PlayerPosition_names[player][0]: tiles for player, tiles in inferred_knowledge.items() if player != PlayerPosition_SOUTH
     }
 
-    # Known tiles (South's hand)
-    known_with: dict[str, set[DominoTile]] = {'S': south_hand}
-
     # Create PlayerTiles object for the remaining players
     player_tiles = PlayerTiles(
         # N=player_tiles_count[PlayerPosition.NORTH],
@@ -120,6 +116,17 @@ def generate_sample_from_game_state(
         print('sum(e for e in player_tiles)',sum(e for e in player_tiles))
         raise ae
 
+    return not_with, player_tiles
+
+def generate_sample_from_game_state(
+    current_player: PlayerPosition,
+    south_hand: set[DominoTile],
+    remaining_tiles: set[DominoTile],
+    player_tiles_count: dict[PlayerPosition, int],
+    inferred_knowledge: dict[PlayerPosition, set[DominoTile]]
+) -> dict[str, set[DominoTile]]:
+    not_with, player_tiles = sample_arguments(remaining_tiles, player_tiles_count, inferred_knowledge)
+
     # Generate a sample
     sample = generate_sample(remaining_tiles, not_with, player_tiles)
     # sample = generate_sample(list(remaining_tiles), not_with, player_tiles)
@@ -127,6 +134,23 @@ def generate_sample_from_game_state(
 
     return sample
 
+def generate_samples_from_game_state(
+    n: int,
+    current_player: PlayerPosition,
+    south_hand: set[DominoTile],
+    remaining_tiles: set[DominoTile],
+    player_tiles_count: dict[PlayerPosition, int],
+    inferred_knowledge: dict[PlayerPosition, set[DominoTile]],
+    rng: np.random.Generator|None = None
+) -> tuple[list[DominoTile], np.ndarray]:
+    """
+    n samples of generate_sample_from_game_state at once, see generate_samples.
+
+    :return: The tiles, and the (n, tiles) array of their players, 0 for N, 1 for E and 2 for W
+    """
+    not_with, player_tiles = sample_arguments(remaining_tiles, player_tiles_count, inferred_knowledge)
+    return generate_samples(n, remaining_tiles, not_with, player_tiles, rng)
+
 # Example usage
 if __name__ == "__main__":
     # Create DominoTile objects for south_hand
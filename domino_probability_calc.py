@@ -8,6 +8,9 @@ from domino_data_types import DominoTile, PlayerPosition, PlayerTiles
 from dataclasses import dataclass
 import copy
 import random
+from functools import lru_cache
+from typing import Iterator
+import numpy as np
 
 # Scenario = namedtuple('Scenario', ['N', 'E', 'W'])
 # Scenario = namedtuple('Scenario', [('N', set[DominoTile]), ('E', set[DominoTile]), ('W', set[DominoTile])])
@@ -359,11 +362,128 @@ def generate_scenarios(
 # Assumption is that the same tile can not be in not_with with two (or more) different players. If it's with two players, that should go to the known_with
 # known_with information is also not passed because there's no need to calculate probs for that tile.
 # The function won't check for contradictory known_with and not_with information, in those cases it will return incorrect probabilities or fail
+# Binomial coefficients for up to the 28 tiles of the set
+MAX_TILES = 28
+_BINOMIALS: list[list[int]] = [[comb(n, k) for k in range(MAX_TILES + 1)] for n in range(MAX_TILES + 1)]
+
+def binomial(n: int, k: int) -> int:
+    if k < 0 or n < k:
+        return 0
+    if n > MAX_TILES:
+        return comb(n, k)
+    return _BINOMIALS[n][k]
+
+def deal_splits(
+    player_tiles: PlayerTiles,
+    constrained: tuple[int, int, int],
+    free: int,
+    fixed: tuple[int, int, int] = (0, 0, 0)
+) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Splits of the constrained tiles between the players, with the number of deals of each split.
+
+    A scenario of generate_scenarios only matters through the number of constrained tiles it gives to each
+    player, so the tiles of each constraint class are counted with binomials instead of being dealt one by one,
+    in O(k_N * k_E * k_W) steps for class sizes k instead of the 2 ** (k_N + k_E + k_W) scenarios.
+
+    :param player_tiles: The number of tiles of N, E and W
+    :param constrained: The number of tiles that are not with N, not with E and not with W
+                        (each goes to one of the two other players)
+    :param free: The number of tiles without constraint
+    :param fixed: The number of tiles already given to N, E and W
+    :return: (i, j, l, ways) for i tiles not with E given to N (the others to W), j not with N given to E
+             (the others to W) and l not with W given to N (the others to E), weighted as the scenarios
+    """
+    k_n, k_e, k_w = constrained
+    fixed_n, fixed_e, fixed_w = fixed
+    for i in range(k_e + 1):
+        ways_i = binomial(k_e, i)
+        for l in range(k_w + 1):
+            n_tiles = player_tiles.N - (fixed_n + i + l)
+            if n_tiles < 0:
+                break
+            ways_il = ways_i * binomial(k_w, l)
+            for j in range(k_n + 1):
+                e_tiles = player_tiles.E - (fixed_e + j + k_w - l)
+                if e_tiles < 0:
+                    break
+                if fixed_w + k_e - i + k_n - j > player_tiles.W:
+                    continue
+                # As calculate_scenario_probability: the free tiles of N, then those of E among the others
+                ways = ways_il * binomial(k_n, j) * binomial(free, n_tiles) * binomial(free - n_tiles, e_tiles)
+                if ways:
+                    yield i, j, l, ways
+
+def count_deals(
+    player_tiles: PlayerTiles,
+    constrained: tuple[int, int, int],
+    free: int,
+    fixed: tuple[int, int, int] = (0, 0, 0)
+) -> int:
+    """
+    Sum of the scenario weights of calculate_scenario_probability over every scenario of generate_scenarios,
+    without enumerating them (see deal_splits).
+
+    :return: The number of consistent deals, weighted as the scenarios
+    """
+    return sum(split[3] for split in deal_splits(player_tiles, constrained, free, fixed))
+
 def calculate_tile_probabilities(
     remaining_tiles: list[DominoTile],
     not_with: dict[str, set[DominoTile]],
     player_tiles: PlayerTiles
 ) -> dict[DominoTile, dict[str, float]]:
+    """
+    Probability that each remaining tile is with N, E or W, given the tiles each of them cannot have.
+
+    Same results as calculate_tile_probabilities_scenarios, counted by count_deals in polynomial time instead of
+    enumerating the scenarios of the constrained tiles for every tile and player. The tiles of a constraint class
+    share their counts, so there are at most 12 counts besides the total.
+
+    :param remaining_tiles: The tiles held by N, E and W
+    :param not_with: The tiles that each of N, E and W cannot have, a tile being in at most one of the sets
+    :param player_tiles: The number of tiles of N, E and W
+    :return: For each tile, the probability that each player has it
+    """
+    players = ['N', 'E', 'W']
+    total_tiles = len(remaining_tiles)
+    probabilities: dict[DominoTile, dict[str, float]] = {tile: {'N': 0.0, 'E': 0.0, 'W': 0.0} for tile in remaining_tiles}
+    if total_tiles == 0: return probabilities
+
+    not_with_sets = [not_with.get(player, set()) for player in players]
+    constrained = [len(tiles) for tiles in not_with_sets]
+    free = total_tiles - sum(constrained)
+    total_probability = count_deals(player_tiles, (constrained[0], constrained[1], constrained[2]), free)
+    assert total_probability > 0
+
+    # Counts with one tile given to a player, by (classes of the tile, player)
+    tile_counts: dict[tuple[tuple[bool, ...], int], int] = {}
+    for tile in remaining_tiles:
+        classes = tuple(tile in tiles for tiles in not_with_sets)
+        for index, player in enumerate(players):
+            if classes[index]:
+                probabilities[tile][player] = 0.0
+                continue
+            key = (classes, index)
+            if key not in tile_counts:
+                tile_constrained = [size - in_class for size, in_class in zip(constrained, classes)]
+                fixed = [0, 0, 0]
+                fixed[index] = 1
+                tile_counts[key] = count_deals(player_tiles, (tile_constrained[0], tile_constrained[1], tile_constrained[2]),
+                                               free - (not any(classes)), (fixed[0], fixed[1], fixed[2]))
+            probabilities[tile][player] = tile_counts[key] / total_probability
+
+        assert abs(1.0 - sum(probabilities[tile][player] for player in probabilities[tile])) < 1e-5, (tile, probabilities[tile], not_with, player_tiles)
+
+    return probabilities
+
+def calculate_tile_probabilities_scenarios(
+    remaining_tiles: list[DominoTile],
+    not_with: dict[str, set[DominoTile]],
+    player_tiles: PlayerTiles
+) -> dict[DominoTile, dict[str, float]]:
+    # Enumeration of the scenarios of generate_scenarios for every tile and player, exponential in the number of
+    # constrained tiles. Replaced by calculate_tile_probabilities, kept as its reference.
     total_tiles = len(remaining_tiles)
     probabilities: dict[DominoTile, dict[str, float]] = {tile: {'N': 0.0, 'E': 0.0, 'W': 0.0} for tile in remaining_tiles}
     if total_tiles == 0: return probabilities
@@ -450,21 +570,17 @@ def print_probabilities(probabilities: dict[str, dict[str, float]]) -> None:
             print(f"  P({player} has {tile}) = {prob:.6f}")
         print()
 
-# Assumption: no tile should be at the same time in known_with and not_with
-# def generate_sample(
-#     remaining_tiles: list[DominoTile],
-#     not_with: dict[str, set[DominoTile]],
-#     known_with: dict[str, set[DominoTile]],
-#     player_tiles: PlayerTiles
-# ) -> dict[str, set[DominoTile]]:
-def generate_sample(
+def sanitize_not_with(
     remaining_tiles: set[DominoTile],
-    not_with: dict[str, set[DominoTile]],
-    # known_with: dict[str, set[DominoTile]],
-    player_tiles: PlayerTiles
-) -> dict[str, set[DominoTile]]:
-
-    # assert len(remaining_tiles) == sum(e for e in player_tiles)
+    not_with: dict[str, set[DominoTile]]
+) -> tuple[dict[str, set[DominoTile]], dict[str, set[DominoTile]]]:
+    """
+    Copy of not_with where every tile is in at most one set, and the tiles it places for sure.
+
+    :param remaining_tiles: The tiles held by N, E and W
+    :param not_with: The tiles that each of N, E and W cannot have
+    :return: (local_not_with, known_with), a tile not with two players being known with the third one
+    """
     assert 'S' not in not_with
     assert all(p in not_with for p in 'NEW')
     assert all(isinstance(not_with[p],set) for p in 'NEW')
@@ -475,10 +591,9 @@ def generate_sample(
     assert len(door_tiles.intersection(remaining_tiles)) == 0, 'Tile in remaining_tiles and not with any player!'
 
     # Create local copies of not_with and known_with
-    # local_not_with = copy.deepcopy(not_with)
     # Temp. fix as deepcopy is not working with the mypyc compiled DominoTile from get_best_move2
     local_not_with = {k:set(t for t in v) for k,v in not_with.items()}
-    local_known_with = {}
+    local_known_with: dict[str, set[DominoTile]] = {}
 
     if len(door_tiles) > 0:
         for p, p_set in local_not_with.items():
@@ -493,21 +608,192 @@ def generate_sample(
     NW_set = N_set.intersection(W_set)
     if len(WE_set) > 0:
         local_known_with['N'] = WE_set
-        local_not_with['W'] -= WE_set 
-        local_not_with['E'] -= WE_set 
+        local_not_with['W'] -= WE_set
+        local_not_with['E'] -= WE_set
     if len(NE_set) > 0:
         local_known_with['W'] = NE_set
-        local_not_with['N'] -= NE_set 
-        local_not_with['E'] -= NE_set 
+        local_not_with['N'] -= NE_set
+        local_not_with['E'] -= NE_set
     if len(NW_set) > 0:
         local_known_with['E'] = NW_set
-        local_not_with['N'] -= NW_set 
-        local_not_with['W'] -= NW_set 
+        local_not_with['N'] -= NW_set
+        local_not_with['W'] -= NW_set
 
+    assert no_duplicates_in_not_with(local_not_with)
+    return local_not_with, local_known_with
+
+def tile_key(tile: DominoTile) -> tuple[int, int]:
+    return tile.top, tile.bottom
+
+@dataclass
+class DealSampler:
+    """
+    Uniform sampler of the deals of the remaining tiles consistent with not_with and the tiles of each player,
+    the same distribution as generate_sample_sequential without recomputing the tile probabilities per tile.
+
+    The table of deal_splits is built once: a sample draws a split of the constrained tiles in proportion to
+    its number of deals, then which tiles of each class go to each player, all of them equally likely, in
+    O(tiles).
+    """
+    # Tiles not with N, not with E and not with W
+    constrained: tuple[list[DominoTile], list[DominoTile], list[DominoTile]]
+    free_tiles: list[DominoTile]
+    known_with: dict[str, set[DominoTile]]
+    player_tiles: PlayerTiles
+    splits: list[tuple[int, int, int]]
+    cum_weights: list[int]
+
+    @classmethod
+    def build(
+        cls,
+        remaining_tiles: set[DominoTile],
+        not_with: dict[str, set[DominoTile]],
+        player_tiles: PlayerTiles
+    ) -> 'DealSampler':
+        assert len(remaining_tiles) == sum(player_tiles), 'The tiles of the players do not match the remaining tiles!'
+        local_not_with, known_with = sanitize_not_with(remaining_tiles, not_with)
+        # Sorted so that a seeded random gives the same samples whatever the order of the sets
+        not_n, not_e, not_w = (sorted(local_not_with[player] & remaining_tiles, key=tile_key) for player in 'NEW')
+        known = set().union(*known_with.values())
+        free_tiles = sorted((tile for tile in remaining_tiles if tile not in known and not any(tile in local_not_with[player] for player in 'NEW')), key=tile_key)
+        fixed_n, fixed_e, fixed_w = (len(known_with.get(player, ())) for player in 'NEW')
+
+        splits, cum_weights = [], []
+        total = 0
+        for i, j, l, ways in deal_splits(player_tiles, (len(not_n), len(not_e), len(not_w)), len(free_tiles), (fixed_n, fixed_e, fixed_w)):
+            total += ways
+            splits.append((i, j, l))
+            cum_weights.append(total)
+        assert total > 0, 'No deal is consistent with not_with!'
+        return cls((not_n, not_e, not_w), free_tiles, known_with, player_tiles, splits, cum_weights)
+
+    def sample(self, rng: random.Random|None = None) -> dict[str, set[DominoTile]]:
+        """
+        :param rng: The random generator, the random module by default
+        :return: The tiles of N, E and W
+        """
+        random_source = random if rng is None else rng
+        i, j, l = random_source.choices(self.splits, cum_weights=self.cum_weights)[0]
+        not_n, not_e, not_w = (random_source.sample(tiles, len(tiles)) for tiles in self.constrained)
+        free_tiles = random_source.sample(self.free_tiles, len(self.free_tiles))
+
+        sample = {player: set(self.known_with.get(player, set())) for player in ['N', 'E', 'W']}
+        sample['N'].update(not_e[:i], not_w[:l])
+        sample['E'].update(not_n[:j], not_w[l:])
+        sample['W'].update(not_e[i:], not_n[j:])
+        n_tiles = self.player_tiles.N - len(sample['N'])
+        e_tiles = self.player_tiles.E - len(sample['E'])
+        sample['N'].update(free_tiles[:n_tiles])
+        sample['E'].update(free_tiles[n_tiles:n_tiles + e_tiles])
+        sample['W'].update(free_tiles[n_tiles + e_tiles:])
+        return sample
+
+    def tiles(self) -> list[DominoTile]:
+        """The columns of sample_owners: the known tiles of N, E and W, the tiles not with N, E and W, and the free tiles."""
+        known = [tile for player in 'NEW' for tile in sorted(self.known_with.get(player, set()), key=tile_key)]
+        return known + self.constrained[0] + self.constrained[1] + self.constrained[2] + self.free_tiles
+
+    def sample_owners(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        n samples at once, with the same distribution as sample: the splits are drawn from the cumulative
+        weights with one searchsorted, and the tiles of each class are dealt by the ranks of a random
+        permutation per row, the first ones of the split going to the first player.
+
+        :param n: The number of samples
+        :param rng: The random generator
+        :return: (n, tiles) int8 array of the player of each tile of tiles(), 0 for N, 1 for E and 2 for W
+        """
+        not_n, not_e, not_w = (len(tiles) for tiles in self.constrained)
+        known = [len(self.known_with.get(player, ())) for player in 'NEW']
+        # Floats are exact enough: there are at most 21! / 7! ** 3 deals
+        cum_weights = np.array(self.cum_weights, dtype=np.float64)
+        split_index = np.searchsorted(cum_weights, rng.random(n) * cum_weights[-1], side='right')
+        splits = np.array(self.splits, dtype=np.int64)[split_index]
+        # Columns, so that they broadcast against the ranks of the tiles of each row
+        i, j, l = splits[:, 0:1], splits[:, 1:2], splits[:, 2:3]
+
+        def ranks(k: int) -> np.ndarray:
+            return rng.random((n, k)).argsort(axis=1)
+
+        n_tiles = self.player_tiles.N - known[0] - i - l
+        e_tiles = self.player_tiles.E - known[1] - j - (not_w - l)
+        free_ranks = ranks(len(self.free_tiles))
+        owners = np.concatenate([
+            np.repeat(np.repeat(np.arange(3, dtype=np.int8), known)[None, :], n, axis=0),
+            np.where(ranks(not_n) < j, 1, 2),
+            np.where(ranks(not_e) < i, 0, 2),
+            np.where(ranks(not_w) < l, 0, 1),
+            np.where(free_ranks < n_tiles, 0, np.where(free_ranks < n_tiles + e_tiles, 1, 2)),
+        ], axis=1).astype(np.int8)
+        return owners
+
+@lru_cache(maxsize=16)
+def _deal_sampler(
+    remaining_tiles: frozenset[DominoTile],
+    not_with: tuple[tuple[str, frozenset[DominoTile]], ...],
+    player_tiles: PlayerTiles
+) -> DealSampler:
+    return DealSampler.build(set(remaining_tiles), {player: set(tiles) for player, tiles in not_with}, player_tiles)
+
+def generate_sample(
+    remaining_tiles: set[DominoTile],
+    not_with: dict[str, set[DominoTile]],
+    player_tiles: PlayerTiles,
+    rng: random.Random|None = None
+) -> dict[str, set[DominoTile]]:
+    """
+    Deal of the remaining tiles drawn uniformly among those consistent with not_with and the tiles of
+    each player. The DealSampler of a position is kept, so that the samples of a decision share its setup.
+
+    :param remaining_tiles: The tiles held by N, E and W
+    :param not_with: The tiles that each of N, E and W cannot have
+    :param player_tiles: The number of tiles of N, E and W
+    :param rng: The random generator, the random module by default
+    :return: The tiles of N, E and W
+    """
+    sampler = _deal_sampler(frozenset(remaining_tiles), tuple((player, frozenset(tiles)) for player, tiles in sorted(not_with.items())), player_tiles)
+    return sampler.sample(rng)
+
+def generate_samples(
+    n: int,
+    remaining_tiles: set[DominoTile],
+    not_with: dict[str, set[DominoTile]],
+    player_tiles: PlayerTiles,
+    rng: np.random.Generator|None = None
+) -> tuple[list[DominoTile], np.ndarray]:
+    """
+    n deals drawn as by generate_sample, as an array of owners instead of a dict of sets per deal.
+
+    :param n: The number of deals
+    :param remaining_tiles: The tiles held by N, E and W
+    :param not_with: The tiles that each of N, E and W cannot have
+    :param player_tiles: The number of tiles of N, E and W
+    :param rng: The random generator, seeded from the random module by default
+    :return: The tiles, and the (n, tiles) int8 array of their players, 0 for N, 1 for E and 2 for W
+    """
+    sampler = _deal_sampler(frozenset(remaining_tiles), tuple((player, frozenset(tiles)) for player, tiles in sorted(not_with.items())), player_tiles)
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    tiles = sampler.tiles()
+    owners = sampler.sample_owners(n, rng)
+
+    # Every deal respects not_with and the number of tiles of each player
+    forbidden = np.array([[tile in not_with[player] for tile in tiles] for player in 'NEW'], dtype=bool)
+    assert not forbidden[owners, np.arange(len(tiles))].any(), 'Tile dealt to a player that cannot have it!'
+    assert (np.stack([(owners == player).sum(axis=1) for player in range(3)], axis=1) == np.array(player_tiles)).all()
+    return tiles, owners
+
+# Assigns one random tile at a time with its probability given the previous ones, recomputing
+# calculate_tile_probabilities for every tile. Replaced by DealSampler, same distribution.
+def generate_sample_sequential(
+    remaining_tiles: set[DominoTile],
+    not_with: dict[str, set[DominoTile]],
+    player_tiles: PlayerTiles
+) -> dict[str, set[DominoTile]]:
 
+    local_not_with, local_known_with = sanitize_not_with(remaining_tiles, not_with)
 
     sample = {player: set(local_known_with.get(player, set())) for player in ['N', 'E', 'W']}
-    # sample = {player: set() for player in ['N', 'E', 'W']}
 
     remaining_counts = {
         player: getattr(player_tiles, player) - len(sample[player])
@@ -533,7 +819,6 @@ def generate_sample(
             print('local_not_with',local_not_with)
             raise ae
         probabilities = calculate_tile_probabilities(unassigned_tiles, local_not_with, PlayerTiles(**remaining_counts))
-        # probabilities = calculate_tile_probabilities(unassigned_tiles, local_not_with, local_known_with, PlayerTiles(**remaining_counts))
 
         tile = random.choice(unassigned_tiles)
         tile_probs = probabilities[tile]
@@ -556,8 +841,6 @@ def generate_sample(
         for player in ['N', 'E', 'W']:
             if player in local_not_with and tile in local_not_with[player]:
                 local_not_with[player].remove(tile)
-            # if player in local_known_with and tile in local_known_with[player]:
-            #     local_known_with[player].remove(tile)
 
     return sample    
 
@@ -0,0 +1,236 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from domino_data_types import GameState, DominoTile, ZOBRIST_TILE
+from domino_utils import list_possible_moves
+
+# File layout: header, then num_entries canonical keys (sorted, uint64), game counts (uint32)
+# and score sums (int32) of count_game_stats, all little-endian
+MAGIC = b'DOMTB\x00\x00\x01'
+HEADER = struct.Struct('<8sBB6xQQ')  # magic, variant, max_tiles, zobrist_check, num_entries
+VARIANTS: dict[str, int] = {'international': 0, 'venezuelan': 1}
+
+# Keys are only meaningful with the Zobrist tables they were built with
+ZOBRIST_CHECK = ZOBRIST_TILE[0][0]
+
+class Tablebase:
+    """
+    Memory-mapped endgame table of count_game_stats results, keyed like the solvers' cache on
+    GameState.canonical_key() with (total_games, total_score) values of the canonical state.
+
+    Lookups binary search the sorted keys in place, so opening a table costs nothing and the
+    pages are shared by every process that maps the same file.
+    """
+
+    def __init__(self, path: str, variant: str|None = None):
+        """
+        :param path: The table file, as written by build_tablebase
+        :param variant: Expected variant, a ValueError is raised if the table was built for another one
+        """
+        if sys.byteorder != 'little':
+            raise ValueError("Tablebase files are little-endian")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, variant_id, self.max_tiles, zobrist_check, self.num_entries = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a tablebase file")
+        if zobrist_check != ZOBRIST_CHECK:
+            self._mmap.close()
+            raise ValueError(f"{path} was built with different Zobrist keys")
+        self.variant = {variant_id: name for name, variant_id in VARIANTS.items()}.get(variant_id)
+        if variant is not None and variant != self.variant:
+            self._mmap.close()
+            raise ValueError(f"{path} is a {self.variant} tablebase, not {variant}")
+
+        n = self.num_entries
+        view = memoryview(self._mmap)
+        keys_start = HEADER.size
+        games_start = keys_start + 8 * n
+        scores_start = games_start + 4 * n
+        self._keys = view[keys_start:games_start].cast('Q')
+        self._games = view[games_start:scores_start].cast('I')
+        self._scores = view[scores_start:scores_start + 4 * n].cast('i')
+        view.release()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int, default: tuple[int, int]|None = None) -> tuple[int, int]|None:
+        keys = self._keys
+        i = bisect_left(keys, key)
+        if i < self.num_entries and keys[i] == key:
+            self.hits += 1
+            return self._games[i], self._scores[i]
+        self.misses += 1
+        return default
+
+    def probe(self, state: GameState) -> tuple[int, float]|None:
+        """
+        Look up a state in the table.
+
+        :param state: The GameState
+        :return: A tuple of (total_games, exp_score) as returned by count_game_stats, None if the state is not in the table
+        """
+        key, negate, _ = state.canonical_key()
+        entry = self.get(key)
+        if entry is None:
+            return None
+        total_games, total_score = entry
+        return total_games, (-total_score if negate else total_score) / total_games
+
+    def __contains__(self, key: int) -> bool:
+        i = bisect_left(self._keys, key)
+        return i < self.num_entries and self._keys[i] == key
+
+    def __len__(self) -> int:
+        return self.num_entries
+
+    def close(self) -> None:
+        for view in (self._keys, self._games, self._scores):
+            view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> 'Tablebase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"Tablebase({self.path!r}, variant={self.variant}, max_tiles={self.max_tiles}, entries={self.num_entries})"
+
+
+def write_tablebase(path: str, variant: str, max_tiles: int, entries: dict[int, tuple[int, int]]) -> None:
+    """
+    Write count_game_stats cache entries to a table file.
+
+    :param path: The output file
+    :param variant: 'international' or 'venezuelan', the scoring rule the entries were computed with
+    :param max_tiles: Largest number of tiles left in the hands of the stored positions
+    :param entries: Canonical cache entries, as filled by count_game_stats
+    """
+    keys = sorted(entries)
+    games = array('I')
+    scores = array('i')
+    for key in keys:
+        total_games, total_score = entries[key]
+        if total_games >= 1 << 32 or not -(1 << 31) <= total_score < 1 << 31:
+            raise ValueError(f"Entry {total_games, total_score} does not fit the table format, use a smaller max_tiles")
+        games.append(total_games)
+        scores.append(total_score)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VARIANTS[variant], max_tiles, ZOBRIST_CHECK, len(keys)))
+        f.write(array('Q', keys).tobytes())
+        f.write(games.tobytes())
+        f.write(scores.tobytes())
+
+
+def random_endgame(rng: random.Random, max_tiles: int) -> GameState:
+    """
+    Play random moves from a random deal until at most max_tiles tiles are left in the hands.
+
+    :param rng: The random number generator
+    :param max_tiles: Largest number of tiles left in the hands
+    :return: A GameState with at most max_tiles tiles left (possibly game over)
+    """
+    tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+    rng.shuffle(tiles)
+    state = GameState.new_game([tiles[i * 7:(i + 1) * 7] for i in range(4)])
+    while state.tiles_left() > max_tiles and not state.is_game_over():
+        tile_and_loc_info, _, _ = rng.choice(list_possible_moves(state))
+        state = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+    return state
+
+
+def build_tablebase(path: str, variant: str = 'international', max_tiles: int = 8, num_samples: int = 1000, seed: int = 0) -> int:
+    """
+    Solve the endgames with at most max_tiles tiles left below sampled positions and write them to a table file.
+
+    Every position reachable from a sampled endgame is solved (count_game_stats visits the whole
+    subgame and caches every position of it, except the positions with a single move below the
+    sample, which it follows to the next choice), so the table is complete below each sample.
+
+    :param path: The output file
+    :param variant: 'international' or 'venezuelan'
+    :param max_tiles: Largest number of tiles left in the hands of the stored positions
+    :param num_samples: Number of sampled endgames
+    :param seed: Seed of the sampler
+    :return: The number of stored positions
+    """
+    # (imported here, the solvers import this module to probe tables)
+    from solve_many import get_solver
+    solver = get_solver(variant)
+    rng = random.Random(seed)
+    entries: dict[int, tuple[int, int]] = {}
+    for _ in range(num_samples):
+        solver.count_game_stats(random_endgame(rng, max_tiles), print_stats=False, cache=entries)
+    write_tablebase(path, variant, max_tiles, entries)
+    return len(entries)
+
+
+def verify_tablebase(path: str, num_samples: int = 100, seed: int = 1) -> tuple[int, int, int]:
+    """
+    Check a table file: keys are sorted, and the stored results match count_game_stats for the
+    positions below sampled endgames that are found in the table.
+
+    :param path: The table file
+    :param num_samples: Number of sampled endgames
+    :param seed: Seed of the sampler, use a different one than the build to check fresh positions
+    :return: A tuple of (checked positions, positions found in the table, mismatches)
+    """
+    with Tablebase(path) as tablebase:
+        keys = tablebase._keys
+        for i in range(1, len(keys)):
+            if keys[i - 1] >= keys[i]:
+                raise ValueError(f"{path}: keys are not sorted at entry {i}")
+
+        from solve_many import get_solver
+        solver = get_solver(tablebase.variant)
+        rng = random.Random(seed)
+        expected: dict[int, tuple[int, int]] = {}
+        for _ in range(num_samples):
+            solver.count_game_stats(random_endgame(rng, tablebase.max_tiles), print_stats=False, cache=expected)
+        found = mismatches = 0
+        for key, value in expected.items():
+            entry = tablebase.get(key)
+            if entry is not None:
+                found += 1
+                if entry != value:
+                    mismatches += 1
+        return len(expected), found, mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or verify an endgame tablebase for the solvers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Solve sampled endgames and write the table")
+    build_parser.add_argument("output", type=str, help="The table file to write")
+    build_parser.add_argument("--variant", choices=list(VARIANTS), default='international')
+    build_parser.add_argument("--max-tiles", type=int, default=8, help="Largest number of tiles left in the hands")
+    build_parser.add_argument("--samples", type=int, default=1000, help="Number of sampled endgames")
+    build_parser.add_argument("--seed", type=int, default=0)
+    verify_parser = subparsers.add_parser("verify", help="Check a table against fresh solves")
+    verify_parser.add_argument("table", type=str, help="The table file to check")
+    verify_parser.add_argument("--samples", type=int, default=100, help="Number of sampled endgames")
+    verify_parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "build":
+        num_entries = build_tablebase(args.output, args.variant, args.max_tiles, args.samples, args.seed)
+        print(f"Wrote {num_entries} positions to {args.output} in {time.perf_counter() - start:.1f}s")
+    else:
+        checked, found, mismatches = verify_tablebase(args.table, args.samples, args.seed)
+        print(f"Checked {checked} positions, {found} found in the table ({found / max(checked, 1):.1%}), {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
 # from domino_game_analyzer import DominoTile
-from domino_data_types import DominoTile, GameState, PlayerPosition, move
+from domino_data_types import DominoTile, GameState, PlayerPosition, move, SUIT_TILES
+
+# LEFT_PLAYS[suit][field] / RIGHT_PLAYS[suit][field]: plays of the tiles selected by a field of a suit index
+# (see GameState.suit_index) on the left / right end, when that end shows the suit
+LEFT_PLAYS: list[list[tuple[tuple[DominoTile, bool], ...]]] = [[tuple((tile, True) for tile in tiles) for tiles in suit_tiles] for suit_tiles in SUIT_TILES]
+RIGHT_PLAYS: list[list[tuple[tuple[DominoTile, bool], ...]]] = [[tuple((tile, False) for tile in tiles) for tiles in suit_tiles] for suit_tiles in SUIT_TILES]
+# The same in the format of list_possible_moves
+_LEFT_MOVES = [[tuple((play, None, None) for play in plays) for plays in suit_plays] for suit_plays in LEFT_PLAYS]
+_RIGHT_MOVES = [[tuple((play, None, None) for play in plays) for plays in suit_plays] for suit_plays in RIGHT_PLAYS]
 
 def history_to_domino_tiles_history(move_list: list[tuple[int, tuple[tuple[int, int], str]|None]]) -> list[tuple[DominoTile, bool]|None]:
     result: list[tuple[DominoTile, bool]|None] = []
@@ -62,21 +70,18 @@ def list_possible_moves(state: GameState) -> list[tuple[move, int|None, float|No
     :return: A list of tuples (tile, is_left, possible_outcomes, expected_score)
              If include_stats is False, possible_outcomes and expected_score will be None
     """
-    current_hand = state.get_current_hand()
-    possible_moves: list[tuple[tuple[DominoTile, bool]|None, int|None, float|None]] = []
+    possible_moves: list[tuple[tuple[DominoTile, bool]|None, int|None, float|None]]
+    left_end, right_end = state.left_end, state.right_end
 
     # If the board is empty, the first player can play any tile
-    if state.right_end is None and state.left_end is None:
-        for tile in current_hand:
-            possible_moves.append(((tile, True), None, None))
+    if right_end is None and left_end is None:
+        possible_moves = [((tile, True), None, None) for tile in state.get_current_hand()]
     else:
-        # Try playing each tile in the current player's hand
-        for tile in current_hand:
-            if tile.can_connect(state.left_end):
-                possible_moves.append(((tile, True), None, None))
-
-            if tile.can_connect(state.right_end) and state.left_end != state.right_end:
-                possible_moves.append(((tile, False), None, None))
+        # Only the tiles showing the suits of the ends are looked up, in the suit index of the hand
+        suit_index = state.suit_index[state.current_player]
+        possible_moves = list(_LEFT_MOVES[left_end][(suit_index >> (7 * left_end)) & 127]) # type: ignore[index, operator]
+        if right_end != left_end:
+            possible_moves.extend(_RIGHT_MOVES[right_end][(suit_index >> (7 * right_end)) & 127]) # type: ignore[index, operator]
 
     # If the player can't play, include the option to pass
     if not possible_moves:
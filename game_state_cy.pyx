@@ -1,6 +1,13 @@
-# cython: language_level=3
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
 
 from libcpp cimport bool
+from libc.stdint cimport uint32_t, uint64_t
+from libc.math cimport INFINITY
+from cpython.dict cimport PyDict_GetItem, PyDict_SetItem
+from cpython.ref cimport PyObject
+
+cdef extern from *:
+    int __builtin_ctz(unsigned int x) nogil
 
 cdef class GameStateCy:
     cdef public tuple player_hands
@@ -29,4 +36,388 @@ cdef class GameStateCy:
         for i in range(4):
             if len(player_hands[i]) == 0:
                 return True
-        return consecutive_passes == 4
\ No newline at end of file
+        return consecutive_passes == 4
+
+
+# Search kernel over the packed states of domino_bitboard: the same tile indices, move order,
+# scores and cache keys, so caches can be shared with get_best_move_bitboard.
+
+cdef enum:
+    NUM_TILES = 28
+    EMPTY_END = 7
+
+cdef uint32_t HAND_MASK = (1 << NUM_TILES) - 1
+cdef int TILE_TOP[NUM_TILES]
+cdef int TILE_BOTTOM[NUM_TILES]
+cdef int TILE_PIPS[NUM_TILES]
+cdef uint32_t SUIT_MASKS[7]
+cdef int OTHER_END[NUM_TILES][7]
+
+cdef struct State:
+    uint32_t hands[4]
+    int left_end
+    int right_end
+    int current_player
+    int consecutive_passes
+
+cdef enum:
+    INTERNATIONAL = 0
+    VENEZUELAN = 1
+
+VARIANTS = {'international': INTERNATIONAL, 'venezuelan': VENEZUELAN}
+
+cdef void _init_tables():
+    cdef int index = 0, i, j, suit
+    for i in range(7):
+        for j in range(i, 7):
+            TILE_TOP[index] = i
+            TILE_BOTTOM[index] = j
+            TILE_PIPS[index] = i + j
+            index += 1
+    for suit in range(7):
+        SUIT_MASKS[suit] = 0
+        for index in range(NUM_TILES):
+            if TILE_TOP[index] == suit or TILE_BOTTOM[index] == suit:
+                SUIT_MASKS[suit] |= (<uint32_t>1) << index
+            # Like DominoTile.get_other_end, only meaningful for the suits of the tile
+            OTHER_END[index][suit] = TILE_BOTTOM[index] if TILE_TOP[index] == suit else TILE_TOP[index]
+
+_init_tables()
+
+
+cdef State _unpack(object packed) except *:
+    cdef State state
+    cdef int player
+    for player in range(4):
+        state.hands[player] = (packed >> (NUM_TILES * player)) & HAND_MASK
+    state.left_end = (packed >> 112) & 0b111
+    state.right_end = (packed >> 115) & 0b111
+    state.current_player = (packed >> 118) & 0b11
+    state.consecutive_passes = (packed >> 120) & 0b111
+    return state
+
+cdef object _pack(const State* state):
+    # Layout of domino_bitboard, split in two 64-bit halves
+    cdef uint64_t low = (<uint64_t>state.hands[0] | (<uint64_t>state.hands[1] << 28)
+                         | ((<uint64_t>state.hands[2] & 0xFF) << 56))
+    cdef uint64_t high = ((<uint64_t>state.hands[2] >> 8) | (<uint64_t>state.hands[3] << 20)
+                          | (<uint64_t>state.left_end << 48) | (<uint64_t>state.right_end << 51)
+                          | (<uint64_t>state.current_player << 54) | (<uint64_t>state.consecutive_passes << 56))
+    return (<object>high << 64) | <object>low
+
+cdef inline int _hand_pip_sum(uint32_t hand) noexcept nogil:
+    cdef int pips = 0
+    while hand:
+        pips += TILE_PIPS[__builtin_ctz(hand)]
+        hand &= hand - 1
+    return pips
+
+cdef inline bint _is_game_over(const State* state) noexcept nogil:
+    return (state.consecutive_passes == 4 or not state.hands[0] or not state.hands[1]
+            or not state.hands[2] or not state.hands[3])
+
+cdef void _determine_winning_pair(const State* state, int* winner, int* pair_0_pips, int* pair_1_pips) noexcept nogil:
+    cdef int i
+    pair_0_pips[0] = _hand_pip_sum(state.hands[0]) + _hand_pip_sum(state.hands[2])
+    pair_1_pips[0] = _hand_pip_sum(state.hands[1]) + _hand_pip_sum(state.hands[3])
+    # Check if a player has run out of tiles
+    for i in range(4):
+        if state.hands[i] == 0:
+            winner[0] = i % 2
+            return
+    # If we're here, the game must be blocked
+    if pair_1_pips[0] == pair_0_pips[0]:
+        winner[0] = -1
+    else:
+        winner[0] = 1 if pair_1_pips[0] < pair_0_pips[0] else 0
+
+cdef inline long long _score(int winner, int pair_0_pips, int pair_1_pips, int variant) noexcept nogil:
+    if winner == -1:
+        return 0
+    if variant == INTERNATIONAL:
+        return (pair_0_pips + pair_1_pips) if winner == 0 else -(pair_0_pips + pair_1_pips)
+    return pair_1_pips if winner == 0 else -pair_0_pips
+
+cdef inline long long _terminal_score(const State* state, int variant) noexcept nogil:
+    cdef int winner, pair_0_pips, pair_1_pips
+    _determine_winning_pair(state, &winner, &pair_0_pips, &pair_1_pips)
+    return _score(winner, pair_0_pips, pair_1_pips, variant)
+
+cdef inline void _playable(const State* state, uint32_t* playable_left, uint32_t* playable_right) noexcept nogil:
+    cdef uint32_t hand = state.hands[state.current_player]
+    if state.left_end == EMPTY_END:
+        playable_left[0] = hand
+        playable_right[0] = 0
+    else:
+        playable_left[0] = hand & SUIT_MASKS[state.left_end]
+        playable_right[0] = hand & SUIT_MASKS[state.right_end] if state.left_end != state.right_end else 0
+
+cdef inline void _play(const State* state, State* child, int tile_index, bint left) noexcept nogil:
+    child[0] = state[0]
+    child.hands[state.current_player] ^= (<uint32_t>1) << tile_index
+    if state.left_end == EMPTY_END:
+        child.left_end = TILE_TOP[tile_index]
+        child.right_end = TILE_BOTTOM[tile_index]
+    elif left:
+        child.left_end = OTHER_END[tile_index][state.left_end]
+    else:
+        child.right_end = OTHER_END[tile_index][state.right_end]
+    child.current_player = (state.current_player + 1) & 0b11
+    child.consecutive_passes = 0
+
+cdef inline void _pass(const State* state, State* child) noexcept nogil:
+    child[0] = state[0]
+    child.current_player = (state.current_player + 1) & 0b11
+    child.consecutive_passes = state.consecutive_passes + 1
+
+
+cdef int _count_outcomes(const State* state, dict cache, int variant, long long* total_games, long long* total_score) except -1:
+    cdef object key = _pack(state)
+    cdef PyObject* cached = PyDict_GetItem(cache, key)
+    if cached != NULL:
+        total_games[0] = (<tuple>cached)[0]
+        total_score[0] = (<tuple>cached)[1]
+        return 0
+
+    cdef State child
+    cdef uint32_t playable_left, playable_right, hand
+    cdef long long games, score
+    cdef int tile_index
+
+    if _is_game_over(state):
+        total_games[0] = 1
+        total_score[0] = _terminal_score(state, variant)
+    else:
+        _playable(state, &playable_left, &playable_right)
+        hand = state.hands[state.current_player]
+        if not (playable_left or playable_right):
+            _pass(state, &child)
+            _count_outcomes(&child, cache, variant, total_games, total_score)
+        elif hand & (hand - 1) == 0:
+            # Last tile: every move ends the game with the same score
+            total_games[0] = (playable_left != 0) + (playable_right != 0)
+            _play(state, &child, __builtin_ctz(hand), playable_left != 0)
+            total_score[0] = total_games[0] * _terminal_score(&child, variant)
+        else:
+            total_games[0] = 0
+            total_score[0] = 0
+            while playable_left:
+                tile_index = __builtin_ctz(playable_left)
+                playable_left &= playable_left - 1
+                _play(state, &child, tile_index, True)
+                _count_outcomes(&child, cache, variant, &games, &score)
+                total_games[0] += games
+                total_score[0] += score
+            while playable_right:
+                tile_index = __builtin_ctz(playable_right)
+                playable_right &= playable_right - 1
+                _play(state, &child, tile_index, False)
+                _count_outcomes(&child, cache, variant, &games, &score)
+                total_games[0] += games
+                total_score[0] += score
+
+    PyDict_SetItem(cache, key, (total_games[0], total_score[0]))
+    return 0
+
+
+cdef double _alpha_beta(const State* state, int depth, double alpha, double beta, dict cache, int variant) except? -1e300:
+    # Score-only search: no move or path bookkeeping below the root
+    cdef long long total_games, total_score
+    if depth == 0 or _is_game_over(state):
+        _count_outcomes(state, cache, variant, &total_games, &total_score)
+        return <double>total_score / <double>total_games
+
+    cdef State child
+    cdef uint32_t playable_left, playable_right
+    cdef uint32_t hand = state.hands[state.current_player]
+    cdef int tile_index
+    cdef bint left
+    cdef double score, best_score
+    cdef bint is_maximizing = state.current_player % 2 == 0
+
+    _playable(state, &playable_left, &playable_right)
+    if not (playable_left or playable_right):
+        _pass(state, &child)
+        return _alpha_beta(&child, depth - 1, alpha, beta, cache, variant)
+
+    if hand & (hand - 1) == 0:
+        # Last tile: every move ends the game with the same score
+        _play(state, &child, __builtin_ctz(hand), playable_left != 0)
+        return <double>_terminal_score(&child, variant)
+
+    best_score = -INFINITY if is_maximizing else INFINITY
+    while playable_left or playable_right:
+        if playable_left:
+            tile_index = __builtin_ctz(playable_left)
+            playable_left &= playable_left - 1
+            left = True
+        else:
+            tile_index = __builtin_ctz(playable_right)
+            playable_right &= playable_right - 1
+            left = False
+        _play(state, &child, tile_index, left)
+        score = _alpha_beta(&child, depth - 1, alpha, beta, cache, variant)
+
+        if is_maximizing:
+            if score > best_score:
+                best_score = score
+                if best_score > alpha:
+                    alpha = best_score
+        elif score < best_score:
+            best_score = score
+            if best_score < beta:
+                beta = best_score
+        if beta <= alpha:
+            break
+
+    return best_score
+
+
+cdef tuple _min_max_path(const State* state, int depth, double alpha, double beta, dict cache, int variant):
+    cdef long long total_games, total_score
+    if depth == 0 or _is_game_over(state):
+        _count_outcomes(state, cache, variant, &total_games, &total_score)
+        return None, <double>total_score / <double>total_games, []
+
+    cdef State child
+    cdef uint32_t playable_left, playable_right
+    cdef int current_player = state.current_player
+    cdef int tile_index
+    cdef bint left
+    cdef double score
+    cdef bint is_maximizing = current_player % 2 == 0
+    cdef double best_score = -INFINITY if is_maximizing else INFINITY
+    cdef object best_move = None
+    cdef object packed_move
+    cdef list best_path = [], path
+
+    _playable(state, &playable_left, &playable_right)
+    if not (playable_left or playable_right):
+        _pass(state, &child)
+        _, score, path = _min_max_path(&child, depth - 1, alpha, beta, cache, variant)
+        return None, score, [(current_player, None)] + path
+
+    while playable_left or playable_right:
+        if playable_left:
+            tile_index = __builtin_ctz(playable_left)
+            playable_left &= playable_left - 1
+            left = True
+        else:
+            tile_index = __builtin_ctz(playable_right)
+            playable_right &= playable_right - 1
+            left = False
+        _play(state, &child, tile_index, left)
+        _, score, path = _min_max_path(&child, depth - 1, alpha, beta, cache, variant)
+
+        if is_maximizing:
+            if score > best_score:
+                best_score = score
+                best_move = packed_move = (tile_index, left)
+                best_path = [(current_player, packed_move)] + path
+            alpha = max(alpha, best_score)
+        else:
+            if score < best_score:
+                best_score = score
+                best_move = packed_move = (tile_index, left)
+                best_path = [(current_player, packed_move)] + path
+            beta = min(beta, best_score)
+        if beta <= alpha:
+            break
+
+    return best_move, best_score, best_path
+
+
+def count_game_stats(object packed, dict cache, str variant='international'):
+    """
+    Count every possible outcome of the game from a packed state (see get_best_move_bitboard.count_game_stats).
+
+    :return: A tuple of (total_games, total_score)
+    """
+    cdef State state = _unpack(packed)
+    cdef long long total_games, total_score
+    _count_outcomes(&state, cache, VARIANTS[variant], &total_games, &total_score)
+    return total_games, total_score
+
+
+def min_max_alpha_beta(object packed, int depth, double alpha, double beta, dict cache, bint best_path_flag=True, str variant='international'):
+    """
+    Min-max with alpha-beta pruning over packed states (see get_best_move_bitboard.min_max_alpha_beta).
+
+    :return: A tuple of (best_move, best_score, optimal_path) with moves as (tile_index, is_left)
+    """
+    cdef State state = _unpack(packed)
+    cdef State child
+    cdef int variant_id = VARIANTS[variant]
+    cdef long long total_games, total_score
+    if best_path_flag:
+        return _min_max_path(&state, depth, alpha, beta, cache, variant_id)
+
+    if depth == 0 or _is_game_over(&state):
+        _count_outcomes(&state, cache, variant_id, &total_games, &total_score)
+        return None, <double>total_score / <double>total_games, []
+
+    # Only the root keeps track of the best move
+    cdef bint is_maximizing = state.current_player % 2 == 0
+    cdef double best_score = -INFINITY if is_maximizing else INFINITY
+    cdef double score
+    cdef object best_move = None
+    for packed_move in list_possible_moves(packed):
+        if packed_move is None:
+            _pass(&state, &child)
+        else:
+            _play(&state, &child, packed_move[0], packed_move[1])
+        score = _alpha_beta(&child, depth - 1, alpha, beta, cache, variant_id)
+        if is_maximizing:
+            if score > best_score:
+                best_score = score
+                best_move = packed_move
+            alpha = max(alpha, best_score)
+        else:
+            if score < best_score:
+                best_score = score
+                best_move = packed_move
+            beta = min(beta, best_score)
+        if beta <= alpha:
+            break
+    return best_move, best_score, []
+
+
+def list_possible_moves(object packed):
+    """
+    :return: The legal moves of the current player as (tile_index, is_left), or [None] if the player must pass
+    """
+    cdef State state = _unpack(packed)
+    cdef uint32_t playable_left, playable_right
+    cdef list moves = []
+    _playable(&state, &playable_left, &playable_right)
+    while playable_left:
+        moves.append((__builtin_ctz(playable_left), True))
+        playable_left &= playable_left - 1
+    while playable_right:
+        moves.append((__builtin_ctz(playable_right), False))
+        playable_right &= playable_right - 1
+    if not moves:
+        moves.append(None)
+    return moves
+
+
+def apply_move(object packed, object packed_move):
+    cdef State state = _unpack(packed)
+    cdef State child
+    if packed_move is None:
+        _pass(&state, &child)
+    else:
+        _play(&state, &child, packed_move[0], packed_move[1])
+    return _pack(&child)
+
+
+def is_game_over(object packed):
+    cdef State state = _unpack(packed)
+    return _is_game_over(&state)
+
+
+def determine_winning_pair(object packed):
+    cdef State state = _unpack(packed)
+    cdef int winner, pair_0_pips, pair_1_pips
+    _determine_winning_pair(&state, &winner, &pair_0_pips, &pair_1_pips)
+    return winner, pair_0_pips, pair_1_pips
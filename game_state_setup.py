@@ -1,3 +1,6 @@
+# Build the compiled kernel next to the sources with:
+#     python game_state_setup.py build_ext --inplace
+# get_best_move_native falls back to get_best_move2 when it is not built.
 from setuptools import setup, Extension
 from Cython.Build import cythonize
 
@@ -5,10 +8,11 @@ extensions = [
     Extension(
         "game_state_cy",
         ["game_state_cy.pyx"],
-        language="c++"
+        language="c++",
+        extra_compile_args=["-O3"]
     ),
 ]
 
 setup(
     ext_modules = cythonize(extensions)
-)
\ No newline at end of file
+)
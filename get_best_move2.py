@@ -1,9 +1,47 @@
 # from domino_game_analyzer import GameState, DominoTile, PlayerPosition, PlayerPosition_SOUTH, PlayerPosition_NORTH
 import math
+import time
+from typing import Callable
 from domino_data_types import GameState, DominoTile, move, PlayerPosition, PlayerPosition_SOUTH, PlayerPosition_NORTH
-from domino_utils import list_possible_moves
+from domino_utils import list_possible_moves, LEFT_PLAYS, RIGHT_PLAYS
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, NEGATED_FLAG
+from move_ordering import MoveOrdering
+from search_budget import SearchBudget
+from domino_tablebase import Tablebase
+from search_stats import SearchStats
+from static_evaluation import international_score
 
-def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float, cache: dict[GameState, tuple[int, int]] = {}, best_path_flag: bool = True) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+def follow_forced_moves(state: GameState, depth: int, possible_moves: list[tuple[move, int|None, float|None]]) -> tuple[GameState, int, list[tuple[move, int|None, float|None]], list[tuple[PlayerPosition, move]]]:
+    """
+    Apply the chain of forced moves (a single playable tile, or a pass) starting at a position, up to the next
+    choice, the depth limit or the end of the game.
+
+    :param state: The first position of the chain, with a single move
+    :param depth: The depth left at that position
+    :param possible_moves: The moves of that position
+    :return: A tuple of (last position, depth left, its moves (empty at the depth limit or the end of the game),
+             the forced moves played as (player, move))
+    """
+    forced_moves: list[tuple[PlayerPosition, move]] = []
+    while True:
+        tile_and_loc_info = possible_moves[0][0]
+        forced_moves.append((state.current_player, tile_and_loc_info))
+        state = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+        depth -= 1
+        if depth == 0 or state.is_game_over():
+            return state, depth, [], forced_moves
+        possible_moves = list_possible_moves(state)
+        if len(possible_moves) > 1:
+            return state, depth, possible_moves, forced_moves
+
+def with_forced_moves(forced_moves: list[tuple[PlayerPosition, move]], result: tuple[move, float, list[tuple[PlayerPosition, move]]], best_path_flag: bool) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    # Result of the first position of a chain of forced moves, from the result of its last position
+    if not forced_moves:
+        return result
+    _, score, path = result
+    return forced_moves[0][1], score, forced_moves + path if best_path_flag else []
+
+def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float, cache: dict[int, tuple[int, int]] = {}, best_path_flag: bool = True, ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None, ordering: MoveOrdering|None = None, ply: int = 0, budget: SearchBudget|None = None, pvs: bool = False, tablebase: Tablebase|None = None, stats: SearchStats|None = None, evaluate: Callable[[GameState], float]|None = None, outcome_score: Callable[[int, int, int], float] = international_score) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
     """
     Implement the min-max algorithm with alpha-beta pruning for the domino game, including the optimal path.
     
@@ -13,11 +51,49 @@ def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float,
     :param beta: The best value that the minimizer currently can guarantee at that level or above
     :param cache: The cache dictionary to use for memoization
     :param best_path_flag: Flag to indicate if best_path is needed or not    
+    :param ab_cache: Optional transposition table for internal nodes, keyed on state.canonical_key() with (depth, flag, value,
+                     best_move) entries of the canonical state. The optimal path stops at a node whose value came from this table.
+    :param ordering: Optional move ordering heuristics, updated with the cutoffs of this search
+    :param ply: Distance from the root of the search, used by the killer moves of the ordering
+    :param budget: Optional time/node budget, search_budget.SearchTimeout is raised when it runs out
+    :param pvs: Use principal variation search: moves after the first one are searched with a null
+                window first, and only re-searched with the full window when they may improve it
+    :param tablebase: Optional endgame table probed by count_game_stats (see domino_tablebase)
+    :param stats: Optional search_stats.SearchStats, updated with the counters of this search
+    :param evaluate: Optional static evaluation of the positions at the depth limit (see static_evaluation), used instead
+                     of counting every continuation. Its values are stored in ab_cache, which should not be shared with
+                     searches using another evaluation.
+    :param outcome_score: Score of a finished game from (winner, pair_0_pips, pair_1_pips), pair 0 positive: the scoring
+                          rules of the variant (see static_evaluation). The caches should not be shared between rules.
     :return: A tuple of (best_move, best_score, optimal_path)
     """
+    if ordering is not None:
+        ordering.nodes += 1
+    if budget is not None:
+        budget.tick()
+    if stats is not None:
+        stats.enter(ply)
+
+    # Forced moves are played in a loop, and the search goes on from the end of their chain: the positions on the
+    # way are not searched as nodes and get no ab_cache entries. The first forced move is the best move.
+    forced_moves: list[tuple[PlayerPosition, move]] = []
+    if depth > 0 and not state.is_game_over():
+        possible_moves = list_possible_moves(state)
+        if len(possible_moves) == 1:
+            state, depth, possible_moves, forced_moves = follow_forced_moves(state, depth, possible_moves)
+            ply += len(forced_moves)
+
     if depth == 0 or state.is_game_over():
-        _, total_score = count_game_stats(state, print_stats=False, cache=cache)
-        return None, total_score, []
+        game_over = state.is_game_over()
+        if stats is not None:
+            if game_over:
+                stats.terminal_nodes += 1
+            else:
+                stats.horizon_nodes += 1
+        if evaluate is not None and not game_over:
+            return with_forced_moves(forced_moves, (None, evaluate(state), []), best_path_flag)
+        _, total_score = count_game_stats(state, print_stats=False, cache=cache, budget=budget, tablebase=tablebase, stats=stats, outcome_score=outcome_score)
+        return with_forced_moves(forced_moves, (None, total_score, []), best_path_flag)
 
     current_player = state.current_player
     # is_maximizing = current_player in (PlayerPosition.NORTH, PlayerPosition.SOUTH)
@@ -25,12 +101,53 @@ def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float,
     
     best_move = None
     best_path = []
-    
-    possible_moves = list_possible_moves(state)
+
+    tt_move = None
+    if ab_cache is not None:
+        # Searches deeper than the longest possible rest of the game (every play followed by
+        # 3 passes, then 4 passes to block) all give the same value, so they share entries
+        horizon = 4 * state.tiles_left() + 4
+        entry_depth = depth if depth < horizon else horizon
+        alpha_orig, beta_orig = alpha, beta
+        # Entries are shared by the states that are the same up to seat rotation and end swap,
+        # they hold the value and move of the canonical state
+        canonical_key, negate, swap_ends = state.canonical_key()
+        entry = ab_cache.get(canonical_key)
+        if stats is not None:
+            if entry is not None and entry[0] == entry_depth:
+                stats.tt_hits += 1
+            else:
+                stats.tt_misses += 1
+        if entry is not None:
+            cached_depth, flag, value, cached_move = entry
+            if negate:
+                value, flag = -value, NEGATED_FLAG[flag]
+            if swap_ends and cached_move is not None:
+                cached_move = (cached_move[0], not cached_move[1])
+            if cached_depth == entry_depth:
+                if flag == EXACT:
+                    return with_forced_moves(forced_moves, (cached_move, value, [(current_player, cached_move)] if best_path_flag else []), best_path_flag)
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return with_forced_moves(forced_moves, (cached_move, value, [(current_player, cached_move)] if best_path_flag else []), best_path_flag)
+            tt_move = cached_move
+            if ordering is None:
+                # Try the move stored for this state first
+                for i, possible_move in enumerate(possible_moves):
+                    if possible_move[0] == cached_move:
+                        if i > 0:
+                            possible_moves.insert(0, possible_moves.pop(i))
+                        break
+
+    if ordering is not None:
+        possible_moves = ordering.order_moves(possible_moves, ply, current_player, tt_move)
     
     if is_maximizing:
         best_score = -math.inf
-        for move in possible_moves:
+        for i, move in enumerate(possible_moves):
             tile_and_loc_info, _, _ = move
             # tile, is_left = tile_info if tile_info is not None else (None, None)
             
@@ -42,7 +159,14 @@ def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float,
                 tile, is_left = tile_and_loc_info
                 new_state = state.play_hand(tile, is_left)
             
-            _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache)
+            if pvs and i > 0:
+                # Null window (alpha, alpha + 1): scores are pips, and a fail-soft result strictly
+                # inside the window is exact, so this also holds for the fractional expected scores
+                _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, alpha + 1, cache, best_path_flag=best_path_flag, ab_cache=ab_cache, ordering=ordering, ply=ply + 1, budget=budget, pvs=pvs, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
+                if alpha + 1 <= score < beta:
+                    _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache, best_path_flag=best_path_flag, ab_cache=ab_cache, ordering=ordering, ply=ply + 1, budget=budget, pvs=pvs, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
+            else:
+                _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache, best_path_flag=best_path_flag, ab_cache=ab_cache, ordering=ordering, ply=ply + 1, budget=budget, pvs=pvs, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
             
             if score > best_score:
                 best_score = score
@@ -54,10 +178,14 @@ def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float,
             
             alpha = max(alpha, best_score)
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.record_cutoff(best_move, ply, depth, current_player)
+                if stats is not None:
+                    stats.cutoff(i, True)
                 break  # Beta cut-off
     else:
         best_score = math.inf
-        for move in possible_moves:
+        for i, move in enumerate(possible_moves):
             tile_and_loc_info, _, _ = move
             # tile, is_left = tile_and_loc_info if tile_and_loc_info is not None else (None, None)
             
@@ -69,7 +197,13 @@ def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float,
                 tile, is_left = tile_and_loc_info
                 new_state = state.play_hand(tile, is_left)
             
-            _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache)
+            if pvs and i > 0:
+                # Null window (beta - 1, beta), see the maximizing side
+                _, score, path = min_max_alpha_beta(new_state, depth - 1, beta - 1, beta, cache, best_path_flag=best_path_flag, ab_cache=ab_cache, ordering=ordering, ply=ply + 1, budget=budget, pvs=pvs, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
+                if alpha < score <= beta - 1:
+                    _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache, best_path_flag=best_path_flag, ab_cache=ab_cache, ordering=ordering, ply=ply + 1, budget=budget, pvs=pvs, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
+            else:
+                _, score, path = min_max_alpha_beta(new_state, depth - 1, alpha, beta, cache, best_path_flag=best_path_flag, ab_cache=ab_cache, ordering=ordering, ply=ply + 1, budget=budget, pvs=pvs, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
             
             if score < best_score:
                 best_score = score
@@ -81,11 +215,34 @@ def min_max_alpha_beta(state: GameState, depth: int, alpha: float, beta: float,
             
             beta = min(beta, best_score)
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.record_cutoff(best_move, ply, depth, current_player)
+                if stats is not None:
+                    stats.cutoff(i, False)
                 break  # Alpha cut-off
+
+    if ab_cache is not None:
+        # Fail-soft bounds: a score outside the original window only bounds the true value
+        if best_score <= alpha_orig:
+            flag = UPPER_BOUND
+        elif best_score >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        stored_score, stored_move = best_score, best_move
+        if negate:
+            stored_score, flag = -stored_score, NEGATED_FLAG[flag]
+        if swap_ends and stored_move is not None:
+            stored_move = (stored_move[0], not stored_move[1])
+        ab_cache[canonical_key] = (entry_depth, flag, stored_score, stored_move)
+        if stats is not None:
+            stats.tt_stores += 1
+            if len(ab_cache) > stats.tt_peak_size:
+                stats.tt_peak_size = len(ab_cache)
     
-    return best_move, best_score, best_path
+    return with_forced_moves(forced_moves, (best_move, best_score, best_path), best_path_flag)
 
-def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict[GameState, tuple[int, int]] = {}, best_path_flag: bool = True) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict[int, tuple[int, int]] = {}, best_path_flag: bool = True, ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None, ordering: MoveOrdering|None = None, budget: SearchBudget|None = None, algorithm: str = 'alpha_beta', first_guess: float = 0.0, tablebase: Tablebase|None = None, stats: SearchStats|None = None, evaluate: Callable[[GameState], float]|None = None, outcome_score: Callable[[int, int, int], float] = international_score) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
     """
     Get the best move for the current player using the min-max algorithm with alpha-beta pruning, including the optimal path.
     
@@ -93,84 +250,244 @@ def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict[GameState
     :param depth: The depth to search in the game tree
     :param cache: The cache dictionary to use for memoization
     :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param ab_cache: Optional transposition table for the alpha-beta search (see min_max_alpha_beta)
+    :param ordering: Optional move ordering heuristics (see move_ordering.MoveOrdering)
+    :param budget: Optional time/node budget, search_budget.SearchTimeout is raised when it runs out
+    :param algorithm: 'alpha_beta', 'pvs' (principal variation search) or 'mtdf' (MTD(f), uses a new
+                      ab_cache if none is given)
+    :param first_guess: Initial guess of the score for 'mtdf'
+    :param tablebase: Optional endgame table probed by count_game_stats (see domino_tablebase)
+    :param stats: Optional search_stats.SearchStats, updated with the counters of this search
+    :param evaluate: Optional static evaluation of the positions at the depth limit (see static_evaluation), used instead
+                     of counting every continuation. Its values are stored in ab_cache, which should not be shared with
+                     searches using another evaluation.
+    :param outcome_score: Score of a finished game from (winner, pair_0_pips, pair_1_pips), pair 0 positive: the scoring
+                          rules of the variant (see static_evaluation). The caches should not be shared between rules.
+    :return: A tuple of (best_move, best_score, optimal_path)
+    """
+    if algorithm not in ('alpha_beta', 'pvs', 'mtdf'):
+        raise ValueError(f"Unknown search algorithm: {algorithm}")
+    start = time.perf_counter()
+    try:
+        if algorithm == 'mtdf':
+            return mtdf(state, depth, first_guess, cache, best_path_flag, {} if ab_cache is None else ab_cache, ordering, budget, tablebase, stats, evaluate, outcome_score)
+        return min_max_alpha_beta(state, depth, -math.inf, math.inf, cache, best_path_flag, ab_cache, ordering, budget=budget, pvs=algorithm == 'pvs', tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
+    finally:
+        if stats is not None:
+            stats.searches += 1
+            stats.elapsed += time.perf_counter() - start
+
+def mtdf(state: GameState, depth: int, first_guess: float = 0.0, cache: dict[int, tuple[int, int]] = {}, best_path_flag: bool = True, ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None, ordering: MoveOrdering|None = None, budget: SearchBudget|None = None, tablebase: Tablebase|None = None, stats: SearchStats|None = None, evaluate: Callable[[GameState], float]|None = None, outcome_score: Callable[[int, int, int], float] = international_score) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    """
+    MTD(f): converge on the score with null window searches of width 1, re-using the transposition table between them.
+    Scores are pips, or expected pips at the depth limit, so a result strictly inside a window is exact and ends the search.
+
+    :param state: The current GameState
+    :param depth: The depth to search in the game tree
+    :param first_guess: Initial guess of the score, the closer the fewer passes are needed
+    :param cache: The cache dictionary to use for memoization
+    :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param ab_cache: The transposition table for the alpha-beta search, needed to make the repeated passes cheap
+    :param ordering: Optional move ordering heuristics (see move_ordering.MoveOrdering)
+    :param budget: Optional time/node budget, search_budget.SearchTimeout is raised when it runs out
+    :param tablebase: Optional endgame table probed by count_game_stats (see domino_tablebase)
+    :param stats: Optional search_stats.SearchStats, updated with the counters of this search
+    :param evaluate: Optional static evaluation of the positions at the depth limit (see static_evaluation), used instead
+                     of counting every continuation. Its values are stored in ab_cache, which should not be shared with
+                     searches using another evaluation.
+    :param outcome_score: Score of a finished game from (winner, pair_0_pips, pair_1_pips), pair 0 positive: the scoring
+                          rules of the variant (see static_evaluation). The caches should not be shared between rules.
     :return: A tuple of (best_move, best_score, optimal_path)
     """
-    return min_max_alpha_beta(state, depth, -math.inf, math.inf, cache, best_path_flag)
+    is_maximizing = state.current_player in (PlayerPosition_NORTH, PlayerPosition_SOUTH)
+    score = first_guess
+    lower, upper = -math.inf, math.inf
+    # The best move is the one of the pass that established the bound on the side of the player to move
+    result: tuple[move, float, list[tuple[PlayerPosition, move]]] = (None, score, [])
+    while lower < upper:
+        beta = max(score, lower + 1)
+        best_move, score, path = min_max_alpha_beta(state, depth, beta - 1, beta, cache, best_path_flag, ab_cache, ordering, budget=budget, tablebase=tablebase, stats=stats, evaluate=evaluate, outcome_score=outcome_score)
+        if beta - 1 < score < beta:
+            return best_move, score, path
+        if score < beta:
+            upper = score
+            if not is_maximizing:
+                result = (best_move, score, path)
+        else:
+            lower = score
+            if is_maximizing:
+                result = (best_move, score, path)
+    return result
+
+def principal_variation(state: GameState, depth: int, ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable) -> list[tuple[PlayerPosition, move]]:
+    """
+    Rebuild the optimal path of a search from the best moves it stored in its transposition table, so the search
+    can run with best_path_flag=False (no path built at every node) and still give the whole line.
+
+    Forced moves have no entries (see follow_forced_moves) and are played as they come. The walk stops at the
+    depth of the search, at the end of the game, or at the first position without a usable entry: one that is
+    missing, or was overwritten by another search of the same position with a bound of another depth.
+
+    :param state: The root of the search
+    :param depth: The depth of the search
+    :param ab_cache: The transposition table filled by the search
+    :return: The optimal path as (player, move) pairs, starting with the best move of the root
+    """
+    path: list[tuple[PlayerPosition, move]] = []
+    while depth > 0 and not state.is_game_over():
+        possible_moves = list_possible_moves(state)
+        if len(possible_moves) == 1:
+            tile_and_loc_info = possible_moves[0][0]
+        else:
+            horizon = 4 * state.tiles_left() + 4
+            canonical_key, _, swap_ends = state.canonical_key()
+            entry = ab_cache.get(canonical_key)
+            if entry is None or entry[0] != (depth if depth < horizon else horizon) or entry[3] is None:
+                break
+            tile_and_loc_info = entry[3]
+            if swap_ends:
+                tile_and_loc_info = (tile_and_loc_info[0], not tile_and_loc_info[1])
+            if all(possible_move[0] != tile_and_loc_info for possible_move in possible_moves):
+                # Key collision
+                break
+        path.append((state.current_player, tile_and_loc_info))
+        state = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+        depth -= 1
+    return path
 
 # cache_hit: int = 0
 # cache_miss: int = 0
 
-def count_game_stats(initial_state: GameState, print_stats: bool = True, cache: dict[GameState, tuple[int, int]] = {}) -> tuple[int, float]:
+def list_count_moves(state: GameState) -> list[tuple[DominoTile, bool]|None]:
+    # Moves of count_game_stats, without the (outcomes, score) of list_possible_moves
+    moves: list[tuple[DominoTile, bool]|None]
+    left_end, right_end = state.left_end, state.right_end
+
+    # Generate possible moves
+    if right_end is None and left_end is None:
+        moves = [(tile, True) for tile in state.get_current_hand()]
+    else:
+        suit_index = state.suit_index[state.current_player]
+        moves = list(LEFT_PLAYS[left_end][(suit_index >> (7 * left_end)) & 127]) # type: ignore[index, operator]
+        if right_end != left_end:
+            moves.extend(RIGHT_PLAYS[right_end][(suit_index >> (7 * right_end)) & 127]) # type: ignore[index, operator]
+
+    # If no moves are possible, pass the turn
+    if not moves:
+        moves.append(None)
+    return moves
+
+def count_game_stats(initial_state: GameState, print_stats: bool = True, cache: dict[int, tuple[int, int]]|TranspositionTable = {}, budget: SearchBudget|None = None, tablebase: Tablebase|None = None, stats: SearchStats|None = None, outcome_score: Callable[[int, int, int], float] = international_score) -> tuple[int, float]:
     # global cache_hit, cache_miss
     
     # stack: list[tuple[GameState, list[tuple[DominoTile, bool]]]] = [(initial_state, [])]  # Stack contains (state, path) pairs
-    stack: list[tuple[GameState, list[GameState]]] = [(initial_state, [])]  # Stack contains (state, path) pairs
+    # Post-order traversal: the stack holds the states whose children are being counted, with the
+    # sums of the children counted so far. A state's totals are cached and added to its parent once
+    # its last child is counted, so every node costs O(1) on top of its move generation (no copies
+    # of ancestor paths, no walks up the path at every terminal or cache hit). Only complete totals
+    # reach the cache, so entries evicted from a bounded TranspositionTable or a traversal aborted
+    # by the budget never leave partial sums behind. The stack holds one frame per ply of the line
+    # being counted, at most 2 * (28 + 4), so the memory of a traversal is the cache budget and a
+    # constant, however many states are counted.
+    # Keys are canonical (see GameState.canonical_key): states that are the same game up to seat
+    # rotation share an entry, which holds the score of the canonical state.
+    # Frames: [state, canonical key, negate, moves, index of the child being counted, games, score]
+    stack: list[list] = []
     winning_stats = {-1: 0, 0: 0, 1: 0}
-    
-    while stack:
-        state, path = stack.pop()
 
-        if state in cache:
-            # cache_hit += 1
-            total_games, total_score = cache[state]
-            
-            # Update all states in the path with this result
-            for path_state in reversed(path):
-                if path_state in cache:
-                    cache[path_state] = (
-                        cache[path_state][0] + total_games,
-                        cache[path_state][1] + total_score
-                    )
-                else:
-                    cache[path_state] = (total_games, total_score)
-            
-            continue
-        
-        # cache_miss += 1
+    state = initial_state
+    # Moves of the end of a chain of forced moves, generated when the chain was followed
+    next_moves: list[tuple[DominoTile, bool]|None]|None = None
+    # Key of the initial state when it starts a chain of forced moves, it is cached at the end
+    root_key, root_negate = None, False
+    while True:
+        if budget is not None:
+            budget.tick()
+        if stats is not None:
+            stats.counted_nodes += 1
+        state_moves, next_moves = next_moves, None
+        state_key, negate, _ = state.canonical_key()
 
-        if state.is_game_over():
+        cached = cache.get(state_key)
+        if cached is None and tablebase is not None and state.tiles_left() <= tablebase.max_tiles:
+            # Solved endgame, its entry has the same format as the cache ones
+            cached = tablebase.get(state_key)
+        if stats is not None:
+            if cached is not None:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+        if cached is not None:
+            # cache_hit += 1
+            total_games, total_score = cached
+            if negate:
+                total_score = -total_score
+        elif state.is_game_over():
+            # cache_miss += 1
             winner, pair_0_pips, pair_1_pips = determine_winning_pair(state)
             winning_stats[winner] += 1
-            score = 0 if winner == -1 else (pair_0_pips + pair_1_pips) * (1 if winner == 0 else -1)
+            score = outcome_score(winner, pair_0_pips, pair_1_pips)
             total_games, total_score = 1, score
             
             # Cache the result for this terminal state
-            cache[state] = (total_games, total_score)
-            
-            # Update all states in the path with this result
-            for path_state in reversed(path):
-                if path_state in cache:
-                    cache[path_state] = (
-                        cache[path_state][0] + total_games,
-                        cache[path_state][1] + total_score
-                    )
-                else:
-                    cache[path_state] = (total_games, total_score)
+            cache[state_key] = (total_games, -total_score if negate else total_score)
+            if stats is not None:
+                stats.cache_stores += 1
         else:
-            current_hand = state.get_current_hand()
-            moves = []
+            # cache_miss += 1
+            moves = state_moves if state_moves is not None else list_count_moves(state)
+            if len(moves) == 1:
+                # Forced move: a position has the totals of the end of the chain of forced moves it starts, which is
+                # found in a loop, without frames or cache entries for the positions on the way. The end of the chain
+                # is then counted as the child of the parent of the position.
+                if not stack:
+                    root_key, root_negate = state_key, negate
+                state = state.pass_turn() if moves[0] is None else state.play_hand(*moves[0])
+                while not state.is_game_over():
+                    next_moves = list_count_moves(state)
+                    if len(next_moves) > 1:
+                        break
+                    state = state.pass_turn() if next_moves[0] is None else state.play_hand(*next_moves[0])
+                else:
+                    next_moves = None
+                continue
+            stack.append([state, state_key, negate, moves, 0, 0, 0])
+            total_games = None
 
-            # Generate possible moves
-            if state.right_end is None and state.left_end is None:
-                moves = [(tile, True) for tile in current_hand]
-            else:
-                for tile in current_hand:
-                    if tile.can_connect(state.left_end):
-                        moves.append((tile, True))
-                    if tile.can_connect(state.right_end) and state.left_end != state.right_end:
-                        moves.append((tile, False))
-
-            # If no moves are possible, pass the turn
-            if not moves:
-                new_state = state.pass_turn()
-                stack.append((new_state, path + [state]))
+        if total_games is not None:
+            # Add the result to the parent, and the totals of every parent counted completely to its own parent
+            while stack:
+                frame = stack[-1]
+                frame[5] += total_games
+                frame[6] += total_score
+                frame[4] += 1
+                if frame[4] < len(frame[3]):
+                    break
+                stack.pop()
+                total_games, total_score = frame[5], frame[6]
+                cache[frame[1]] = (total_games, -total_score if frame[2] else total_score)
+                if stats is not None:
+                    stats.cache_stores += 1
             else:
-                for tile, left in moves:
-                    new_state = state.play_hand(tile, left)
-                    stack.append((new_state, path + [state]))
+                # The initial state is counted
+                break
+
+        # Count the next child of the innermost state
+        frame = stack[-1]
+        tile_and_loc_info = frame[3][frame[4]]
+        state = frame[0].pass_turn() if tile_and_loc_info is None else frame[0].play_hand(*tile_and_loc_info)
+
+    if root_key is not None:
+        cache[root_key] = (total_games, -total_score if root_negate else total_score)
+        if stats is not None:
+            stats.cache_stores += 1
+
+    if stats is not None and len(cache) > stats.cache_peak_size:
+        # Entries are only added during the count, so the peak is reached at its end
+        stats.cache_peak_size = len(cache)
 
     # Calculate final statistics
-    total_games, total_score = cache[initial_state]
+    # total_games, total_score = cache[initial_state.key]
     exp_score = total_score / total_games if total_games > 0 else 0
 
     if print_stats:
@@ -180,17 +497,22 @@ def count_game_stats(initial_state: GameState, print_stats: bool = True, cache:
         # print(f'Cache hits: {cache_hit}')        
         # print(f'Cache misses: {cache_miss}')
         print(f'Total cached states: {len(cache)}')
+        if isinstance(cache, TranspositionTable):
+            print(cache.stats())
+        if tablebase is not None:
+            print(f'{tablebase}: {tablebase.hits} hits, {tablebase.misses} misses')
 
     return total_games, exp_score
 
 def determine_winning_pair(state: GameState) -> tuple[int, int, int]:
 
-    pair_0_pips = sum(tile.get_pip_sum() for hand in state.player_hands[::2] for tile in hand)
-    pair_1_pips = sum(tile.get_pip_sum() for hand in state.player_hands[1::2] for tile in hand)
+    pip_sums = state.pip_sums
+    pair_0_pips = pip_sums[0] + pip_sums[2]
+    pair_1_pips = pip_sums[1] + pip_sums[3]
 
     # Check if a player has run out of tiles
-    for i, hand in enumerate(state.player_hands):
-        if len(hand) == 0:
+    for i, tile_count in enumerate(state.tile_counts):
+        if tile_count == 0:
             # print(f'player {i} domino')
             return i % 2, pair_0_pips, pair_1_pips
 
@@ -0,0 +1,268 @@
+import math
+import time
+from typing import Callable
+from domino_data_types import GameState, DominoTile, move, PlayerPosition
+from domino_bitboard import (PackedState, PackedMove, encode_state, list_possible_moves, apply_move, is_game_over,
+                             determine_winning_pair, move_to_domino_move, hand_pip_sum, get_current_player,
+                             HAND_BITS, HAND_MASK, ALL_HANDS_MASK, LEFT_SHIFT, RIGHT_SHIFT, PLAYER_SHIFT, PASSES_SHIFT,
+                             EMPTY_END, END_MASK, ENDS_FIELD_MASK, PLAYER_MASK, SUIT_MASKS, OTHER_END, TILE_ENDS_PACKED)
+
+HAND_BITS_2 = 2 * HAND_BITS
+HAND_BITS_3 = 3 * HAND_BITS
+
+
+def score_international(winner: int, pair_0_pips: int, pair_1_pips: int) -> int:
+    return 0 if winner == -1 else (pair_0_pips + pair_1_pips) * (1 if winner == 0 else -1)
+
+
+def score_venezuelan(winner: int, pair_0_pips: int, pair_1_pips: int) -> int:
+    return 0 if winner == -1 else (pair_1_pips if winner == 0 else -pair_0_pips)
+
+
+SCORING = {
+    'international': score_international,
+    'venezuelan': score_venezuelan,
+}
+
+
+def count_game_stats(packed: PackedState, cache: dict[PackedState, tuple[int, int]], variant: str = 'international') -> tuple[int, int]:
+    """
+    Count every possible outcome of the game from the given packed state.
+
+    :param packed: The packed state
+    :param cache: The cache dictionary to use for memoization, keyed on packed states
+    :param variant: Scoring rules ('international' or 'venezuelan')
+    :return: A tuple of (total_games, total_score)
+    """
+    return _count_outcomes(packed, cache, SCORING[variant])
+
+
+def _last_tile_score(hands: int, current_player: PlayerPosition, scoring: Callable[[int, int, int], int]) -> int:
+    # Score once the current player goes out, given the hands left after their last tile
+    pair_0_pips = hand_pip_sum(hands & HAND_MASK) + hand_pip_sum((hands >> HAND_BITS_2) & HAND_MASK)
+    pair_1_pips = hand_pip_sum((hands >> HAND_BITS) & HAND_MASK) + hand_pip_sum((hands >> HAND_BITS_3) & HAND_MASK)
+    return scoring(current_player % 2, pair_0_pips, pair_1_pips)
+
+
+def _count_outcomes(packed: PackedState, cache: dict[PackedState, tuple[int, int]], scoring: Callable[[int, int, int], int]) -> tuple[int, int]:
+    cached = cache.get(packed)
+    if cached is not None:
+        return cached
+
+    passes = packed >> PASSES_SHIFT
+    if passes == 4 or not (packed & HAND_MASK and (packed >> HAND_BITS) & HAND_MASK
+                           and (packed >> HAND_BITS_2) & HAND_MASK and (packed >> HAND_BITS_3) & HAND_MASK):
+        result = (1, scoring(*determine_winning_pair(packed)))
+        cache[packed] = result
+        return result
+
+    current_player = (packed >> PLAYER_SHIFT) & PLAYER_MASK
+    hand_shift = HAND_BITS * current_player
+    hand = (packed >> hand_shift) & HAND_MASK
+    left_end = (packed >> LEFT_SHIFT) & END_MASK
+    right_end = (packed >> RIGHT_SHIFT) & END_MASK
+    base = (packed & ALL_HANDS_MASK) | (((current_player + 1) & PLAYER_MASK) << PLAYER_SHIFT)
+
+    if left_end == EMPTY_END:
+        playable_left, playable_right = hand, 0
+    else:
+        playable_left = hand & SUIT_MASKS[left_end]
+        playable_right = hand & SUIT_MASKS[right_end] if left_end != right_end else 0
+
+    if not (playable_left or playable_right):
+        result = _count_outcomes(base | (packed & ENDS_FIELD_MASK) | ((passes + 1) << PASSES_SHIFT), cache, scoring)
+        cache[packed] = result
+        return result
+
+    if hand & (hand - 1) == 0:
+        # Last tile: every move ends the game with the same score
+        total_games = (playable_left != 0) + (playable_right != 0)
+        result = (total_games, total_games * _last_tile_score(base ^ (hand << hand_shift), current_player, scoring))
+        cache[packed] = result
+        return result
+
+    total_games = 0
+    total_score = 0
+    while playable_left:
+        low = playable_left & -playable_left
+        playable_left ^= low
+        tile_index = low.bit_length() - 1
+        if left_end == EMPTY_END:
+            ends = TILE_ENDS_PACKED[tile_index]
+        else:
+            ends = (OTHER_END[tile_index][left_end] << LEFT_SHIFT) | (right_end << RIGHT_SHIFT)
+        games, score = _count_outcomes((base ^ (low << hand_shift)) | ends, cache, scoring)
+        total_games += games
+        total_score += score
+    while playable_right:
+        low = playable_right & -playable_right
+        playable_right ^= low
+        ends = (left_end << LEFT_SHIFT) | (OTHER_END[low.bit_length() - 1][right_end] << RIGHT_SHIFT)
+        games, score = _count_outcomes((base ^ (low << hand_shift)) | ends, cache, scoring)
+        total_games += games
+        total_score += score
+
+    result = (total_games, total_score)
+    cache[packed] = result
+    return result
+
+
+def _alpha_beta(packed: PackedState, depth: int, alpha: float, beta: float, cache: dict[PackedState, tuple[int, int]], scoring: Callable[[int, int, int], int]) -> float:
+    # Score-only search: no move or path bookkeeping below the root
+    passes = packed >> PASSES_SHIFT
+    if depth == 0 or passes == 4 or not (packed & HAND_MASK and (packed >> HAND_BITS) & HAND_MASK
+                                         and (packed >> HAND_BITS_2) & HAND_MASK and (packed >> HAND_BITS_3) & HAND_MASK):
+        total_games, total_score = _count_outcomes(packed, cache, scoring)
+        return total_score / total_games
+
+    current_player = (packed >> PLAYER_SHIFT) & PLAYER_MASK
+    hand_shift = HAND_BITS * current_player
+    hand = (packed >> hand_shift) & HAND_MASK
+    left_end = (packed >> LEFT_SHIFT) & END_MASK
+    right_end = (packed >> RIGHT_SHIFT) & END_MASK
+    base = (packed & ALL_HANDS_MASK) | (((current_player + 1) & PLAYER_MASK) << PLAYER_SHIFT)
+
+    if left_end == EMPTY_END:
+        playable_left, playable_right = hand, 0
+    else:
+        playable_left = hand & SUIT_MASKS[left_end]
+        playable_right = hand & SUIT_MASKS[right_end] if left_end != right_end else 0
+
+    if not (playable_left or playable_right):
+        return _alpha_beta(base | (packed & ENDS_FIELD_MASK) | ((passes + 1) << PASSES_SHIFT), depth - 1, alpha, beta, cache, scoring)
+
+    if hand & (hand - 1) == 0:
+        # Last tile: every move ends the game with the same score
+        return _last_tile_score(base ^ (hand << hand_shift), current_player, scoring)
+
+    is_maximizing = current_player % 2 == 0
+    best_score = -math.inf if is_maximizing else math.inf
+    while playable_left or playable_right:
+        if playable_left:
+            low = playable_left & -playable_left
+            playable_left ^= low
+            tile_index = low.bit_length() - 1
+            if left_end == EMPTY_END:
+                ends = TILE_ENDS_PACKED[tile_index]
+            else:
+                ends = (OTHER_END[tile_index][left_end] << LEFT_SHIFT) | (right_end << RIGHT_SHIFT)
+        else:
+            low = playable_right & -playable_right
+            playable_right ^= low
+            ends = (left_end << LEFT_SHIFT) | (OTHER_END[low.bit_length() - 1][right_end] << RIGHT_SHIFT)
+
+        score = _alpha_beta((base ^ (low << hand_shift)) | ends, depth - 1, alpha, beta, cache, scoring)
+
+        if is_maximizing:
+            if score > best_score:
+                best_score = score
+                if best_score > alpha:
+                    alpha = best_score
+        elif score < best_score:
+            best_score = score
+            if best_score < beta:
+                beta = best_score
+        if beta <= alpha:
+            break
+
+    return best_score
+
+
+def min_max_alpha_beta(packed: PackedState, depth: int, alpha: float, beta: float, cache: dict[PackedState, tuple[int, int]], best_path_flag: bool = True, variant: str = 'international') -> tuple[PackedMove, float, list[tuple[PlayerPosition, PackedMove]]]:
+    """
+    Min-max with alpha-beta pruning over packed states. Same semantics as get_best_move2.min_max_alpha_beta.
+    Without best_path_flag the subtrees are searched by a score-only kernel with no move or path bookkeeping.
+
+    :param packed: The packed state
+    :param depth: The depth to search in the game tree
+    :param alpha: The best value that the maximizer currently can guarantee at that level or above
+    :param beta: The best value that the minimizer currently can guarantee at that level or above
+    :param cache: The cache dictionary used by count_game_stats
+    :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param variant: Scoring rules ('international' or 'venezuelan')
+    :return: A tuple of (best_move, best_score, optimal_path) with moves as (tile_index, is_left)
+    """
+    scoring = SCORING[variant]
+    if depth == 0 or is_game_over(packed):
+        total_games, total_score = _count_outcomes(packed, cache, scoring)
+        return None, total_score / total_games, []
+
+    current_player = get_current_player(packed)
+    is_maximizing = current_player % 2 == 0
+
+    best_move: PackedMove = None
+    best_path: list[tuple[PlayerPosition, PackedMove]] = []
+    best_score = -math.inf if is_maximizing else math.inf
+
+    for packed_move in list_possible_moves(packed):
+        child = apply_move(packed, packed_move)
+        if best_path_flag:
+            _, score, path = min_max_alpha_beta(child, depth - 1, alpha, beta, cache, best_path_flag, variant)
+        else:
+            score = _alpha_beta(child, depth - 1, alpha, beta, cache, scoring)
+
+        if is_maximizing:
+            if score > best_score:
+                best_score = score
+                best_move = packed_move
+                if best_path_flag:
+                    best_path = [(current_player, packed_move)] + path
+            alpha = max(alpha, best_score)
+        else:
+            if score < best_score:
+                best_score = score
+                best_move = packed_move
+                if best_path_flag:
+                    best_path = [(current_player, packed_move)] + path
+            beta = min(beta, best_score)
+
+        if beta <= alpha:
+            break
+
+    return best_move, best_score, best_path
+
+
+def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict[PackedState, tuple[int, int]]|None = None, best_path_flag: bool = True, variant: str = 'international') -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    """
+    Drop-in replacement for get_best_move2.get_best_move_alpha_beta running on the bitboard representation.
+
+    :param state: The current GameState
+    :param depth: The depth to search in the game tree
+    :param cache: The cache dictionary to use for memoization, keyed on packed states
+    :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param variant: Scoring rules ('international' or 'venezuelan')
+    :return: A tuple of (best_move, best_score, optimal_path)
+    """
+    if cache is None:
+        cache = {}
+    packed_best_move, best_score, packed_path = min_max_alpha_beta(encode_state(state), depth, -math.inf, math.inf, cache, best_path_flag, variant)
+    best_path = [(player, move_to_domino_move(packed_move)) for player, packed_move in packed_path]
+    return move_to_domino_move(packed_best_move), float(best_score), best_path
+
+
+def main() -> None:
+    import get_best_move2
+
+    hands = [
+        [DominoTile(0, 0), DominoTile(0, 3), DominoTile(4, 6), DominoTile(0, 4), DominoTile(0, 5), DominoTile(0, 6)],
+        [DominoTile(0, 1), DominoTile(0, 2), DominoTile(1, 1), DominoTile(1, 5), DominoTile(1, 6), DominoTile(2, 2)],
+        [DominoTile(1, 3), DominoTile(1, 4), DominoTile(2, 3), DominoTile(3, 3), DominoTile(3, 4), DominoTile(3, 5)],
+        [DominoTile(2, 5), DominoTile(2, 6), DominoTile(3, 6), DominoTile(5, 5), DominoTile(5, 6), DominoTile(6, 6)]
+    ]
+    state = GameState(
+        player_hands=tuple(frozenset(hand) for hand in hands),
+        current_player=0,
+        left_end=1,
+        right_end=3,
+        consecutive_passes=0
+    )
+
+    for name, engine in (('frozenset', get_best_move2.get_best_move_alpha_beta), ('bitboard', get_best_move_alpha_beta)):
+        start = time.perf_counter()
+        best_move, best_score, _ = engine(state, 24, {}, best_path_flag=False)
+        elapsed = time.perf_counter() - start
+        print(f'{name:<10} best move: {best_move}, score: {best_score:.4f}, time: {elapsed:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
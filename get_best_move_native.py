@@ -0,0 +1,100 @@
+import argparse
+import math
+import time
+from domino_data_types import GameState, move, PlayerPosition
+from domino_bitboard import PackedState, encode_state, move_to_domino_move
+import get_best_move_bitboard
+import get_best_move2
+import get_best_move_venezuelan
+
+# The compiled kernel of game_state_cy.pyx, built with `python game_state_setup.py build_ext --inplace`.
+# Without it get_best_move_alpha_beta runs the frozenset solvers (get_best_move2, get_best_move_venezuelan)
+# and the functions on packed states raise ImportError.
+try:
+    import game_state_cy
+    NATIVE_AVAILABLE = hasattr(game_state_cy, 'min_max_alpha_beta')
+except ImportError:
+    game_state_cy = None
+    NATIVE_AVAILABLE = False
+
+def _kernel():
+    if not NATIVE_AVAILABLE:
+        raise ImportError("game_state_cy is not built, run `python game_state_setup.py build_ext --inplace`")
+    return game_state_cy
+
+def count_game_stats(packed: PackedState, cache: dict[PackedState, tuple[int, int]], variant: str = 'international') -> tuple[int, int]:
+    """
+    Count every possible outcome of the game from the given packed state with the compiled kernel.
+    The cache is keyed on packed states, and can be shared with get_best_move_bitboard.
+
+    :param packed: The packed state
+    :param cache: The cache dictionary to use for memoization, keyed on packed states
+    :param variant: Scoring rules ('international' or 'venezuelan')
+    :return: A tuple of (total_games, total_score)
+    """
+    return _kernel().count_game_stats(packed, cache, variant)
+
+def min_max_alpha_beta(packed: PackedState, depth: int, alpha: float, beta: float, cache: dict[PackedState, tuple[int, int]], best_path_flag: bool = True, variant: str = 'international') -> tuple[tuple[int, bool]|None, float, list[tuple[PlayerPosition, tuple[int, bool]|None]]]:
+    """
+    Min-max with alpha-beta pruning over packed states with the compiled kernel.
+    See get_best_move_bitboard.min_max_alpha_beta for the parameters.
+    """
+    return _kernel().min_max_alpha_beta(packed, depth, alpha, beta, cache, best_path_flag, variant)
+
+def get_best_move_alpha_beta(state: GameState, depth: int, cache: dict[PackedState, tuple[int, int]]|None = None, best_path_flag: bool = True, variant: str = 'international') -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    """
+    Drop-in replacement for get_best_move2.get_best_move_alpha_beta running on the compiled kernel.
+    If the kernel is not built, this is get_best_move2.get_best_move_alpha_beta (get_best_move_venezuelan
+    for the venezuelan variant) with the same arguments.
+
+    :param state: The current GameState
+    :param depth: The depth to search in the game tree
+    :param cache: The cache dictionary to use for memoization, keyed on packed states (on
+                  GameState.canonical_key without the kernel)
+    :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param variant: Scoring rules ('international' or 'venezuelan')
+    :return: A tuple of (best_move, best_score, optimal_path)
+    """
+    if cache is None:
+        cache = {}
+    if not NATIVE_AVAILABLE:
+        solver = get_best_move2 if variant == 'international' else get_best_move_venezuelan
+        return solver.get_best_move_alpha_beta(state, depth, cache, best_path_flag)
+    packed_best_move, best_score, packed_path = min_max_alpha_beta(encode_state(state), depth, -math.inf, math.inf, cache, best_path_flag, variant)
+    best_path = [(player, move_to_domino_move(packed_move)) for player, packed_move in packed_path]
+    return move_to_domino_move(packed_best_move), float(best_score), best_path
+
+
+def main() -> None:
+    from move_ordering import benchmark_positions
+
+    parser = argparse.ArgumentParser(description="Compare the compiled search kernel with the pure-Python engines")
+    parser.add_argument("--variant", choices=['international', 'venezuelan'], default='international')
+    parser.add_argument("--positions", nargs='+', help="Names of the positions to run (default all but initial_move)")
+    args = parser.parse_args()
+
+    solver = get_best_move2 if args.variant == 'international' else get_best_move_venezuelan
+    engines = [
+        ('frozenset', lambda state, depth: solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)),
+        ('bitboard', lambda state, depth: get_best_move_bitboard.get_best_move_alpha_beta(state, depth, {}, False, args.variant)),
+    ]
+    if NATIVE_AVAILABLE:
+        engines.append(('native', lambda state, depth: get_best_move_alpha_beta(state, depth, {}, False, args.variant)))
+    else:
+        print("game_state_cy is not built, run `python game_state_setup.py build_ext --inplace`")
+
+    print(f"{'position':<26}{'engine':<11}{'time (s)':>10}{'speedup':>9}  best move, score")
+    for name, state, depth in benchmark_positions():
+        if (name not in args.positions) if args.positions else name == 'initial_move':
+            continue
+        baseline = None
+        for engine_name, engine in engines:
+            start = time.perf_counter()
+            best_move, best_score, _ = engine(state, depth)
+            elapsed = time.perf_counter() - start
+            baseline = elapsed if baseline is None else baseline
+            print(f"{name:<26}{engine_name:<11}{elapsed:>10.3f}{baseline / max(elapsed, 1e-9):>8.1f}x  {best_move}, {best_score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
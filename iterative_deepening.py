@@ -0,0 +1,128 @@
+import math
+import time
+from typing import Callable
+from domino_data_types import GameState, PlayerPosition_SOUTH, PlayerPosition_NORTH, move
+from domino_utils import list_possible_moves
+from move_ordering import MoveOrdering
+from search_budget import SearchBudget, SearchTimeout
+from transposition_table import TranspositionTable
+from search_stats import SearchStats
+import get_best_move2
+
+def search_horizon(state: GameState) -> int:
+    # Longest possible rest of the game: every play followed by 3 passes, then 4 passes to block
+    return 4 * state.tiles_left() + 4
+
+def get_move_scores_iterative_deepening(
+    state: GameState,
+    max_depth: int,
+    cache: dict[int, tuple[int, int]]|TranspositionTable|None = None,
+    time_limit: float|None = None,
+    node_limit: int|None = None,
+    start_depth: int = 1,
+    depth_step: int = 1,
+    ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None,
+    ordering: MoveOrdering|None = None,
+    possible_moves: list[tuple[move, int|None, float|None]]|None = None,
+    min_max_alpha_beta: Callable = get_best_move2.min_max_alpha_beta,
+    stats: SearchStats|None = None,
+    evaluate: Callable[[GameState], float]|None = None,
+    fallback_evaluate: Callable[[GameState], float]|None = None
+) -> tuple[list[tuple[move, float]], int]:
+    """
+    Score every move of the current player with iterative deepening, within a time and/or node budget.
+
+    Each iteration searches the position after every move with a full window. The alpha-beta
+    transposition table and the killer/history tables are shared by all iterations, so each
+    iteration tries the best moves of the previous one first.
+
+    Note that the leaves of the search are evaluated by counting every continuation, so shallow
+    iterations are the expensive ones. Their counts are cached and reused by the deeper
+    iterations, which then run quickly; start_depth should be chosen with this in mind.
+    With a static evaluation (evaluate) the leaves are cheap and the usual shallow-to-deep order applies.
+
+    :param state: The current GameState
+    :param max_depth: Depth of the last iteration, counted from the current state. Iterations stop
+                      at the end of the game, where deeper searches cannot change the result.
+    :param cache: The cache for count_game_stats, shared by all iterations
+    :param time_limit: Wall-clock budget in seconds, None for no limit
+    :param node_limit: Node budget (alpha-beta and counted nodes), None for no limit
+    :param start_depth: Depth of the first iteration
+    :param depth_step: Depth increment between iterations
+    :param ab_cache: The alpha-beta transposition table, a new one is used if None
+    :param ordering: The move ordering, a new MoveOrdering() is used if None
+    :param possible_moves: The moves to score, all legal moves if None (as returned by list_possible_moves)
+    :param min_max_alpha_beta: The search function (get_best_move2 or get_best_move_venezuelan)
+    :param stats: Optional search_stats.SearchStats, updated with the counters of all iterations (one search)
+    :param evaluate: Optional static evaluation of the positions at the depth limit (see static_evaluation)
+    :param fallback_evaluate: Static evaluation that scores the moves (outside of the budget) when no iteration
+                              completes within the budget, so that the position is not left without scores
+    :return: A tuple of (move_scores, depth) for the deepest completed iteration, (fallback scores, 1) if
+             none completed within the budget, or ([], 0) without fallback_evaluate
+    """
+    cache = {} if cache is None else cache
+    ab_cache = {} if ab_cache is None else ab_cache
+    ordering = MoveOrdering() if ordering is None else ordering
+    possible_moves = list_possible_moves(state) if possible_moves is None else possible_moves
+    budget = SearchBudget(time_limit, node_limit)
+    start = time.perf_counter()
+
+    max_depth = min(max_depth, search_horizon(state))
+    depth = max(1, min(start_depth, max_depth))
+
+    move_scores: list[tuple[move, float]] = []
+    completed_depth = 0
+    try:
+        while True:
+            iteration_scores: list[tuple[move, float]] = []
+            for tile_and_loc_info, _, _ in possible_moves:
+                if tile_and_loc_info is None:
+                    new_state = state.pass_turn()
+                else:
+                    new_state = state.play_hand(*tile_and_loc_info)
+                _, score, _ = min_max_alpha_beta(new_state, depth - 1, -math.inf, math.inf, cache, False, ab_cache, ordering, 1, budget, stats=stats, evaluate=evaluate)
+                iteration_scores.append((tile_and_loc_info, score))
+            move_scores, completed_depth = iteration_scores, depth
+            if depth >= max_depth:
+                break
+            depth = min(depth + depth_step, max_depth)
+    except SearchTimeout:
+        pass
+
+    if completed_depth == 0:
+        if fallback_evaluate is not None:
+            # One ply with static leaves: the positions that are over still get their exact score
+            for tile_and_loc_info, _, _ in possible_moves:
+                new_state = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+                _, score, _ = min_max_alpha_beta(new_state, 0, -math.inf, math.inf, cache, False, ab_cache, ordering, 1, None, evaluate=fallback_evaluate)
+                move_scores.append((tile_and_loc_info, score))
+            completed_depth = 1
+            if stats is not None:
+                stats.budget_fallbacks += 1
+        elif stats is not None:
+            stats.budget_drops += 1
+
+    if stats is not None:
+        stats.searches += 1
+        stats.elapsed += time.perf_counter() - start
+    return move_scores, completed_depth
+
+def get_best_move_iterative_deepening(state: GameState, max_depth: int, cache: dict[int, tuple[int, int]]|TranspositionTable|None = None,
+                                      time_limit: float|None = None, node_limit: int|None = None, **kwargs) -> tuple[move, float|None, int]:
+    """
+    Get the best move for the current player with iterative deepening within a budget.
+    See get_move_scores_iterative_deepening for the parameters.
+
+    :return: A tuple of (best_move, best_score, depth) for the deepest completed iteration,
+             or (None, None, 0) if no iteration completed within the budget
+    """
+    move_scores, depth = get_move_scores_iterative_deepening(state, max_depth, cache, time_limit, node_limit, **kwargs)
+    if not move_scores:
+        return None, None, 0
+
+    is_maximizing = state.current_player in (PlayerPosition_NORTH, PlayerPosition_SOUTH)
+    if is_maximizing:
+        best_move, best_score = max(move_scores, key=lambda move_score: move_score[1])
+    else:
+        best_move, best_score = min(move_scores, key=lambda move_score: move_score[1])
+    return best_move, best_score, depth
@@ -0,0 +1,180 @@
+import argparse
+import time
+from dataclasses import dataclass, field
+from domino_data_types import DominoTile, GameState, PlayerPosition, PlayerPosition_SOUTH, move
+
+type ScoredMove = tuple[move, int|None, float|None]
+
+@dataclass
+class MoveOrdering:
+    """
+    Move ordering for min_max_alpha_beta. Every heuristic can be switched on or off, with
+    all of them off the moves keep the order of list_possible_moves. Heuristics are applied
+    by priority: TT move, killer moves, history score, doubles, pip count.
+
+    Killer and history tables are kept across searches, so the same instance can be reused
+    to warm up later searches (call clear() to start from scratch).
+    """
+    tt_move: bool = True
+    killers: bool = True
+    history: bool = True
+    doubles_first: bool = False
+    high_pips_first: bool = False
+    num_killers: int = 2
+    # killer_moves[ply]: the last moves that caused a cutoff at that ply, newest first
+    killer_moves: dict[int, list[move]] = field(default_factory=dict)
+    # history_scores[(player, move)]: sum of depth * depth over the cutoffs caused by the move
+    history_scores: dict[tuple[PlayerPosition, move], int] = field(default_factory=dict)
+    # Alpha-beta nodes visited by the searches using this ordering
+    nodes: int = 0
+
+    def is_active(self) -> bool:
+        return self.tt_move or self.killers or self.history or self.doubles_first or self.high_pips_first
+
+    def order_moves(self, possible_moves: list[ScoredMove], ply: int, player: PlayerPosition, tt_move: move = None) -> list[ScoredMove]:
+        """
+        Sort the moves of a node, most promising first.
+
+        :param possible_moves: The moves as returned by list_possible_moves
+        :param ply: Distance of the node from the root of the search
+        :param player: The player to move
+        :param tt_move: Best move stored in the transposition table for this node, if any
+        :return: The sorted moves
+        """
+        if len(possible_moves) < 2 or not self.is_active():
+            return possible_moves
+
+        killer_moves = self.killer_moves.get(ply, []) if self.killers else []
+        history_scores = self.history_scores if self.history else {}
+        use_tt_move = self.tt_move and tt_move is not None
+        doubles_first = self.doubles_first
+        high_pips_first = self.high_pips_first
+
+        def priority(possible_move: ScoredMove) -> tuple[bool, int, int, bool, int]:
+            tile_and_loc_info = possible_move[0]
+            if tile_and_loc_info is None:
+                return (False, 0, 0, False, 0)
+            tile: DominoTile = tile_and_loc_info[0]
+            return (
+                use_tt_move and tile_and_loc_info == tt_move,
+                len(killer_moves) - killer_moves.index(tile_and_loc_info) if tile_and_loc_info in killer_moves else 0,
+                history_scores.get((player, tile_and_loc_info), 0),
+                doubles_first and tile.top == tile.bottom,
+                tile.top + tile.bottom if high_pips_first else 0,
+            )
+
+        # sorted is stable, so ties keep the order of list_possible_moves
+        return sorted(possible_moves, key=priority, reverse=True)
+
+    def record_cutoff(self, tile_and_loc_info: move, ply: int, depth: int, player: PlayerPosition) -> None:
+        """
+        Update killer and history tables with a move that caused a cutoff.
+
+        :param tile_and_loc_info: The move
+        :param ply: Distance of the node from the root of the search
+        :param depth: Remaining depth at the node
+        :param player: The player who made the move
+        """
+        if tile_and_loc_info is None:
+            return
+        if self.killers:
+            killer_moves = self.killer_moves.setdefault(ply, [])
+            if tile_and_loc_info in killer_moves:
+                killer_moves.remove(tile_and_loc_info)
+            killer_moves.insert(0, tile_and_loc_info)
+            del killer_moves[self.num_killers:]
+        if self.history:
+            key = (player, tile_and_loc_info)
+            self.history_scores[key] = self.history_scores.get(key, 0) + depth * depth
+
+    def clear(self) -> None:
+        self.killer_moves.clear()
+        self.history_scores.clear()
+        self.nodes = 0
+
+
+ORDERINGS: dict[str, MoveOrdering] = {
+    'none': MoveOrdering(tt_move=False, killers=False, history=False),
+    'tt': MoveOrdering(tt_move=True, killers=False, history=False),
+    'killers': MoveOrdering(tt_move=False, killers=True, history=False),
+    'history': MoveOrdering(tt_move=False, killers=False, history=True),
+    'doubles': MoveOrdering(tt_move=False, killers=False, history=False, doubles_first=True),
+    'pips': MoveOrdering(tt_move=False, killers=False, history=False, high_pips_first=True),
+    'all': MoveOrdering(doubles_first=True, high_pips_first=True),
+}
+
+
+def benchmark_positions() -> list[tuple[str, GameState, int]]:
+    # Positions of get-best-move-alpha-beta-tests.py (the non trivial ones)
+    initial_move_hands = [
+        [DominoTile(0, 0), DominoTile(0, 1), DominoTile(0, 2), DominoTile(0, 3),
+         DominoTile(0, 4), DominoTile(0, 5), DominoTile(0, 6)],
+        [DominoTile(1, 1), DominoTile(1, 2), DominoTile(1, 3), DominoTile(1, 4),
+         DominoTile(1, 5), DominoTile(1, 6), DominoTile(2, 2)],
+        [DominoTile(2, 3), DominoTile(2, 4), DominoTile(2, 5), DominoTile(2, 6),
+         DominoTile(3, 3), DominoTile(3, 4), DominoTile(3, 5)],
+        [DominoTile(3, 6), DominoTile(4, 4), DominoTile(4, 5), DominoTile(4, 6),
+         DominoTile(5, 5), DominoTile(5, 6), DominoTile(6, 6)]
+    ]
+    single_result_hands = [
+        [DominoTile(0, 0), DominoTile(0, 3), DominoTile(4, 6),
+         DominoTile(0, 4), DominoTile(0, 5), DominoTile(0, 6)],
+        [DominoTile(0, 1), DominoTile(0, 2), DominoTile(1, 1),
+         DominoTile(1, 5), DominoTile(1, 6), DominoTile(2, 2)],
+        [DominoTile(1, 3), DominoTile(1, 4), DominoTile(2, 3),
+         DominoTile(3, 3), DominoTile(3, 4), DominoTile(3, 5)],
+        [DominoTile(2, 5), DominoTile(2, 6), DominoTile(3, 6),
+         DominoTile(5, 5), DominoTile(5, 6), DominoTile(6, 6)]
+    ]
+    multiple_moves_hands = [
+        [DominoTile(1, 2), DominoTile(3, 4)],
+        [DominoTile(5, 5)],
+        [DominoTile(6, 6)],
+        [DominoTile(0, 0)]
+    ]
+    return [
+        ('initial_move', GameState.new_game(initial_move_hands), 24),
+        ('single_result', GameState(
+            player_hands=tuple(frozenset(hand) for hand in single_result_hands),
+            current_player=PlayerPosition_SOUTH,
+            left_end=1,
+            right_end=3,
+            consecutive_passes=0
+        ), 24),
+        ('multiple_moves_available', GameState(
+            player_hands=tuple(frozenset(hand) for hand in multiple_moves_hands),
+            current_player=PlayerPosition_SOUTH,
+            left_end=1,
+            right_end=4,
+            consecutive_passes=0
+        ), 3),
+    ]
+
+
+def main() -> None:
+    from get_best_move2 import get_best_move_alpha_beta
+
+    parser = argparse.ArgumentParser(description="Compare alpha-beta node counts across move orderings and search algorithms")
+    parser.add_argument("--orderings", nargs='+', default=list(ORDERINGS), choices=list(ORDERINGS))
+    parser.add_argument("--algorithms", nargs='+', default=['alpha_beta'], choices=['alpha_beta', 'pvs', 'mtdf'])
+    parser.add_argument("--positions", nargs='+', help="Names of the positions to run (default all)")
+    parser.add_argument("--no-ab-cache", action="store_true", help="Search without the alpha-beta transposition table")
+    args = parser.parse_args()
+
+    print(f"{'position':<26}{'algorithm':<12}{'ordering':<10}{'nodes':>10}{'time (s)':>10}  best move, score")
+    for name, state, depth in benchmark_positions():
+        if args.positions and name not in args.positions:
+            continue
+        for algorithm in args.algorithms:
+            for ordering_name in args.orderings:
+                ordering = ORDERINGS[ordering_name]
+                ordering.clear()
+                start = time.perf_counter()
+                best_move, score, _ = get_best_move_alpha_beta(state, depth, {}, best_path_flag=False,
+                                                                ab_cache=None if args.no_ab_cache else {}, ordering=ordering, algorithm=algorithm)
+                elapsed = time.perf_counter() - start
+                print(f"{name:<26}{algorithm:<12}{ordering_name:<10}{ordering.nodes:>10}{elapsed:>10.3f}  {best_move}, {score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
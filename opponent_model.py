@@ -0,0 +1,131 @@
+import math
+from dataclasses import dataclass
+from typing import Protocol
+from domino_data_types import DominoTile, PlayerPosition, PlayerPosition_SOUTH, next_player, move
+from domino_utils import list_possible_moves_from_hand
+
+
+class OpponentModel(Protocol):
+    def move_probability(self, hand: frozenset[DominoTile], board_ends: tuple[int, int], played: move, legal_moves: list[move]) -> float:
+        """
+        Probability that a player holding hand plays played among legal_moves.
+
+        :param hand: The hand of the player before the move
+        :param board_ends: The ends of the board before the move
+        :param played: The move, one of legal_moves
+        :param legal_moves: The moves of the hand, as list_possible_moves_from_hand
+        """
+        ...
+
+@dataclass(frozen=True)
+class UniformOpponentModel:
+    """Every legal move is equally likely: a deal weighs less the more choices its hands had."""
+
+    def move_probability(self, hand: frozenset[DominoTile], board_ends: tuple[int, int], played: move, legal_moves: list[move]) -> float:
+        return 1 / len(legal_moves)
+
+@dataclass(frozen=True)
+class HeavyTileOpponentModel:
+    """
+    Players get rid of their heavy tiles first, as they count against them when the game is blocked: each
+    legal move is played with a probability proportional to exp(pips / temperature).
+    """
+    temperature: float = 4.0
+
+    def move_probability(self, hand: frozenset[DominoTile], board_ends: tuple[int, int], played: move, legal_moves: list[move]) -> float:
+        assert played is not None
+        total = sum(math.exp(tile.get_pip_sum() / self.temperature) for tile, _ in legal_moves)  # type: ignore[misc]
+        return math.exp(played[0].get_pip_sum() / self.temperature) / total
+
+DEFAULT_OPPONENT_MODEL = HeavyTileOpponentModel()
+
+@dataclass
+class DealLikelihood:
+    """
+    Likelihood of a deal of the hidden hands given the tiles played so far, under an opponent model.
+
+    The samplers draw deals uniformly among those consistent with the passes, so the likelihood of a deal is
+    its importance weight: the weighted mean over the samples estimates the mean over the deals given how the
+    other players played. Passes are forced in every sampled deal and do not change the weights, and neither
+    does the first tile of a round, which can be imposed by the rules.
+    """
+    model: OpponentModel
+    # Plays of the hidden players on a board with tiles: player, board ends, move played, and the tiles the
+    # player played from that move on (the hand of the player then is its current hand and those tiles)
+    turns: list[tuple[PlayerPosition, tuple[int, int], move, frozenset[DominoTile]]]
+
+    @classmethod
+    def from_history(cls, moves: list[move], starting_player: PlayerPosition, model: OpponentModel) -> 'DealLikelihood':
+        """
+        :param moves: The moves of the round, as history_to_domino_tiles_history
+        :param starting_player: The player of the first move, South being the player of the samples
+        :param model: The policy of the hidden players
+        """
+        plays: list[tuple[PlayerPosition, tuple[int|None, int|None], tuple[DominoTile, bool]]] = []
+        board_ends: tuple[int|None, int|None] = (None, None)
+        player = starting_player
+        for played in moves:
+            if played is not None:
+                plays.append((player, board_ends, played))
+                # As domino_game_state_our_perspective
+                tile, left = played
+                if board_ends[0] is None:
+                    board_ends = (tile.top, tile.bottom)
+                elif left:
+                    board_ends = (tile.get_other_end(board_ends[0]), board_ends[1])
+                else:
+                    assert board_ends[1] is not None
+                    board_ends = (board_ends[0], tile.get_other_end(board_ends[1]))
+            player = next_player(player)
+
+        turns: list[tuple[PlayerPosition, tuple[int, int], move, frozenset[DominoTile]]] = []
+        later_tiles: dict[PlayerPosition, frozenset[DominoTile]] = {player: frozenset() for player in range(4)}
+        for player, ends, played in reversed(plays):
+            later_tiles[player] = later_tiles[player] | {played[0]}
+            if player != PlayerPosition_SOUTH and ends[0] is not None and ends[1] is not None:
+                turns.append((player, (ends[0], ends[1]), played, later_tiles[player]))
+        turns.reverse()
+        return cls(model, turns)
+
+    def log_weight(self, player_hands: tuple[frozenset[DominoTile], ...]) -> float:
+        """
+        :param player_hands: The hands of a deal by player position, as GameState.player_hands
+        :return: The log of the probability of the plays of the hidden players with the hands of the deal
+        """
+        log_weight = 0.0
+        for player, board_ends, played, later_tiles in self.turns:
+            hand = player_hands[player] | later_tiles
+            legal_moves = [possible_move for possible_move, _, _ in list_possible_moves_from_hand(set(hand), board_ends)]
+            if played not in legal_moves:
+                # Played on the right of a board with the same suit at both ends
+                assert played is not None
+                played = (played[0], True)
+            log_weight += math.log(self.model.move_probability(hand, board_ends, played, legal_moves))
+        return log_weight
+
+    def weight(self, player_hands: tuple[frozenset[DominoTile], ...]) -> float:
+        return math.exp(self.log_weight(player_hands))
+
+def weighted_mean_std(scores: list[float], weights: list[float]) -> tuple[float, float, float]:
+    """
+    Mean and standard deviation of weighted samples, with the effective sample size (sum w) ** 2 / sum w ** 2
+    that takes the place of the number of samples in confidence intervals. With equal weights these are the
+    mean, the sample standard deviation and the number of samples.
+
+    :return: (mean, standard deviation, effective sample size)
+    """
+    total_weight = sum(weights)
+    mean_score = sum(weight * score for score, weight in zip(scores, weights)) / total_weight
+    effective_size = total_weight ** 2 / sum(weight ** 2 for weight in weights)
+    if min(scores) == max(scores):
+        # Exactly, the weighted mean of equal scores can be off in the last bit and leave a tiny deviation
+        return scores[0], 0.0, effective_size
+    if effective_size <= 1:
+        return mean_score, 0.0, effective_size
+    variance = sum(weight * (score - mean_score) ** 2 for score, weight in zip(scores, weights)) / total_weight
+    return mean_score, math.sqrt(variance * effective_size / (effective_size - 1)), effective_size
+
+def normalized_weights(log_weights: list[float]) -> list[float]:
+    # Relative to the largest weight, so that the weights of long histories do not underflow
+    max_log_weight = max(log_weights)
+    return [math.exp(log_weight - max_log_weight) for log_weight in log_weights]
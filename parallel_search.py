@@ -0,0 +1,254 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from domino_data_types import GameState, move, PlayerPosition, PlayerPosition_SOUTH, PlayerPosition_NORTH
+from domino_utils import list_possible_moves
+from solve_many import get_solver
+from search_budget import SearchBudget
+
+# Per-process state of the workers, set by _init_worker. The count cache and the transposition
+# table live as long as the pool, so the tasks run by the same worker share them.
+_worker_bound = None
+_worker_variant = 'international'
+_worker_cache: dict[int, tuple[int, int]] = {}
+_worker_ab_cache: dict[int, tuple[int, int, float, move]] = {}
+
+def _init_worker(bound, variant: str) -> None:
+    global _worker_bound, _worker_variant, _worker_cache, _worker_ab_cache
+    _worker_bound = bound
+    _worker_variant = variant
+    _worker_cache = {}
+    _worker_ab_cache = {}
+
+def _search_task(state: GameState, depth: int, maximizing_root: bool, best_path_flag: bool) -> tuple[float, float, list[tuple[PlayerPosition, move]], int, float]:
+    """
+    Search a node below the root with the window of the current root bound.
+
+    :return: A tuple of (score, bound used, path, nodes, cpu seconds)
+    """
+    start = time.process_time()
+    # The bound is read when the task starts, so it includes every root move completed so far
+    bound = _worker_bound.value
+    alpha, beta = (bound, math.inf) if maximizing_root else (-math.inf, bound)
+    budget = SearchBudget()
+    _, score, path = get_solver(_worker_variant).min_max_alpha_beta(state, depth, alpha, beta, _worker_cache, best_path_flag, _worker_ab_cache, budget=budget)
+    return score, bound, path, budget.nodes, time.process_time() - start
+
+@dataclass
+class ParallelSearchStats:
+    """Work done by a parallel search, to compare with the serial search."""
+    tasks: int = 0
+    nodes: int = 0
+    cpu_time: float = 0.0
+
+def _child_state(state: GameState, tile_and_loc_info: move) -> GameState:
+    return state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+
+def get_best_move_alpha_beta_parallel(
+    state: GameState,
+    depth: int,
+    num_workers: int|None = None,
+    best_path_flag: bool = True,
+    split_ply: int = 1,
+    variant: str = 'international',
+    stats: ParallelSearchStats|None = None
+) -> tuple[move, float, list[tuple[PlayerPosition, move]]]:
+    """
+    Alpha-beta search of a single position on several processes, splitting the tree at the root
+    (split_ply=1) or at the children of the root (split_ply=2), with the Young Brothers Wait rule:
+    the first move of a split node is searched before its younger brothers, which then run in
+    parallel with the bound it established.
+
+    The root bound (the best score of the completed root moves) is shared by the workers, and each
+    task searches with the window of the bound at the time it starts: a root move that cannot beat
+    the bound fails low quickly. A running task does not see the bounds found after it started.
+    Every worker has its own count cache and transposition table, shared by the tasks it runs.
+
+    The best score is the one of the serial search. If several moves reach it, the best move is the
+    first of them in move order that was searched with a window proving its score exact.
+
+    :param state: The current GameState
+    :param depth: The depth to search in the game tree
+    :param num_workers: Number of worker processes, os.cpu_count() if None
+    :param best_path_flag: Flag to indicate if best_path is needed or not
+    :param split_ply: 1 to search each root move in a task, 2 to split the children of the root moves as well
+    :param variant: Scoring rules ('international' or 'venezuelan')
+    :param stats: Optional ParallelSearchStats, updated with the work of the workers and of the eldest brother
+    :return: A tuple of (best_move, best_score, optimal_path)
+    """
+    if split_ply not in (1, 2):
+        raise ValueError(f"split_ply must be 1 or 2, not {split_ply}")
+    solver = get_solver(variant)
+    possible_moves = list_possible_moves(state)
+    if depth <= split_ply or state.is_game_over() or len(possible_moves) < 2:
+        # Nothing to split
+        start = time.process_time()
+        budget = SearchBudget()
+        result = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag, ab_cache={}, budget=budget)
+        if stats is not None:
+            stats.tasks += 1
+            stats.nodes += budget.nodes
+            stats.cpu_time += time.process_time() - start
+        return result
+
+    current_player = state.current_player
+    maximizing_root = current_player in (PlayerPosition_NORTH, PlayerPosition_SOUTH)
+    sign = 1 if maximizing_root else -1
+
+    # Eldest brother: the first root move is searched here with the full window
+    start = time.process_time()
+    budget = SearchBudget()
+    first_move = possible_moves[0][0]
+    _, first_score, first_path = solver.min_max_alpha_beta(_child_state(state, first_move), depth - 1, -math.inf, math.inf, {}, best_path_flag, {}, budget=budget)
+    if stats is not None:
+        stats.tasks += 1
+        stats.nodes += budget.nodes
+        stats.cpu_time += time.process_time() - start
+
+    # (index, score, exact, path) of the completed root moves
+    results: list[tuple[int, float, bool, list[tuple[PlayerPosition, move]]]] = [(0, first_score, True, first_path)]
+    bound = multiprocessing.Value('d', first_score)
+
+    def record(future: Future) -> tuple[float, float, list[tuple[PlayerPosition, move]]]:
+        score, task_bound, path, nodes, cpu_time = future.result()
+        if stats is not None:
+            stats.tasks += 1
+            stats.nodes += nodes
+            stats.cpu_time += cpu_time
+        return score, task_bound, path
+
+    def complete(index: int, score: float, exact: bool, path: list[tuple[PlayerPosition, move]]) -> None:
+        results.append((index, score, exact, path))
+        if exact and sign * score > sign * bound.value:
+            with bound.get_lock():
+                bound.value = score
+
+    with ProcessPoolExecutor(num_workers, initializer=_init_worker, initargs=(bound, variant)) as executor:
+        if split_ply == 1:
+            futures = {
+                executor.submit(_search_task, _child_state(state, tile_and_loc_info), depth - 1, maximizing_root, best_path_flag): index
+                for index, (tile_and_loc_info, _, _) in enumerate(possible_moves) if index > 0
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures.pop(future)
+                    score, task_bound, path = record(future)
+                    # A score that does not beat the bound of its window is only an upper bound (lower for the minimizer)
+                    complete(index, score, sign * score > sign * task_bound, path)
+        else:
+            # Each root move is a split node of the opponent: its value is the opposite extreme of its
+            # children, and it is refuted as soon as one child does not beat the root bound
+            children: dict[int, tuple[GameState, list[tuple[move, int|None, float|None]]]] = {}
+            # Best child score (for the opponent) and path found so far for each root move
+            partial: dict[int, tuple[float, list[tuple[PlayerPosition, move]]]] = {}
+            pending: dict[int, int] = {}
+            futures: dict[Future, tuple[int, int]] = {}
+            for index, (tile_and_loc_info, _, _) in enumerate(possible_moves):
+                if index == 0:
+                    continue
+                child = _child_state(state, tile_and_loc_info)
+                child_moves = list_possible_moves(child)
+                if child.is_game_over() or not child_moves:
+                    # Nothing to split, the root move is searched as a whole
+                    futures[executor.submit(_search_task, child, depth - 1, maximizing_root, best_path_flag)] = (index, -1)
+                    pending[index] = 1
+                    continue
+                children[index] = (child, child_moves)
+                partial[index] = (sign * math.inf, [])
+                # Young Brothers Wait: only the eldest child first
+                futures[executor.submit(_search_task, _child_state(child, child_moves[0][0]), depth - 2, maximizing_root, best_path_flag)] = (index, 0)
+                pending[index] = 1
+
+            refuted: set[int] = set()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, child_index = futures.pop(future)
+                    score, task_bound, path = record(future)
+                    pending[index] -= 1
+                    if child_index == -1:
+                        complete(index, score, sign * score > sign * task_bound, path)
+                        continue
+                    if index in refuted:
+                        continue
+                    child, child_moves = children[index]
+                    if sign * score < sign * partial[index][0]:
+                        partial[index] = (score, [(child.current_player, child_moves[child_index][0])] + path if best_path_flag else [])
+                    best_child_score, best_child_path = partial[index]
+                    if sign * best_child_score <= sign * bound.value:
+                        # Refuted: the opponent can hold this root move to the bound, its other children are not needed
+                        refuted.add(index)
+                        for other, (other_index, _) in list(futures.items()):
+                            if other_index == index and other.cancel():
+                                del futures[other]
+                                pending[index] -= 1
+                        complete(index, best_child_score, False, [])
+                        continue
+                    if child_index == 0:
+                        # The eldest child did not refute the root move, release its younger brothers
+                        for younger_index in range(1, len(child_moves)):
+                            grandchild = _child_state(child, child_moves[younger_index][0])
+                            futures[executor.submit(_search_task, grandchild, depth - 2, maximizing_root, best_path_flag)] = (index, younger_index)
+                            pending[index] += 1
+                    if pending[index] == 0:
+                        # Every child beat the bound of its window, so every child score is exact
+                        complete(index, best_child_score, True, best_child_path)
+
+    best_index, best_score, _, best_path = min(results, key=lambda result: (-sign * result[1], not result[2], result[0]))
+    best_move = possible_moves[best_index][0]
+    if best_path_flag:
+        best_path = [(current_player, best_move)] + best_path
+    else:
+        best_path = []
+    return best_move, best_score, best_path
+
+
+def main() -> None:
+    from move_ordering import benchmark_positions
+    from domino_tablebase import random_endgame
+    import random
+
+    parser = argparse.ArgumentParser(description="Speedup of the parallel alpha-beta search for 1..N worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Largest number of workers (default: number of cores)")
+    parser.add_argument("--split-ply", type=int, choices=[1, 2], default=1)
+    parser.add_argument("--variant", choices=['international', 'venezuelan'], default='international')
+    parser.add_argument("--endgames", type=int, default=3, help="Number of random endgames solved exactly, besides the test positions")
+    parser.add_argument("--tiles-left", type=int, default=26, help="Tiles left in the hands of the random endgames")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    solver = get_solver(args.variant)
+    rng = random.Random(args.seed)
+    # Positions with a single move are not split
+    positions = [(name, state, depth) for name, state, depth in benchmark_positions()
+                 if name != 'initial_move' and len(list_possible_moves(state)) > 1]
+    for i in range(args.endgames):
+        state = random_endgame(rng, args.tiles_left)
+        while len(list_possible_moves(state)) < 3:
+            state = random_endgame(rng, args.tiles_left)
+        positions.append((f'endgame_{i}', state, 2 * (28 + 4)))
+
+    print(f"{os.cpu_count()} cores")
+    print(f"{'position':<26}{'workers':>8}{'time (s)':>10}{'speedup':>9}{'nodes':>10}{'cpu (s)':>9}  best move, score")
+    for name, state, depth in positions:
+        start = time.perf_counter()
+        budget = SearchBudget()
+        best_move, best_score, _ = solver.get_best_move_alpha_beta(state, depth, {}, False, ab_cache={}, budget=budget)
+        serial = time.perf_counter() - start
+        print(f"{name:<26}{'serial':>8}{serial:>10.3f}{1.0:>8.1f}x{budget.nodes:>10}{serial:>9.3f}  {best_move}, {best_score:.4f}")
+        for num_workers in range(1, args.workers + 1):
+            stats = ParallelSearchStats()
+            start = time.perf_counter()
+            best_move, score, _ = get_best_move_alpha_beta_parallel(state, depth, num_workers, False, args.split_ply, args.variant, stats)
+            elapsed = time.perf_counter() - start
+            assert score == best_score, (name, num_workers, score, best_score)
+            print(f"{name:<26}{num_workers:>8}{elapsed:>10.3f}{serial / elapsed:>8.1f}x{stats.nodes:>10}{stats.cpu_time:>9.3f}  {best_move}, {score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import time
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its SearchBudget is exhausted."""
+    pass
+
+class SearchBudget:
+    """
+    Wall-clock and/or node budget shared by the nodes of a search. Every visited node calls
+    tick(), which raises SearchTimeout once the budget is exhausted. The clock is only read
+    every `check_interval` nodes to keep tick() cheap.
+    """
+
+    def __init__(self, time_limit: float|None = None, node_limit: int|None = None, check_interval: int = 256):
+        """
+        :param time_limit: Seconds available from now, None for no time limit
+        :param node_limit: Maximum number of nodes, None for no node limit
+        :param check_interval: Number of nodes between two reads of the clock
+        """
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.check_interval = check_interval
+        self.nodes = 0
+
+    def tick(self) -> None:
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout()
+        if self.deadline is not None and self.nodes % self.check_interval == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def exhausted(self) -> bool:
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
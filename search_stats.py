@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+
+@dataclass
+class SearchStats:
+    """
+    Counters of a search, filled by the solvers when one is passed as their `stats` argument
+    (see get_best_move2.min_max_alpha_beta and count_game_stats). Searches run without one only
+    pay an `is not None` test per node.
+
+    Alpha-beta nodes are counted per ply from the root of the search, and split into interior
+    nodes, terminal nodes (game over) and horizon nodes (depth limit reached, evaluated by
+    counting every continuation). Nodes visited by those counts are in counted_nodes.
+    """
+    nodes_per_ply: list[int] = field(default_factory=list)
+    terminal_nodes: int = 0
+    horizon_nodes: int = 0
+    counted_nodes: int = 0
+    # Cutoffs at maximizing nodes (beta) and minimizing nodes (alpha), and those caused by the first move searched
+    beta_cutoffs: int = 0
+    alpha_cutoffs: int = 0
+    first_move_cutoffs: int = 0
+    # Alpha-beta transposition table: a hit is an entry of the same depth, whose bound may still not end the search
+    tt_hits: int = 0
+    tt_misses: int = 0
+    tt_stores: int = 0
+    tt_peak_size: int = 0
+    # count_game_stats cache
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_stores: int = 0
+    cache_peak_size: int = 0
+    elapsed: float = 0.0
+    searches: int = 0
+    # Iterative deepening searches that completed no iteration within their budget, scored by the
+    # fallback evaluation, or left without scores when there was none
+    budget_fallbacks: int = 0
+    budget_drops: int = 0
+
+    def enter(self, ply: int) -> None:
+        nodes_per_ply = self.nodes_per_ply
+        while len(nodes_per_ply) <= ply:
+            nodes_per_ply.append(0)
+        nodes_per_ply[ply] += 1
+
+    def cutoff(self, index: int, is_maximizing: bool) -> None:
+        """
+        :param index: Index in the move order of the move that caused the cutoff
+        :param is_maximizing: True for a beta cutoff at a maximizing node
+        """
+        if is_maximizing:
+            self.beta_cutoffs += 1
+        else:
+            self.alpha_cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.nodes_per_ply)
+
+    @property
+    def cutoffs(self) -> int:
+        return self.beta_cutoffs + self.alpha_cutoffs
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        lookups = self.tt_hits + self.tt_misses
+        return self.tt_hits / lookups if lookups else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def merge(self, other: 'SearchStats') -> 'SearchStats':
+        """
+        Add the counters of another search (e.g. one run by a worker process) to these ones.
+        Peak table sizes are the largest of the two, as the searches had their own tables.
+        """
+        for ply, nodes in enumerate(other.nodes_per_ply):
+            if ply < len(self.nodes_per_ply):
+                self.nodes_per_ply[ply] += nodes
+            else:
+                self.nodes_per_ply.append(nodes)
+        self.terminal_nodes += other.terminal_nodes
+        self.horizon_nodes += other.horizon_nodes
+        self.counted_nodes += other.counted_nodes
+        self.beta_cutoffs += other.beta_cutoffs
+        self.alpha_cutoffs += other.alpha_cutoffs
+        self.first_move_cutoffs += other.first_move_cutoffs
+        self.tt_hits += other.tt_hits
+        self.tt_misses += other.tt_misses
+        self.tt_stores += other.tt_stores
+        self.tt_peak_size = max(self.tt_peak_size, other.tt_peak_size)
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.cache_stores += other.cache_stores
+        self.cache_peak_size = max(self.cache_peak_size, other.cache_peak_size)
+        self.elapsed += other.elapsed
+        self.searches += other.searches
+        self.budget_fallbacks += other.budget_fallbacks
+        self.budget_drops += other.budget_drops
+        return self
+
+    def report(self) -> str:
+        return '\n'.join([
+            f"Searches: {self.searches}, elapsed: {self.elapsed:.3f}s, out of budget: {self.budget_fallbacks} fallbacks, {self.budget_drops} dropped",
+            f"Nodes: {self.nodes} (terminal {self.terminal_nodes}, horizon {self.horizon_nodes}), counted: {self.counted_nodes}",
+            f"Nodes per ply: {self.nodes_per_ply}",
+            f"Cutoffs: {self.cutoffs} (beta {self.beta_cutoffs}, alpha {self.alpha_cutoffs}), first move: {self.first_move_cutoff_rate:.1%}",
+            f"Transposition table: {self.tt_hits} hits, {self.tt_misses} misses ({self.tt_hit_rate:.1%}), {self.tt_stores} stores, peak size {self.tt_peak_size}",
+            f"Count cache: {self.cache_hits} hits, {self.cache_misses} misses ({self.cache_hit_rate:.1%}), {self.cache_stores} stores, peak size {self.cache_peak_size}",
+        ])
@@ -0,0 +1,140 @@
+import argparse
+import random
+import time
+from types import ModuleType
+from typing import Callable
+from domino_data_types import GameState, DominoTile, PlayerPosition_SOUTH, move
+from domino_utils import list_possible_moves
+from move_ordering import MoveOrdering
+from transposition_table import TranspositionTable
+from search_stats import SearchStats
+from iterative_deepening import get_move_scores_iterative_deepening
+import get_best_move2
+import get_best_move_venezuelan
+
+def get_solver(variant: str) -> ModuleType:
+    # The solver module of the scoring rules of a variant, 'international' or 'venezuelan'
+    return {'international': get_best_move2, 'venezuelan': get_best_move_venezuelan}[variant]
+
+def solve_many(
+    states: list[GameState],
+    max_depth: int,
+    cache: dict[int, tuple[int, int]]|TranspositionTable|None = None,
+    ab_cache: dict[int, tuple[int, int, float, move]]|TranspositionTable|None = None,
+    ordering: MoveOrdering|None = None,
+    time_limit: float|None = None,
+    node_limit: int|None = None,
+    start_depth: int|None = None,
+    depth_step: int = 1,
+    possible_moves: list[tuple[move, int|None, float|None]]|None = None,
+    min_max_alpha_beta: Callable = get_best_move2.min_max_alpha_beta,
+    stats: SearchStats|None = None,
+    evaluate: Callable[[GameState], float]|None = None,
+    fallback_evaluate: Callable[[GameState], float]|None = None
+) -> list[list[tuple[move, float]]]:
+    """
+    Score the moves of a batch of positions (e.g. the sampled deals of a determinization) with shared tables.
+
+    The count and alpha-beta tables are keyed on the canonical keys of the positions reached, so a
+    sub-position shared by several samples (same hands left, same ends, same player to move) is
+    solved once for the whole batch. Identical samples are only searched once.
+
+    :param states: The positions to solve
+    :param max_depth: Depth of the search, counted from each position
+    :param cache: The cache for count_game_stats, shared by all positions (a new dict if None)
+    :param ab_cache: The alpha-beta transposition table, shared by all positions (a new dict if None)
+    :param ordering: The move ordering, shared by all positions (a new MoveOrdering() if None)
+    :param time_limit: Wall-clock budget in seconds for each position, None for no limit
+    :param node_limit: Node budget for each position, None for no limit
+    :param start_depth: Depth of the first iterative deepening iteration, max_depth if None (a single iteration)
+    :param depth_step: Depth increment between iterations
+    :param possible_moves: The moves to score, all legal moves of each position if None
+    :param min_max_alpha_beta: The search function (get_best_move2 or get_best_move_venezuelan)
+    :param stats: Optional search_stats.SearchStats, updated with the counters of every search of the batch
+    :param evaluate: Optional static evaluation of the positions at the depth limit (see static_evaluation)
+    :param fallback_evaluate: Static evaluation of the moves of a position that runs out of budget
+    :return: For each position, the (move, score) list of its deepest completed iteration, the fallback scores
+             or [] if no iteration completed within the budget (see iterative_deepening.get_move_scores_iterative_deepening)
+    """
+    cache = {} if cache is None else cache
+    ab_cache = {} if ab_cache is None else ab_cache
+    ordering = MoveOrdering() if ordering is None else ordering
+    start_depth = max_depth if start_depth is None else start_depth
+
+    solved: dict[GameState, list[tuple[move, float]]] = {}
+    results: list[list[tuple[move, float]]] = []
+    for state in states:
+        move_scores = solved.get(state)
+        if move_scores is None:
+            move_scores, _ = get_move_scores_iterative_deepening(state, max_depth, cache, time_limit, node_limit, start_depth, depth_step,
+                                                                 ab_cache, ordering, possible_moves, min_max_alpha_beta, stats, evaluate, fallback_evaluate)
+            solved[state] = move_scores
+        results.append(move_scores)
+    return results
+
+
+def sample_late_game(rng: random.Random, tiles_left: int, num_samples: int) -> list[GameState]:
+    """
+    Deals of the unseen tiles around a fixed South hand, late in a random game.
+
+    :param rng: The random number generator
+    :param tiles_left: Number of tiles left in the hands when South is to move
+    :param num_samples: Number of deals
+    :return: The sampled positions, South to move
+    """
+    from domino_tablebase import random_endgame
+
+    state = random_endgame(rng, tiles_left)
+    while state.is_game_over() or state.current_player != PlayerPosition_SOUTH:
+        state = random_endgame(rng, tiles_left)
+    unseen = [tile for hand in state.player_hands[1:] for tile in hand]
+    samples = []
+    for _ in range(num_samples):
+        rng.shuffle(unseen)
+        hands = [state.player_hands[0]]
+        start = 0
+        for hand in state.player_hands[1:]:
+            hands.append(frozenset(unseen[start:start + len(hand)]))
+            start += len(hand)
+        samples.append(GameState(
+            player_hands=tuple(hands),
+            current_player=PlayerPosition_SOUTH,
+            left_end=state.left_end,
+            right_end=state.right_end,
+            consecutive_passes=state.consecutive_passes
+        ))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare solving sampled deals one by one and as a batch with shared tables")
+    parser.add_argument("--tiles-left", type=int, default=14, help="Tiles left in the hands when South is to move")
+    parser.add_argument("--samples", type=int, default=32)
+    parser.add_argument("--positions", type=int, default=5, help="Number of random late-game positions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    total_single = total_batch = 0.0
+    for _ in range(args.positions):
+        samples = sample_late_game(rng, args.tiles_left, args.samples)
+        depth = 2 * (28 + 4)
+
+        start = time.perf_counter()
+        single = [solve_many([sample], depth)[0] for sample in samples]
+        elapsed_single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = solve_many(samples, depth)
+        elapsed_batch = time.perf_counter() - start
+
+        assert single == batch
+        total_single += elapsed_single
+        total_batch += elapsed_batch
+        print(f"{len(set(samples))} distinct deals, {len(list_possible_moves(samples[0]))} moves: "
+              f"one by one {elapsed_single:.3f}s, batch {elapsed_batch:.3f}s ({elapsed_single / elapsed_batch:.1f}x)")
+    print(f"Total: one by one {total_single:.3f}s, batch {total_batch:.3f}s ({total_single / total_batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
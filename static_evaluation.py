@@ -0,0 +1,149 @@
+import argparse
+import math
+import random
+import time
+from typing import Callable
+from domino_data_types import GameState
+
+# Weights of the features of the win estimate, in turns of the race to go out
+PASS_PENALTY = 1.0
+SUIT_CONTROL_WEIGHT = 0.25
+PIP_WEIGHT = 0.02
+# Slope of the logistic turning the advantage into a win probability
+WIN_SLOPE = 1.0
+
+def international_score(winner: int, pair_0_pips: int, pair_1_pips: int) -> float:
+    # The winners score the pips of all hands
+    return 0 if winner == -1 else (pair_0_pips + pair_1_pips) * (1 if winner == 0 else -1)
+
+def venezuelan_score(winner: int, pair_0_pips: int, pair_1_pips: int) -> float:
+    # The winners score the pips of the losers
+    return 0 if winner == -1 else (pair_1_pips if winner == 0 else -pair_0_pips)
+
+def blocked_winner(pair_0_pips: int, pair_1_pips: int) -> int:
+    # As get_best_move2.determine_winning_pair: the pair with the fewest pips wins a blocked game
+    if pair_0_pips == pair_1_pips:
+        return -1
+    return 1 if pair_1_pips < pair_0_pips else 0
+
+def evaluate(state: GameState, outcome_score: Callable[[int, int, int], float]) -> float:
+    """
+    Static estimate of the expected score of a position that is not over (pair 0 positive), in
+    constant time instead of enumerating the rest of the game as count_game_stats does: the features
+    are read from the counters GameState maintains (pip_sums, tile_counts, suit_counts, suit_index)
+    without going through the hands.
+
+    Positions where no tile in any hand fits the board ends are blocked: the hands cannot change
+    any more, so their score is exact. So is the score of a player to move that plays its last tile.
+    Otherwise the probability that pair 0 wins is estimated from the race to go out: the number of
+    turns each player needs (its tiles, plus a pass when it cannot play now) from its seat, the
+    control of the end suits (tiles of those suits held by each pair) and the pips left (which
+    decide blocked games). The score is the expectation of the two outcomes, each pair winning
+    the pips its hands would score with the remaining tiles.
+
+    :param state: A position that is not over
+    :param outcome_score: Score of an outcome (winner, pair 0 pips, pair 1 pips), see international_score
+    :return: The estimated score
+    """
+    left_end, right_end = state.left_end, state.right_end
+    pip_sums = state.pip_sums
+    tile_counts = state.tile_counts
+    pair_0_pips = pip_sums[0] + pip_sums[2]
+    pair_1_pips = pip_sums[1] + pip_sums[3]
+
+    if state.is_blocked():
+        # Blocked: everyone passes until the game ends
+        return outcome_score(blocked_winner(pair_0_pips, pair_1_pips), pair_0_pips, pair_1_pips)
+
+    current_player = state.current_player
+    if tile_counts[current_player] == 1 and state.can_play(current_player):
+        # Domino on this turn
+        if current_player % 2 == 0:
+            return outcome_score(0, pair_0_pips - pip_sums[current_player], pair_1_pips)
+        return outcome_score(1, pair_0_pips, pair_1_pips - pip_sums[current_player])
+
+    # Turn on which each pair could play its last tile first, counted from the player to move
+    race = [math.inf, math.inf]
+    for offset in range(4):
+        player = (current_player + offset) % 4
+        turns = tile_counts[player] + (PASS_PENALTY if not state.can_play(player) else 0)
+        race[player % 2] = min(race[player % 2], 4 * (turns - 1) + offset)
+    advantage = (race[1] - race[0]) / 4
+
+    if left_end is not None:
+        # Tiles of the end suits held by each pair: the pair that holds them can make the other one pass
+        suit_index = state.suit_index
+        for end in ((left_end,) if left_end == right_end else (left_end, right_end)):
+            for player in range(4):
+                held = ((suit_index[player] >> (7 * end)) & 127).bit_count()
+                advantage += SUIT_CONTROL_WEIGHT * held * (1 if player % 2 == 0 else -1)
+
+    advantage += PIP_WEIGHT * (pair_1_pips - pair_0_pips)
+    p_win = 1 / (1 + math.exp(-WIN_SLOPE * advantage))
+    return p_win * outcome_score(0, pair_0_pips, pair_1_pips) + (1 - p_win) * outcome_score(1, pair_0_pips, pair_1_pips)
+
+def evaluate_international(state: GameState) -> float:
+    """Static leaf evaluation for get_best_move2 (the evaluate argument of min_max_alpha_beta)."""
+    return evaluate(state, international_score)
+
+def evaluate_venezuelan(state: GameState) -> float:
+    """Static leaf evaluation for get_best_move_venezuelan (the evaluate argument of min_max_alpha_beta)."""
+    return evaluate(state, venezuelan_score)
+
+def get_evaluator(variant: str) -> Callable[[GameState], float]:
+    return {'international': evaluate_international, 'venezuelan': evaluate_venezuelan}[variant]
+
+
+def main() -> None:
+    from domino_tablebase import random_endgame
+    from solve_many import get_solver
+    from domino_utils import list_possible_moves
+    from move_ordering import benchmark_positions
+
+    parser = argparse.ArgumentParser(description="Depth-limited searches with counted and static leaves against the exact solution")
+    parser.add_argument("--variant", choices=['international', 'venezuelan'], default='international')
+    parser.add_argument("--tiles-left", type=int, default=20, help="Tiles left in the hands of the random positions")
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    solver = get_solver(args.variant)
+    evaluator = get_evaluator(args.variant)
+    rng = random.Random(args.seed)
+    positions = []
+    while len(positions) < args.positions:
+        state = random_endgame(rng, args.tiles_left)
+        if len(list_possible_moves(state)) > 1:
+            positions.append(state)
+
+    def move_value(state, tile_and_loc_info):
+        child = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+        return solver.get_best_move_alpha_beta(child, 2 * (28 + 4), {}, False, ab_cache={})[1]
+
+    # Exact value of every move of every position
+    exact = [{tile_and_loc_info: move_value(state, tile_and_loc_info) for tile_and_loc_info, _, _ in list_possible_moves(state)} for state in positions]
+
+    print(f"{len(positions)} random positions with {args.tiles_left} tiles left: time, and best move agreement with the exact solution")
+    print(f"{'depth':>5}{'leaves':>8}{'time (s)':>10}{'optimal':>9}{'loss':>8}")
+    for depth in args.depths:
+        for leaves, evaluate_leaf in (('count', None), ('static', evaluator)):
+            start = time.perf_counter()
+            best_moves = [solver.get_best_move_alpha_beta(state, depth, {}, False, ab_cache={}, evaluate=evaluate_leaf)[0] for state in positions]
+            elapsed = time.perf_counter() - start
+            optimal = loss = 0
+            for state, values, best_move in zip(positions, exact, best_moves):
+                best_value = max(values.values()) if state.current_player % 2 == 0 else min(values.values())
+                optimal += values[best_move] == best_value
+                loss += abs(best_value - values[best_move])
+            print(f"{depth:>5}{leaves:>8}{elapsed:>10.3f}{optimal / len(positions):>9.0%}{loss / len(positions):>8.2f}")
+
+    name, state, _ = benchmark_positions()[0]
+    for depth in args.depths:
+        start = time.perf_counter()
+        best_move, best_score, _ = solver.get_best_move_alpha_beta(state, depth, {}, False, ab_cache={}, evaluate=evaluator)
+        print(f"{name} at depth {depth} with static leaves: {time.perf_counter() - start:.3f}s, {best_move}, {best_score:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import importlib
+import math
+import random
+import sys
+import types
+import unittest
+from domino_data_types import GameState, DominoTile, PlayerPosition_SOUTH
+from domino_utils import list_possible_moves
+from get_best_move2 import get_best_move_alpha_beta
+from search_stats import SearchStats
+
+
+def stub_missing_module(name: str, **attributes) -> None:
+    # The agents import tqdm and scipy at the top, but the sampling and the searches do not use them: without
+    # them installed, empty modules stand in so that these tests still run
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+
+stub_missing_module('tqdm', tqdm=None)
+stub_missing_module('scipy')
+stub_missing_module('scipy.stats')
+
+import analytic_agent_player_parallel
+import analytic_agent_player_parallel_ci
+import analytic_agent_w_inf
+from analytic_agent_player_parallel_ci import confidence_interval
+from opponent_model import weighted_mean_std
+
+
+class TestAgentSearches(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        rng.shuffle(tiles)
+        self.south_hand = set(tiles[:3])
+        self.remaining_tiles = set(tiles[3:12])
+        self.player_tiles_count = {0: 3, 1: 3, 2: 3, 3: 3}
+        self.inferred_knowledge: dict[int, set[DominoTile]] = {player: set() for player in range(4)}
+        self.board_ends = (tiles[-1].top, tiles[-1].bottom)
+
+        hidden = tiles[3:12]
+        self.sample_states = []
+        for _ in range(3):
+            rng.shuffle(hidden)
+            self.sample_states.append(GameState(
+                player_hands=(frozenset(self.south_hand), frozenset(hidden[:3]), frozenset(hidden[3:6]), frozenset(hidden[6:])),
+                current_player=PlayerPosition_SOUTH, left_end=self.board_ends[0], right_end=self.board_ends[1], consecutive_passes=0))
+
+    def assert_exact_scores(self, batch_scores, sample_states):
+        self.assertEqual(len(batch_scores), len(sample_states))
+        for sample_state, move_scores in zip(sample_states, batch_scores):
+            self.assertEqual([tile_and_loc_info for tile_and_loc_info, _ in move_scores],
+                             [possible_move[0] for possible_move in list_possible_moves(sample_state)])
+            for tile_and_loc_info, score in move_scores:
+                new_state = sample_state.pass_turn() if tile_and_loc_info is None else sample_state.play_hand(*tile_and_loc_info)
+                self.assertEqual(score, get_best_move_alpha_beta(new_state, 2 * (28 + 4), {}, best_path_flag=False)[1])
+
+    def test_sample_batch_and_search(self):
+        arguments = (self.south_hand, self.remaining_tiles, self.player_tiles_count, self.inferred_knowledge, self.board_ends)
+        for module in (analytic_agent_player_parallel, analytic_agent_w_inf):
+            agent = module.AnalyticAgentPlayer(collect_stats=True)
+            # The searches of the deals of the test instead of sampled ones
+            sample_states = iter(self.sample_states)
+            agent.generate_sample_state = lambda *args: next(sample_states)
+            stats = SearchStats()
+            batch_scores = agent.sample_batch_and_search(len(self.sample_states), *arguments, stats=stats)
+            self.assert_exact_scores(batch_scores, self.sample_states)
+            self.assertEqual((stats.searches, stats.budget_fallbacks, stats.budget_drops), (len(self.sample_states), 0, 0))
+
+        agent = analytic_agent_player_parallel_ci.AnalyticAgentPlayer()
+        batch_scores = agent.sample_batch_and_search(len(self.sample_states), *arguments, sample_states=self.sample_states)
+        self.assert_exact_scores(batch_scores, self.sample_states)
+
+        # Sampled deals
+        batch_scores, log_weights, _ = agent.sample_batch_and_search_stats(4, *arguments)
+        self.assertEqual(len(batch_scores), 4)
+        self.assertEqual(log_weights, [0.0] * 4)
+
+
+class TestConfidenceInterval(unittest.TestCase):
+
+    def test_one_effective_sample(self):
+        # The t distribution has no degrees of freedom left, the spread is unknown
+        self.assertEqual(confidence_interval(12.0, 0.0, 1.0, 0.95), (-math.inf, math.inf))
+        self.assertEqual(confidence_interval(12.0, 3.0, 0.5, 0.95), (-math.inf, math.inf))
+        mean_score, std_dev, n = weighted_mean_std([12.0, 40.0], [1.0, 0.0])
+        self.assertEqual(confidence_interval(mean_score, std_dev, n, 0.95), (-math.inf, math.inf))
+
+    def test_equal_scores(self):
+        mean_score, std_dev, n = weighted_mean_std([7.0] * 5, [1.0, 0.5, 0.5, 1.0, 0.2])
+        self.assertEqual(confidence_interval(mean_score, std_dev, n, 0.95), (7.0, 7.0))
+
+    @unittest.skipUnless(hasattr(analytic_agent_player_parallel_ci.scipy_stats, 't'), "scipy is not installed")
+    def test_t_interval(self):
+        lower, upper = confidence_interval(2.0, 1.0, 5.0, 0.95)
+        # t quantile with 4 degrees of freedom
+        self.assertAlmostEqual(lower, 2.0 - 2.776445 / 5 ** 0.5, places=5)
+        self.assertAlmostEqual(upper, 2.0 + 2.776445 / 5 ** 0.5, places=5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import math
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from move_ordering import MoveOrdering, benchmark_positions
+import alpha_beta_stack
+import get_best_move2
+import get_best_move_venezuelan
+
+
+def random_state(rng: random.Random, tiles_per_hand: int) -> GameState:
+    tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+    rng.shuffle(tiles)
+    hands = [tiles[i * tiles_per_hand:(i + 1) * tiles_per_hand] for i in range(4)]
+    board_tile = tiles[-1]
+    return GameState(
+        player_hands=tuple(frozenset(hand) for hand in hands),
+        current_player=rng.randrange(4),
+        left_end=board_tile.top,
+        right_end=board_tile.bottom,
+        consecutive_passes=rng.randrange(3)
+    )
+
+
+class TestAlphaBetaStack(unittest.TestCase):
+
+    def assert_same_search(self, solver, state, depth, alpha, beta, use_ab_cache, use_ordering, pvs, best_path_flag):
+        results = []
+        for search in (solver.min_max_alpha_beta, alpha_beta_stack.min_max_alpha_beta):
+            cache = {}
+            ab_cache = {} if use_ab_cache else None
+            ordering = MoveOrdering() if use_ordering else None
+            kwargs = {'count_game_stats': solver.count_game_stats} if search is alpha_beta_stack.min_max_alpha_beta else {}
+            result = search(state, depth, alpha, beta, cache, best_path_flag, ab_cache, ordering, pvs=pvs, **kwargs)
+            results.append((result, cache, ab_cache,
+                            None if ordering is None else (ordering.nodes, ordering.killer_moves, ordering.history_scores)))
+        self.assertEqual(results[1], results[0])
+
+    def test_matches_recursive_search(self):
+        rng = random.Random(0)
+        for solver in (get_best_move2, get_best_move_venezuelan):
+            for _ in range(40):
+                state = random_state(rng, rng.randint(1, 4))
+                depth = rng.randint(0, 16)
+                self.assert_same_search(solver, state, depth, -math.inf, math.inf,
+                                        use_ab_cache=rng.random() < 0.5, use_ordering=rng.random() < 0.5,
+                                        pvs=rng.random() < 0.5, best_path_flag=rng.random() < 0.5)
+
+    def test_matches_recursive_search_with_narrow_window(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            state = random_state(rng, rng.randint(1, 4))
+            beta = rng.randint(-20, 20)
+            self.assert_same_search(get_best_move2, state, rng.randint(1, 16), beta - 1, beta,
+                                    use_ab_cache=True, use_ordering=True, pvs=False, best_path_flag=True)
+
+    def test_matches_recursive_search_on_benchmark_position(self):
+        _, state, depth = benchmark_positions()[1]
+        self.assert_same_search(get_best_move2, state, depth, -math.inf, math.inf,
+                                use_ab_cache=True, use_ordering=True, pvs=True, best_path_flag=True)
+
+    def test_get_best_move_alpha_beta(self):
+        _, state, depth = benchmark_positions()[2]
+        self.assertEqual(alpha_beta_stack.get_best_move_alpha_beta(state, depth, {}),
+                         get_best_move2.get_best_move_alpha_beta(state, depth, {}))
+        with self.assertRaises(ValueError):
+            alpha_beta_stack.get_best_move_alpha_beta(state, depth, {}, algorithm='mtdf')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from domino_utils import list_possible_moves
+import domino_bitboard
+import get_best_move2
+import get_best_move_bitboard
+
+
+def random_state(rng: random.Random, tiles_per_hand: int) -> GameState:
+    tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+    rng.shuffle(tiles)
+    hands = [tiles[i * tiles_per_hand:(i + 1) * tiles_per_hand] for i in range(4)]
+    board_tile = tiles[-1]
+    return GameState(
+        player_hands=tuple(frozenset(hand) for hand in hands),
+        current_player=rng.randrange(4),
+        left_end=board_tile.top,
+        right_end=board_tile.bottom,
+        consecutive_passes=rng.randrange(3)
+    )
+
+
+class TestBitboard(unittest.TestCase):
+
+    def test_encode_decode_round_trip(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            state = random_state(rng, rng.randint(0, 6))
+            self.assertEqual(domino_bitboard.decode_state(domino_bitboard.encode_state(state)), state)
+
+    def test_empty_board_round_trip(self):
+        state = GameState.new_game([[DominoTile(0, 0)], [DominoTile(1, 1)], [DominoTile(2, 2)], [DominoTile(3, 3)]])
+        packed = domino_bitboard.encode_state(state)
+        self.assertEqual(domino_bitboard.decode_state(packed), state)
+        self.assertEqual(domino_bitboard.list_possible_moves(packed), [(domino_bitboard.TILE_INDEX[DominoTile(0, 0)], True)])
+
+    def test_moves_and_transitions_match_game_state(self):
+        rng = random.Random(1)
+        for _ in range(100):
+            state = random_state(rng, rng.randint(1, 6))
+            packed = domino_bitboard.encode_state(state)
+            expected = {move for move, _, _ in list_possible_moves(state)}
+            moves = {domino_bitboard.move_to_domino_move(move) for move in domino_bitboard.list_possible_moves(packed)}
+            self.assertEqual(moves, expected)
+            for move in expected:
+                new_state = state.pass_turn() if move is None else state.play_hand(*move)
+                new_packed = domino_bitboard.apply_move(packed, domino_bitboard.domino_move_to_packed(move))
+                self.assertEqual(domino_bitboard.decode_state(new_packed), new_state)
+
+    def test_count_game_stats_matches(self):
+        rng = random.Random(2)
+        for _ in range(30):
+            state = random_state(rng, rng.randint(1, 3))
+            total_games, exp_score = get_best_move2.count_game_stats(state, print_stats=False, cache={})
+            games, score = get_best_move_bitboard.count_game_stats(domino_bitboard.encode_state(state), {})
+            self.assertEqual(games, total_games)
+            self.assertAlmostEqual(score / games, exp_score)
+
+    def test_alpha_beta_matches(self):
+        rng = random.Random(3)
+        for _ in range(30):
+            state = random_state(rng, rng.randint(1, 4))
+            depth = rng.randint(1, 16)
+            _, expected, _ = get_best_move2.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+            best_move, score, path = get_best_move_bitboard.get_best_move_alpha_beta(state, depth, {})
+            self.assertAlmostEqual(score, expected)
+            self.assertIsInstance(score, float)
+            if path:
+                self.assertEqual(path[0][1], best_move)
+
+
+if __name__ == '__main__':
+    unittest.main()
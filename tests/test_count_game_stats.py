@@ -0,0 +1,77 @@
+import random
+import unittest
+from domino_data_types import GameState
+from domino_utils import list_possible_moves
+from domino_tablebase import random_endgame
+from search_budget import SearchBudget, SearchTimeout
+import get_best_move2
+import get_best_move_venezuelan
+
+
+def count_outcomes(state: GameState, solver) -> tuple[int, int]:
+    # Plain recursive enumeration, without cache
+    if state.is_game_over():
+        winner, pair_0_pips, pair_1_pips = solver.determine_winning_pair(state)
+        if solver is get_best_move2:
+            score = 0 if winner == -1 else (pair_0_pips + pair_1_pips) * (1 if winner == 0 else -1)
+        else:
+            score = 0 if winner == -1 else (pair_1_pips if winner == 0 else -pair_0_pips)
+        return 1, score
+    total_games, total_score = 0, 0
+    for tile_and_loc_info, _, _ in list_possible_moves(state):
+        new_state = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+        games, score = count_outcomes(new_state, solver)
+        total_games += games
+        total_score += score
+    return total_games, total_score
+
+
+class TestCountGameStats(unittest.TestCase):
+
+    def test_matches_plain_enumeration(self):
+        rng = random.Random(0)
+        for solver in (get_best_move2, get_best_move_venezuelan):
+            for _ in range(20):
+                state = random_endgame(rng, rng.randint(4, 9))
+                total_games, total_score = count_outcomes(state, solver)
+                self.assertEqual(solver.count_game_stats(state, print_stats=False, cache={}),
+                                 (total_games, total_score / total_games))
+
+    def test_aborted_count_only_caches_complete_totals(self):
+        rng = random.Random(1)
+        aborted = 0
+        for _ in range(10):
+            state = random_endgame(rng, 12)
+            cache = {}
+            try:
+                get_best_move2.count_game_stats(state, print_stats=False, cache=cache, budget=SearchBudget(node_limit=50))
+            except SearchTimeout:
+                aborted += 1
+            # Every entry is the total of its whole subgame: counting again from them gives the right result
+            self.assertEqual(get_best_move2.count_game_stats(state, print_stats=False, cache=cache),
+                             get_best_move2.count_game_stats(state, print_stats=False, cache={}))
+        self.assertGreater(aborted, 0)
+
+    def test_forced_moves_are_not_cached(self):
+        rng = random.Random(2)
+        for _ in range(10):
+            state = random_endgame(rng, rng.randint(4, 8))
+            cache = {}
+            get_best_move2.count_game_stats(state, print_stats=False, cache=cache)
+            # Positions with a single move below the initial one are followed, not counted
+            forced_keys, stack = set(), [state]
+            while stack:
+                position = stack.pop()
+                if position.is_game_over():
+                    continue
+                moves = list_possible_moves(position)
+                if len(moves) == 1 and position is not state:
+                    forced_keys.add(position.canonical_key()[0])
+                for tile_and_loc_info, _, _ in moves:
+                    stack.append(position.pass_turn() if tile_and_loc_info is None else position.play_hand(*tile_and_loc_info))
+            self.assertIn(state.canonical_key()[0], cache)
+            self.assertFalse(forced_keys & cache.keys() - {state.canonical_key()[0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
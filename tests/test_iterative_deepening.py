@@ -0,0 +1,73 @@
+import math
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from domino_utils import list_possible_moves
+from get_best_move2 import get_best_move_alpha_beta, min_max_alpha_beta
+from iterative_deepening import get_best_move_iterative_deepening, get_move_scores_iterative_deepening
+from search_budget import SearchBudget, SearchTimeout
+from search_stats import SearchStats
+from static_evaluation import evaluate_international
+
+
+class TestIterativeDeepening(unittest.TestCase):
+
+    def random_state(self, rng: random.Random, tiles_per_hand: int) -> GameState:
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        rng.shuffle(tiles)
+        return GameState.new_game([tiles[i * tiles_per_hand:(i + 1) * tiles_per_hand] for i in range(4)])
+
+    def test_same_result_as_fixed_depth(self):
+        rng = random.Random(0)
+        for _ in range(5):
+            state = self.random_state(rng, 4)
+            depth = rng.randint(2, 20)
+            best_move, expected, _ = get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+            id_move, score, completed_depth = get_best_move_iterative_deepening(state, depth, start_depth=1, depth_step=3)
+            self.assertEqual(completed_depth, depth)
+            self.assertAlmostEqual(score, expected)
+            self.assertEqual(id_move, best_move)
+
+    def test_depth_capped_at_end_of_game(self):
+        state = self.random_state(random.Random(1), 2)
+        _, _, completed_depth = get_best_move_iterative_deepening(state, 99, start_depth=8, depth_step=8)
+        self.assertEqual(completed_depth, 4 * 8 + 4)
+
+    def test_budget_returns_deepest_completed_iteration(self):
+        state = self.random_state(random.Random(2), 5)
+        move_scores, completed_depth = get_move_scores_iterative_deepening(state, 24, node_limit=1)
+        self.assertEqual((move_scores, completed_depth), ([], 0))
+
+        move_scores, completed_depth = get_move_scores_iterative_deepening(state, 24, start_depth=20, depth_step=1, node_limit=20_000)
+        self.assertTrue(completed_depth == 0 or 20 <= completed_depth <= 24)
+        if completed_depth:
+            self.assertEqual(len(move_scores), len(state.get_current_hand()))
+
+    def test_budget_fallback(self):
+        state = self.random_state(random.Random(2), 5)
+        stats = SearchStats()
+        move_scores, completed_depth = get_move_scores_iterative_deepening(state, 24, node_limit=1, stats=stats)
+        self.assertEqual((move_scores, completed_depth), ([], 0))
+        self.assertEqual((stats.budget_fallbacks, stats.budget_drops), (0, 1))
+
+        # Out of budget, the moves are scored one ply deep by the static evaluation instead
+        move_scores, completed_depth = get_move_scores_iterative_deepening(state, 24, node_limit=1, stats=stats, fallback_evaluate=evaluate_international)
+        self.assertEqual(completed_depth, 1)
+        self.assertEqual([tile_and_loc_info for tile_and_loc_info, _ in move_scores], [possible_move[0] for possible_move in list_possible_moves(state)])
+        for tile_and_loc_info, score in move_scores:
+            new_state = state.play_hand(*tile_and_loc_info)
+            _, expected, _ = min_max_alpha_beta(new_state, 0, -math.inf, math.inf, {}, False, evaluate=evaluate_international)
+            self.assertAlmostEqual(score, expected)
+        self.assertEqual((stats.budget_fallbacks, stats.budget_drops), (1, 1))
+
+    def test_search_budget(self):
+        budget = SearchBudget(node_limit=3)
+        for _ in range(3):
+            budget.tick()
+        self.assertRaises(SearchTimeout, budget.tick)
+        self.assertTrue(budget.exhausted())
+        self.assertFalse(SearchBudget(time_limit=60).exhausted())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from domino_utils import list_possible_moves
+import get_best_move2
+
+
+class TestLockDetection(unittest.TestCase):
+
+    def test_incremental_counts(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(50):
+            rng.shuffle(tiles)
+            state = GameState.new_game([tiles[i * 7:(i + 1) * 7] for i in range(4)])
+            while not state.is_game_over():
+                move, _, _ = rng.choice(list_possible_moves(state))
+                state = state.pass_turn() if move is None else state.play_hand(*move)
+                self.assertEqual(state.suit_counts, state.compute_suit_counts())
+                self.assertEqual(state.suit_index, state.compute_suit_index())
+                for player in range(4):
+                    self.assertEqual(state.can_play(player), any(tile.can_connect(state.left_end) or tile.can_connect(state.right_end) for tile in state.player_hands[player]))
+                self.assertEqual(state.pip_sums, state.compute_pip_sums())
+                self.assertEqual(state.tile_counts, tuple(len(hand) for hand in state.player_hands))
+                self.assertEqual(state.tiles_left(), sum(len(hand) for hand in state.player_hands))
+                for pair in (0, 1):
+                    self.assertEqual(state.pair_pips(pair), sum(tile.get_pip_sum() for hand in state.player_hands[pair::2] for tile in hand))
+
+    def test_moves_from_suit_index(self):
+        rng = random.Random(2)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(50):
+            rng.shuffle(tiles)
+            state = GameState.new_game([tiles[i * 7:(i + 1) * 7] for i in range(4)])
+            while not state.is_game_over():
+                expected = [((tile, True), None, None) for tile in state.get_current_hand() if tile.can_connect(state.left_end)]
+                if state.left_end != state.right_end:
+                    expected += [((tile, False), None, None) for tile in state.get_current_hand() if tile.can_connect(state.right_end)]
+                moves = list_possible_moves(state)
+                self.assertCountEqual(moves, expected or [(None, None, None)])
+                self.assertCountEqual([possible_move[0] for possible_move in moves], get_best_move2.list_count_moves(state))
+                move, _, _ = rng.choice(moves)
+                state = state.pass_turn() if move is None else state.play_hand(*move)
+
+    def test_blocked_when_nobody_can_play(self):
+        rng = random.Random(1)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        blocked = 0
+        for _ in range(200):
+            rng.shuffle(tiles)
+            state = GameState.new_game([tiles[i * 5:(i + 1) * 5] for i in range(4)])
+            while not state.is_game_over():
+                move, _, _ = rng.choice(list_possible_moves(state))
+                state = state.pass_turn() if move is None else state.play_hand(*move)
+            if state.is_blocked():
+                blocked += 1
+                # The game ends before the passes, and every hand would have passed
+                self.assertLess(state.consecutive_passes, 4)
+                for player in range(4):
+                    self.assertFalse(any(tile.can_connect(state.left_end) or tile.can_connect(state.right_end) for tile in state.player_hands[player]))
+                self.assertEqual(get_best_move2.count_game_stats(state, print_stats=False, cache={})[0], 1)
+            else:
+                self.assertTrue(any(len(hand) == 0 for hand in state.player_hands))
+        self.assertGreater(blocked, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from move_ordering import MoveOrdering, ORDERINGS
+from get_best_move2 import get_best_move_alpha_beta
+
+
+class TestMoveOrdering(unittest.TestCase):
+
+    def test_priorities(self):
+        moves = [((DominoTile(1, 2), True), None, None), ((DominoTile(3, 3), True), None, None),
+                 ((DominoTile(5, 6), False), None, None), ((DominoTile(0, 4), False), None, None)]
+        self.assertEqual(MoveOrdering(tt_move=False, killers=False, history=False).order_moves(moves, 0, 0), moves)
+        self.assertEqual(MoveOrdering(doubles_first=True).order_moves(moves, 0, 0)[0], moves[1])
+        self.assertEqual(MoveOrdering(high_pips_first=True).order_moves(moves, 0, 0)[0], moves[2])
+
+        ordering = MoveOrdering(high_pips_first=True)
+        ordering.record_cutoff(moves[3][0], ply=2, depth=4, player=0)
+        self.assertEqual(ordering.order_moves(moves, 2, 1)[0], moves[3])  # killer move at ply 2
+        self.assertEqual(ordering.order_moves(moves, 1, 0)[0], moves[3])  # history of player 0
+        self.assertEqual(ordering.order_moves(moves, 1, 1)[0], moves[2])
+        self.assertEqual(ordering.order_moves(moves, 2, 1, tt_move=moves[0][0])[0], moves[0])
+
+    def test_orderings_keep_scores(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(5):
+            rng.shuffle(tiles)
+            state = GameState.new_game([tiles[i * 4:(i + 1) * 4] for i in range(4)])
+            depth = rng.randint(4, 20)
+            _, expected, _ = get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+            for ordering in ORDERINGS.values():
+                ordering.clear()
+                _, score, _ = get_best_move_alpha_beta(state, depth, {}, best_path_flag=False, ab_cache={}, ordering=ordering)
+                self.assertAlmostEqual(score, expected)
+                self.assertGreater(ordering.nodes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
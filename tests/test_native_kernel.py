@@ -0,0 +1,96 @@
+import math
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+import domino_bitboard
+import get_best_move2
+import get_best_move_venezuelan
+import get_best_move_bitboard
+import get_best_move_native
+from get_best_move_native import NATIVE_AVAILABLE, game_state_cy
+
+
+def random_state(rng: random.Random, tiles_per_hand: int) -> GameState:
+    tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+    rng.shuffle(tiles)
+    hands = [tiles[i * tiles_per_hand:(i + 1) * tiles_per_hand] for i in range(4)]
+    board_tile = tiles[-1]
+    return GameState(
+        player_hands=tuple(frozenset(hand) for hand in hands),
+        current_player=rng.randrange(4),
+        left_end=board_tile.top,
+        right_end=board_tile.bottom,
+        consecutive_passes=rng.randrange(3)
+    )
+
+
+class TestNativeEngine(unittest.TestCase):
+    # Runs on the compiled kernel if it is built, on the bitboard fallback otherwise
+
+    def test_alpha_beta_matches(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            state = random_state(rng, rng.randint(1, 4))
+            depth = rng.randint(1, 16)
+            _, expected, _ = get_best_move2.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+            best_move, score, path = get_best_move_native.get_best_move_alpha_beta(state, depth, {})
+            self.assertAlmostEqual(score, expected)
+            if path:
+                self.assertEqual(path[0][1], best_move)
+
+    def test_fallback_without_kernel(self):
+        rng = random.Random(4)
+        native_available = get_best_move_native.NATIVE_AVAILABLE
+        get_best_move_native.NATIVE_AVAILABLE = False
+        try:
+            for _ in range(10):
+                state = random_state(rng, rng.randint(1, 4))
+                depth = rng.randint(1, 16)
+                for variant, solver in (('international', get_best_move2), ('venezuelan', get_best_move_venezuelan)):
+                    self.assertEqual(get_best_move_native.get_best_move_alpha_beta(state, depth, {}, variant=variant),
+                                     solver.get_best_move_alpha_beta(state, depth, {}))
+            packed = domino_bitboard.encode_state(state)
+            self.assertRaises(ImportError, get_best_move_native.count_game_stats, packed, {})
+            self.assertRaises(ImportError, get_best_move_native.min_max_alpha_beta, packed, 4, -math.inf, math.inf, {})
+        finally:
+            get_best_move_native.NATIVE_AVAILABLE = native_available
+
+@unittest.skipUnless(NATIVE_AVAILABLE, "game_state_cy is not built")
+class TestNativeKernel(unittest.TestCase):
+
+    def test_moves_and_transitions_match_bitboard(self):
+        rng = random.Random(1)
+        for _ in range(100):
+            packed = domino_bitboard.encode_state(random_state(rng, rng.randint(0, 6)))
+            moves = game_state_cy.list_possible_moves(packed)
+            self.assertEqual(moves, domino_bitboard.list_possible_moves(packed))
+            self.assertEqual(game_state_cy.is_game_over(packed), domino_bitboard.is_game_over(packed))
+            self.assertEqual(game_state_cy.determine_winning_pair(packed), domino_bitboard.determine_winning_pair(packed))
+            for packed_move in moves:
+                self.assertEqual(game_state_cy.apply_move(packed, packed_move), domino_bitboard.apply_move(packed, packed_move))
+
+    def test_count_game_stats_matches_bitboard(self):
+        rng = random.Random(2)
+        for variant in ('international', 'venezuelan'):
+            for _ in range(20):
+                packed = domino_bitboard.encode_state(random_state(rng, rng.randint(1, 3)))
+                cache, expected_cache = {}, {}
+                self.assertEqual(game_state_cy.count_game_stats(packed, cache, variant),
+                                 get_best_move_bitboard.count_game_stats(packed, expected_cache, variant))
+                self.assertEqual(cache, expected_cache)
+
+    def test_min_max_alpha_beta_matches_bitboard(self):
+        rng = random.Random(3)
+        for variant in ('international', 'venezuelan'):
+            for _ in range(20):
+                packed = domino_bitboard.encode_state(random_state(rng, rng.randint(1, 4)))
+                depth = rng.randint(0, 16)
+                for best_path_flag in (True, False):
+                    best_move, score, path = game_state_cy.min_max_alpha_beta(packed, depth, -math.inf, math.inf, {}, best_path_flag, variant)
+                    expected_move, expected_score, expected_path = get_best_move_bitboard.min_max_alpha_beta(packed, depth, -math.inf, math.inf, {}, best_path_flag, variant)
+                    self.assertEqual((best_move, path), (expected_move, expected_path))
+                    self.assertEqual(score, expected_score)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import math
+import random
+import statistics
+import unittest
+from domino_data_types import DominoTile
+from opponent_model import DealLikelihood, HeavyTileOpponentModel, UniformOpponentModel, weighted_mean_std
+
+
+class TestOpponentModel(unittest.TestCase):
+
+    def setUp(self):
+        # South opens with 3|4, East plays 4|5 on the right, North 5|6 on the right and West passes
+        self.moves = [(DominoTile(3, 4), True), (DominoTile(4, 5), False), (DominoTile(5, 6), False), None]
+
+    def hands(self, east: list[DominoTile], north: list[DominoTile]) -> tuple[frozenset[DominoTile], ...]:
+        return (frozenset(), frozenset(east), frozenset(north), frozenset([DominoTile(0, 0)]))
+
+    def test_likelihood_of_the_plays(self):
+        likelihood = DealLikelihood.from_history(self.moves, 0, UniformOpponentModel())
+        # The opening of South and the pass of West are not scored
+        self.assertEqual([player for player, _, _, _ in likelihood.turns], [1, 2])
+        # East could also have played 4|6 and 3|3, North had no other move
+        self.assertAlmostEqual(likelihood.weight(self.hands([DominoTile(4, 6), DominoTile(3, 3), DominoTile(1, 1)], [DominoTile(1, 2)])), 1 / 3)
+        self.assertEqual(likelihood.weight(self.hands([DominoTile(1, 1)], [DominoTile(1, 2)])), 1.0)
+
+        heavy = DealLikelihood.from_history(self.moves, 0, HeavyTileOpponentModel(temperature=2.0))
+        # Playing 4|5 is less likely with 4|6 in hand than with 0|4
+        with_heavier = heavy.weight(self.hands([DominoTile(4, 6)], [DominoTile(1, 2)]))
+        with_lighter = heavy.weight(self.hands([DominoTile(0, 4)], [DominoTile(1, 2)]))
+        self.assertAlmostEqual(with_heavier, math.exp(9 / 2) / (math.exp(9 / 2) + math.exp(10 / 2)))
+        self.assertLess(with_heavier, 0.5)
+        self.assertGreater(with_lighter, 0.5)
+
+    def test_later_plays_are_in_the_hand(self):
+        # South passes and East plays 0|3: when it played 4|5 it also held 0|3, which fits the left end
+        moves = self.moves + [None, (DominoTile(0, 3), True)]
+        likelihood = DealLikelihood.from_history(moves, 0, UniformOpponentModel())
+        self.assertAlmostEqual(likelihood.weight(self.hands([DominoTile(1, 1)], [DominoTile(1, 2)])), 1 / 2)
+
+    def test_weighted_mean_std(self):
+        rng = random.Random(0)
+        scores = [rng.randint(-40, 40) for _ in range(50)]
+        mean_score, std_dev, effective_size = weighted_mean_std(scores, [0.5] * len(scores))
+        self.assertAlmostEqual(mean_score, statistics.mean(scores))
+        self.assertAlmostEqual(std_dev, statistics.stdev(scores))
+        self.assertAlmostEqual(effective_size, len(scores))
+        # A sample that carries all the weight
+        self.assertEqual(weighted_mean_std([1.0, 5.0], [1.0, 0.0]), (1.0, 0.0, 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import random
+import unittest
+from domino_tablebase import random_endgame
+from parallel_search import get_best_move_alpha_beta_parallel, ParallelSearchStats, _child_state
+import get_best_move2
+import get_best_move_venezuelan
+
+
+class TestParallelSearch(unittest.TestCase):
+
+    def test_matches_serial_search(self):
+        rng = random.Random(0)
+        split = 0
+        for variant, solver in (('international', get_best_move2), ('venezuelan', get_best_move_venezuelan)):
+            for split_ply in (1, 2):
+                for _ in range(4):
+                    state = random_endgame(rng, rng.randint(6, 12))
+                    depth = rng.choice([3, 6, 2 * (28 + 4)])
+                    _, expected, _ = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+                    stats = ParallelSearchStats()
+                    best_move, score, path = get_best_move_alpha_beta_parallel(state, depth, 2, True, split_ply, variant, stats)
+                    self.assertEqual(score, expected)
+                    split += stats.tasks > 1
+                    if best_move is not None or path:
+                        # The move reported reaches the best score
+                        self.assertEqual(path[0], (state.current_player, best_move))
+                        _, move_score, _ = solver.get_best_move_alpha_beta(_child_state(state, best_move), depth - 1, {}, best_path_flag=False)
+                        self.assertEqual(move_score, expected)
+        self.assertGreater(split, 4)
+
+    def test_invalid_split_ply(self):
+        state = random_endgame(random.Random(1), 8)
+        with self.assertRaises(ValueError):
+            get_best_move_alpha_beta_parallel(state, 4, 1, split_ply=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
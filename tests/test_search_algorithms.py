@@ -0,0 +1,104 @@
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from domino_utils import list_possible_moves
+from domino_tablebase import random_endgame
+import get_best_move2
+import get_best_move_venezuelan
+
+
+class TestSearchAlgorithms(unittest.TestCase):
+
+    def test_pvs_and_mtdf_match_alpha_beta(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(10):
+            rng.shuffle(tiles)
+            n = rng.randint(2, 4)
+            state = GameState.new_game([tiles[i * n:(i + 1) * n] for i in range(4)])
+            state = state.play_hand(next(iter(state.player_hands[0])), True)
+            depth = rng.randint(1, 4 * n + 4)
+            for solver in (get_best_move2, get_best_move_venezuelan):
+                _, expected, _ = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+                for algorithm in ('pvs', 'mtdf'):
+                    best_move, score, _ = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False, ab_cache={},
+                                                                          algorithm=algorithm, first_guess=rng.uniform(-50, 50))
+                    self.assertAlmostEqual(score, expected)
+                    # The returned move must reach that score
+                    new_state = state.pass_turn() if best_move is None else state.play_hand(*best_move)
+                    _, move_score, _ = solver.get_best_move_alpha_beta(new_state, depth - 1, {}, best_path_flag=False)
+                    self.assertAlmostEqual(move_score, expected)
+
+    def test_path_replays_forced_moves(self):
+        rng = random.Random(1)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(20):
+            rng.shuffle(tiles)
+            n = rng.randint(2, 4)
+            state = GameState.new_game([tiles[i * n:(i + 1) * n] for i in range(4)])
+            state = state.play_hand(next(iter(state.player_hands[0])), True)
+            for solver in (get_best_move2, get_best_move_venezuelan):
+                best_move, score, path = solver.get_best_move_alpha_beta(state, 2 * (28 + 4), {})
+                # Forced moves are in the path, which plays the whole game from the position
+                self.assertEqual(path[0][1], best_move)
+                position = state
+                for player, tile_and_loc_info in path:
+                    self.assertEqual(player, position.current_player)
+                    self.assertIn(tile_and_loc_info, [possible_move[0] for possible_move in list_possible_moves(position)])
+                    position = position.pass_turn() if tile_and_loc_info is None else position.play_hand(*tile_and_loc_info)
+                self.assertTrue(position.is_game_over())
+                self.assertEqual(solver.count_game_stats(position, print_stats=False, cache={})[1], score)
+
+    def test_principal_variation_from_table(self):
+        rng = random.Random(2)
+        for _ in range(20):
+            state = random_endgame(rng, rng.randint(6, 16))
+            if state.is_game_over():
+                continue
+            depth = rng.choice([2, 5, 9, 2 * (28 + 4)])
+            for solver in (get_best_move2, get_best_move_venezuelan):
+                _, _, expected_path = solver.get_best_move_alpha_beta(state, depth, {})
+                for algorithm in ('alpha_beta', 'pvs', 'mtdf'):
+                    ab_cache = {}
+                    best_move, score, _ = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False, ab_cache=ab_cache, algorithm=algorithm)
+                    path = solver.principal_variation(state, depth, ab_cache)
+                    self.assertEqual(path[0][1], best_move)
+                    # The line reaches the depth or the end of the game, where it scores the result of the search
+                    position = state
+                    for _, tile_and_loc_info in path:
+                        position = position.pass_turn() if tile_and_loc_info is None else position.play_hand(*tile_and_loc_info)
+                    self.assertTrue(len(path) == depth or position.is_game_over())
+                    self.assertEqual(solver.count_game_stats(position, print_stats=False, cache={})[1], score)
+                    if algorithm == 'alpha_beta':
+                        self.assertEqual(path, expected_path)
+
+    def test_no_path_below_a_root_without_path(self):
+        rng = random.Random(3)
+        for solver in (get_best_move2, get_best_move_venezuelan):
+            # Both variants search with get_best_move2.min_max_alpha_beta
+            search = get_best_move2.min_max_alpha_beta
+            calls = []
+
+            def spy(*args, **kwargs):
+                result = search(*args, **kwargs)
+                calls.append((kwargs.get('best_path_flag', args[5] if len(args) > 5 else True), result[2]))
+                return result
+
+            get_best_move2.min_max_alpha_beta = spy
+            try:
+                for _ in range(5):
+                    state = random_endgame(rng, rng.randint(8, 14))
+                    solver.get_best_move_alpha_beta(state, 2 * (28 + 4), {}, best_path_flag=False, ab_cache={})
+            finally:
+                get_best_move2.min_max_alpha_beta = search
+            self.assertGreater(len(calls), 5)
+            # Every inner search is asked for no path, and builds none
+            self.assertEqual([call for call in calls if call != (False, [])], [])
+
+    def test_unknown_algorithm(self):
+        state = GameState.new_game([[DominoTile(0, 0)], [DominoTile(1, 1)], [DominoTile(2, 2)], [DominoTile(3, 3)]])
+        self.assertRaises(ValueError, get_best_move2.get_best_move_alpha_beta, state, 3, {}, algorithm='minimax')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import random
+import unittest
+from domino_tablebase import random_endgame
+from search_budget import SearchBudget
+from search_stats import SearchStats
+from iterative_deepening import get_move_scores_iterative_deepening
+import alpha_beta_stack
+import get_best_move2
+import get_best_move_venezuelan
+
+
+class TestSearchStats(unittest.TestCase):
+
+    def test_counters_match_search(self):
+        rng = random.Random(0)
+        for solver in (get_best_move2, get_best_move_venezuelan):
+            for _ in range(10):
+                state = random_endgame(rng, rng.randint(6, 14))
+                depth = rng.randint(1, 12)
+                expected = solver.get_best_move_alpha_beta(state, depth, {}, ab_cache={})
+                stats = SearchStats()
+                budget = SearchBudget()
+                self.assertEqual(solver.get_best_move_alpha_beta(state, depth, {}, ab_cache={}, budget=budget, stats=stats), expected)
+                # Every alpha-beta and counted node ticks the budget once
+                self.assertEqual(stats.nodes + stats.counted_nodes, budget.nodes)
+                self.assertEqual(stats.searches, 1)
+                self.assertLessEqual(stats.first_move_cutoffs, stats.cutoffs)
+                self.assertEqual(stats.cache_hits + stats.cache_misses, stats.counted_nodes)
+                self.assertLessEqual(stats.tt_peak_size, stats.tt_stores)
+
+    def test_stack_search_counts_the_same_nodes(self):
+        rng = random.Random(1)
+        for _ in range(10):
+            state = random_endgame(rng, rng.randint(6, 14))
+            depth = rng.randint(1, 12)
+            for pvs in (False, True):
+                stats, stack_stats = SearchStats(), SearchStats()
+                algorithm = 'pvs' if pvs else 'alpha_beta'
+                get_best_move2.get_best_move_alpha_beta(state, depth, {}, ab_cache={}, algorithm=algorithm, stats=stats)
+                alpha_beta_stack.get_best_move_alpha_beta(state, depth, {}, ab_cache={}, algorithm=algorithm, stats=stack_stats)
+                stats.elapsed = stack_stats.elapsed = 0.0
+                self.assertEqual(stats, stack_stats)
+
+    def test_merge(self):
+        rng = random.Random(2)
+        total = SearchStats()
+        states = [random_endgame(rng, 10) for _ in range(3)]
+        for state in states:
+            stats = SearchStats()
+            get_move_scores_iterative_deepening(state, 8, {}, stats=stats)
+            total.merge(stats)
+        together = SearchStats()
+        for state in states:
+            get_move_scores_iterative_deepening(state, 8, {}, stats=together)
+        self.assertEqual(total.searches, 3)
+        self.assertEqual((total.nodes_per_ply, total.counted_nodes, total.cutoffs, total.tt_stores, total.cache_stores),
+                         (together.nodes_per_ply, together.counted_nodes, together.cutoffs, together.tt_stores, together.cache_stores))
+
+
+if __name__ == '__main__':
+    unittest.main()
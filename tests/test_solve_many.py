@@ -0,0 +1,34 @@
+import random
+import unittest
+from iterative_deepening import get_move_scores_iterative_deepening
+from solve_many import solve_many, sample_late_game
+import get_best_move_venezuelan
+
+
+class TestSolveMany(unittest.TestCase):
+
+    def test_batch_matches_one_by_one(self):
+        rng = random.Random(0)
+        for solver in (None, get_best_move_venezuelan):
+            kwargs = {} if solver is None else {'min_max_alpha_beta': solver.min_max_alpha_beta}
+            samples = sample_late_game(rng, 10, 8)
+            depth = 2 * (28 + 4)
+            expected = [solve_many([sample], depth, **kwargs)[0] for sample in samples]
+            self.assertEqual(solve_many(samples, depth, **kwargs), expected)
+
+    def test_shared_tables_and_duplicates(self):
+        rng = random.Random(1)
+        samples = sample_late_game(rng, 8, 4)
+        samples = samples + samples
+        cache, ab_cache = {}, {}
+        results = solve_many(samples, 20, cache, ab_cache)
+        self.assertEqual(results[:4], results[4:])
+        self.assertTrue(cache)
+        self.assertTrue(ab_cache)
+        # A position already in the shared tables gives the same scores
+        for sample, move_scores in zip(samples, results):
+            self.assertEqual(get_move_scores_iterative_deepening(sample, 20, cache, ab_cache=ab_cache)[0], move_scores)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import math
+import random
+import unittest
+from typing import Callable
+from domino_data_types import GameState, DominoTile
+from domino_tablebase import random_endgame
+from domino_utils import list_possible_moves
+from static_evaluation import PASS_PENALTY, SUIT_CONTROL_WEIGHT, PIP_WEIGHT, WIN_SLOPE, blocked_winner, evaluate, evaluate_international, evaluate_venezuelan, international_score, venezuelan_score
+import alpha_beta_stack
+import get_best_move2
+import get_best_move_venezuelan
+
+
+def evaluate_from_hands(state: GameState, outcome_score: Callable[[int, int, int], float]) -> float:
+    # As static_evaluation.evaluate, from the tiles of the hands instead of the counters of GameState
+    hands = state.player_hands
+    left_end, right_end = state.left_end, state.right_end
+    pair_0_pips = sum(tile.top + tile.bottom for hand in hands[0::2] for tile in hand)
+    pair_1_pips = sum(tile.top + tile.bottom for hand in hands[1::2] for tile in hand)
+
+    if left_end is None:
+        playable = [len(hand) for hand in hands]
+    else:
+        playable = [sum(1 for tile in hand if tile.top in (left_end, right_end) or tile.bottom in (left_end, right_end)) for hand in hands]
+        if not any(playable):
+            # Blocked: everyone passes until the game ends
+            return outcome_score(blocked_winner(pair_0_pips, pair_1_pips), pair_0_pips, pair_1_pips)
+
+    current_player = state.current_player
+    current_hand = hands[current_player]
+    if len(current_hand) == 1 and playable[current_player]:
+        # Domino on this turn
+        last_tile_pips = next(iter(current_hand)).get_pip_sum()
+        if current_player % 2 == 0:
+            return outcome_score(0, pair_0_pips - last_tile_pips, pair_1_pips)
+        return outcome_score(1, pair_0_pips, pair_1_pips - last_tile_pips)
+
+    # Turn on which each pair could play its last tile first, counted from the player to move
+    race = [math.inf, math.inf]
+    for offset in range(4):
+        player = (current_player + offset) % 4
+        turns = len(hands[player]) + (PASS_PENALTY if not playable[player] else 0)
+        race[player % 2] = min(race[player % 2], 4 * (turns - 1) + offset)
+    advantage = (race[1] - race[0]) / 4
+
+    if left_end is not None:
+        # Tiles of the end suits held by each pair: the pair that holds them can make the other one pass
+        for end in ((left_end,) if left_end == right_end else (left_end, right_end)):
+            for player, hand in enumerate(hands):
+                held = sum(1 for tile in hand if tile.top == end or tile.bottom == end)
+                advantage += SUIT_CONTROL_WEIGHT * held * (1 if player % 2 == 0 else -1)
+
+    advantage += PIP_WEIGHT * (pair_1_pips - pair_0_pips)
+    p_win = 1 / (1 + math.exp(-WIN_SLOPE * advantage))
+    return p_win * outcome_score(0, pair_0_pips, pair_1_pips) + (1 - p_win) * outcome_score(1, pair_0_pips, pair_1_pips)
+
+
+class TestStaticEvaluation(unittest.TestCase):
+
+    def test_blocked_and_last_tile_are_exact(self):
+        blocked = GameState(
+            player_hands=(frozenset([DominoTile(1, 2)]), frozenset([DominoTile(3, 4)]), frozenset([DominoTile(2, 3)]), frozenset([DominoTile(4, 6)])),
+            current_player=0, left_end=0, right_end=5, consecutive_passes=1)
+        last_tile = GameState(
+            player_hands=(frozenset([DominoTile(1, 2)]), frozenset([DominoTile(0, 4)]), frozenset([DominoTile(0, 3), DominoTile(5, 5)]), frozenset([DominoTile(4, 6)])),
+            current_player=1, left_end=0, right_end=5, consecutive_passes=0)
+        for solver, evaluate in ((get_best_move2, evaluate_international), (get_best_move_venezuelan, evaluate_venezuelan)):
+            self.assertEqual(evaluate(blocked), solver.count_game_stats(blocked, print_stats=False, cache={})[1])
+            # East goes out with 0|4
+            self.assertEqual(evaluate(last_tile), solver.get_best_move_alpha_beta(last_tile, 1, {}, False)[1])
+
+    def test_estimate_is_within_the_possible_scores(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            state = random_endgame(rng, rng.randint(2, 27))
+            if state.is_game_over():
+                continue
+            total_pips = sum(tile.get_pip_sum() for hand in state.player_hands for tile in hand)
+            self.assertLessEqual(abs(evaluate_international(state)), total_pips)
+            self.assertLessEqual(abs(evaluate_venezuelan(state)), total_pips)
+
+    def test_counters_match_the_hands(self):
+        rng = random.Random(2)
+        for _ in range(100):
+            state = random_endgame(rng, rng.randint(2, 27))
+            # Positions reached by moves, whose counters are updated incrementally
+            while not state.is_game_over():
+                for outcome_score in (international_score, venezuelan_score):
+                    self.assertEqual(evaluate(state, outcome_score), evaluate_from_hands(state, outcome_score))
+                moves = list_possible_moves(state)
+                tile_and_loc_info = rng.choice(moves)[0]
+                state = state.pass_turn() if tile_and_loc_info is None else state.play_hand(*tile_and_loc_info)
+
+    def test_search_with_static_leaves(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            state = random_endgame(rng, rng.randint(4, 14))
+            # Past the end of the game the leaves are never reached
+            self.assertEqual(get_best_move2.get_best_move_alpha_beta(state, 2 * (28 + 4), {}, ab_cache={}, evaluate=evaluate_international),
+                             get_best_move2.get_best_move_alpha_beta(state, 2 * (28 + 4), {}, ab_cache={}))
+            depth = rng.randint(1, 6)
+            self.assertEqual(alpha_beta_stack.get_best_move_alpha_beta(state, depth, {}, ab_cache={}, evaluate=evaluate_international),
+                             get_best_move2.get_best_move_alpha_beta(state, depth, {}, ab_cache={}, evaluate=evaluate_international))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import math
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from domino_utils import list_possible_moves
+import get_best_move2
+import get_best_move_venezuelan
+
+
+def random_state(rng: random.Random, tiles_per_hand: int) -> GameState:
+    tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+    rng.shuffle(tiles)
+    hands = [tiles[i * tiles_per_hand:(i + 1) * tiles_per_hand] for i in range(4)]
+    board_tile = tiles[-1]
+    return GameState(
+        player_hands=tuple(frozenset(hand) for hand in hands),
+        current_player=rng.randrange(4),
+        left_end=board_tile.top,
+        right_end=board_tile.bottom,
+        consecutive_passes=rng.randrange(3)
+    )
+
+
+def rotated(state: GameState, seats: int) -> GameState:
+    # The same game with every player moved `seats` seats further
+    return GameState(
+        player_hands=tuple(state.player_hands[(i - seats) % 4] for i in range(4)),
+        current_player=(state.current_player + seats) % 4,
+        left_end=state.left_end,
+        right_end=state.right_end,
+        consecutive_passes=state.consecutive_passes
+    )
+
+
+def ends_swapped(state: GameState) -> GameState:
+    return GameState(
+        player_hands=state.player_hands,
+        current_player=state.current_player,
+        left_end=state.right_end,
+        right_end=state.left_end,
+        consecutive_passes=state.consecutive_passes
+    )
+
+
+class TestSymmetry(unittest.TestCase):
+
+    def test_incremental_hand_keys_match_full_hand_keys(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(20):
+            rng.shuffle(tiles)
+            state = GameState.new_game([tiles[i * 7:(i + 1) * 7] for i in range(4)])
+            while not state.is_game_over():
+                move, _, _ = rng.choice(list_possible_moves(state))
+                state = state.pass_turn() if move is None else state.play_hand(*move)
+                self.assertEqual(state.hand_keys, state.compute_hand_keys())
+
+    def test_symmetric_states_share_canonical_key(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            state = random_state(rng, rng.randint(1, 6))
+            key, negate, swap_ends = state.canonical_key()
+            for seats in range(4):
+                other_key, other_negate, other_swap_ends = rotated(state, seats).canonical_key()
+                self.assertEqual(other_key, key)
+                self.assertEqual(other_negate, negate != (seats % 2 == 1))
+                self.assertEqual(other_swap_ends, swap_ends)
+            if state.left_end != state.right_end:
+                other_key, _, other_swap_ends = ends_swapped(state).canonical_key()
+                self.assertEqual(other_key, key)
+                self.assertNotEqual(other_swap_ends, swap_ends)
+
+    def test_different_states_have_different_canonical_keys(self):
+        hands = [[DominoTile(0, 1)], [DominoTile(1, 2)], [DominoTile(2, 3)], [DominoTile(3, 4)]]
+        state = GameState.new_game(hands).play_hand(DominoTile(0, 1), True)
+        self.assertNotEqual(state.canonical_key()[0], state.pass_turn().canonical_key()[0])
+        self.assertNotEqual(state.canonical_key()[0], state.play_hand(DominoTile(1, 2), True).canonical_key()[0])
+
+    def test_count_game_stats_is_symmetric(self):
+        rng = random.Random(2)
+        for solver in (get_best_move2, get_best_move_venezuelan):
+            for _ in range(20):
+                state = random_state(rng, rng.randint(1, 3))
+                cache = {}
+                total_games, exp_score = solver.count_game_stats(state, print_stats=False, cache=cache)
+                # Served from the entries of the first call
+                games, score = solver.count_game_stats(rotated(state, 1), print_stats=False, cache=cache)
+                self.assertEqual(games, total_games)
+                self.assertAlmostEqual(score, -exp_score)
+                games, score = solver.count_game_stats(rotated(state, 1), print_stats=False, cache={})
+                self.assertEqual(games, total_games)
+                self.assertAlmostEqual(score, -exp_score)
+
+    def test_alpha_beta_with_shared_ab_cache_is_symmetric(self):
+        rng = random.Random(3)
+        for solver in (get_best_move2, get_best_move_venezuelan):
+            for _ in range(20):
+                state = random_state(rng, rng.randint(1, 4))
+                depth = rng.randint(1, 16)
+                _, expected, _ = solver.min_max_alpha_beta(state, depth, -math.inf, math.inf, {}, False)
+                cache, ab_cache = {}, {}
+                _, score, _ = solver.min_max_alpha_beta(state, depth, -math.inf, math.inf, cache, False, ab_cache)
+                self.assertAlmostEqual(score, expected)
+                for symmetric_state, sign in ((rotated(state, 1), -1), (rotated(state, 2), 1), (ends_swapped(state), 1)):
+                    best_move, score, _ = solver.min_max_alpha_beta(symmetric_state, depth, -math.inf, math.inf, cache, False, ab_cache)
+                    self.assertAlmostEqual(score, sign * expected)
+                    legal_moves = [possible_move[0] for possible_move in list_possible_moves(symmetric_state)]
+                    self.assertIn(best_move, legal_moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+import domino_tablebase
+import get_best_move2
+import get_best_move_venezuelan
+
+
+class TestTablebase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'endgames.bin')
+        self.num_entries = domino_tablebase.build_tablebase(self.path, 'international', max_tiles=6, num_samples=200, seed=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_build_and_verify(self):
+        with domino_tablebase.Tablebase(self.path, 'international') as tablebase:
+            self.assertEqual(len(tablebase), self.num_entries)
+            self.assertEqual(tablebase.max_tiles, 6)
+        # Positions below the sampled endgames of the build are all in the table
+        checked, found, mismatches = domino_tablebase.verify_tablebase(self.path, num_samples=50, seed=0)
+        self.assertEqual(found, checked)
+        self.assertEqual(mismatches, 0)
+        checked, found, mismatches = domino_tablebase.verify_tablebase(self.path, num_samples=50, seed=1)
+        self.assertEqual(mismatches, 0)
+
+    def test_probe_matches_count_game_stats(self):
+        rng = random.Random(0)
+        with domino_tablebase.Tablebase(self.path) as tablebase:
+            for _ in range(20):
+                state = domino_tablebase.random_endgame(rng, 6)
+                self.assertEqual(tablebase.probe(state), get_best_move2.count_game_stats(state, print_stats=False, cache={}))
+
+    def test_solvers_give_same_results_with_tablebase(self):
+        # The same seed as the build for endgames in the table, another one for bigger positions
+        rng = random.Random(0)
+        states = [domino_tablebase.random_endgame(rng, 6) for _ in range(10)]
+        rng = random.Random(2)
+        states += [domino_tablebase.random_endgame(rng, rng.randint(6, 10)) for _ in range(10)]
+        with domino_tablebase.Tablebase(self.path) as tablebase:
+            for state in states:
+                self.assertEqual(get_best_move2.count_game_stats(state, print_stats=False, cache={}, tablebase=tablebase),
+                                 get_best_move2.count_game_stats(state, print_stats=False, cache={}))
+                depth = rng.randint(1, 12)
+                self.assertEqual(get_best_move2.min_max_alpha_beta(state, depth, -math.inf, math.inf, {}, tablebase=tablebase)[1],
+                                 get_best_move2.min_max_alpha_beta(state, depth, -math.inf, math.inf, {})[1])
+            self.assertGreater(tablebase.hits, 0)
+
+    def test_variant_mismatch(self):
+        with self.assertRaises(ValueError):
+            domino_tablebase.Tablebase(self.path, 'venezuelan')
+        path = os.path.join(self.tmp_dir.name, 'venezuelan.bin')
+        domino_tablebase.build_tablebase(path, 'venezuelan', max_tiles=5, num_samples=20)
+        with domino_tablebase.Tablebase(path, 'venezuelan') as tablebase:
+            state = domino_tablebase.random_endgame(random.Random(0), 5)
+            self.assertEqual(get_best_move_venezuelan.count_game_stats(state, print_stats=False, cache={}, tablebase=tablebase),
+                             get_best_move_venezuelan.count_game_stats(state, print_stats=False, cache={}))
+
+    def test_not_a_tablebase(self):
+        path = os.path.join(self.tmp_dir.name, 'other.bin')
+        with open(path, 'wb') as f:
+            f.write(b'\x00' * 64)
+        with self.assertRaises(ValueError):
+            domino_tablebase.Tablebase(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import itertools
+import random
+import unittest
+from collections import Counter
+import numpy as np
+from domino_data_types import DominoTile
+from domino_probability_calc import PlayerTiles, DealSampler, calculate_tile_probabilities, calculate_tile_probabilities_scenarios, generate_sample, generate_sample_sequential, generate_samples
+
+
+class TestTileProbabilities(unittest.TestCase):
+
+    def test_same_as_scenarios(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        checked = 0
+        while checked < 100:
+            rng.shuffle(tiles)
+            player_tiles = PlayerTiles(N=rng.randint(1, 7), E=rng.randint(1, 7), W=rng.randint(1, 7))
+            remaining_tiles = tiles[:sum(player_tiles)]
+            not_with: dict[str, set[DominoTile]] = {'N': set(), 'E': set(), 'W': set()}
+            for tile in rng.sample(remaining_tiles, rng.randint(0, min(12, len(remaining_tiles)))):
+                not_with[rng.choice('NEW')].add(tile)
+            try:
+                expected = calculate_tile_probabilities_scenarios(remaining_tiles, not_with, player_tiles)
+            except AssertionError:
+                # No deal is consistent with the constraints
+                with self.assertRaises(AssertionError):
+                    calculate_tile_probabilities(remaining_tiles, not_with, player_tiles)
+                continue
+            self.assertEqual(calculate_tile_probabilities(remaining_tiles, not_with, player_tiles), expected)
+            checked += 1
+
+    def test_forced_tiles(self):
+        tiles = [DominoTile(0, i) for i in range(4)]
+        # N has one tile and cannot have 0|1, 0|2 nor 0|3
+        probabilities = calculate_tile_probabilities(tiles, {'N': set(tiles[1:])}, PlayerTiles(N=1, E=1, W=2))
+        self.assertEqual(probabilities[DominoTile(0, 0)], {'N': 1.0, 'E': 0.0, 'W': 0.0})
+        for tile in tiles[1:]:
+            self.assertEqual(probabilities[tile]['N'], 0.0)
+            self.assertAlmostEqual(probabilities[tile]['E'], 1 / 3)
+            self.assertAlmostEqual(probabilities[tile]['W'], 2 / 3)
+
+    def test_deals_are_uniform(self):
+        tiles = [DominoTile(0, i) for i in range(7)]
+        # 1|0 not with N and W: known with E
+        not_with = {'N': {tiles[0], tiles[1], tiles[2]}, 'E': {tiles[3]}, 'W': {tiles[0], tiles[4]}}
+        player_tiles = PlayerTiles(N=2, E=3, W=2)
+        deals = set()
+        for owners in itertools.product('NEW', repeat=len(tiles)):
+            if all(owners.count(player) == count for player, count in zip('NEW', player_tiles)) and \
+                    all(tile not in not_with[owner] for tile, owner in zip(tiles, owners)):
+                deals.add(owners)
+
+        sampler = DealSampler.build(set(tiles), not_with, player_tiles)
+        self.assertEqual(sampler.cum_weights[-1], len(deals))
+        n_samples = 400 * len(deals)
+        rng = random.Random(0)
+        for sample_deal in (sampler.sample, lambda rng: generate_sample_sequential(set(tiles), not_with, player_tiles)):
+            random.seed(0)
+            counts: Counter = Counter()
+            for _ in range(n_samples):
+                sample = sample_deal(rng)
+                owners = tuple(next(player for player in 'NEW' if tile in sample[player]) for tile in tiles)
+                self.assertIn(owners, deals)
+                counts[owners] += 1
+            self.assertEqual(len(counts), len(deals))
+            # Five standard deviations of a count
+            for count in counts.values():
+                self.assertLess(abs(count - 400), 5 * 20)
+
+    def test_batch_deals_are_uniform(self):
+        tiles = [DominoTile(0, i) for i in range(7)]
+        not_with = {'N': {tiles[0], tiles[1], tiles[2]}, 'E': {tiles[3]}, 'W': {tiles[0], tiles[4]}}
+        player_tiles = PlayerTiles(N=2, E=3, W=2)
+        n_deals = DealSampler.build(set(tiles), not_with, player_tiles).cum_weights[-1]
+        columns, owners = generate_samples(400 * n_deals, set(tiles), not_with, player_tiles, np.random.default_rng(0))
+        self.assertEqual(owners.shape, (400 * n_deals, len(tiles)))
+        self.assertCountEqual(columns, tiles)
+        counts = Counter(tuple('NEW'[owner] for owner in row) for row in owners.tolist())
+        self.assertEqual(len(counts), n_deals)
+        for deal, count in counts.items():
+            self.assertTrue(all(tile not in not_with[owner] for tile, owner in zip(columns, deal)))
+            self.assertLess(abs(count - 400), 5 * 20)
+
+    def test_sample_marginals(self):
+        rng = random.Random(1)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        remaining_tiles = tiles[:21]
+        not_with = {'N': set(tiles[:4]), 'E': set(tiles[4:10]), 'W': {tiles[10]}}
+        player_tiles = PlayerTiles(N=7, E=7, W=7)
+        probabilities = calculate_tile_probabilities(remaining_tiles, not_with, player_tiles)
+        n_samples = 4000
+        counts: dict[DominoTile, Counter] = {tile: Counter() for tile in remaining_tiles}
+        for _ in range(n_samples):
+            for player, player_sample in generate_sample(set(remaining_tiles), not_with, player_tiles, rng).items():
+                for tile in player_sample:
+                    counts[tile][player] += 1
+        for tile in remaining_tiles:
+            for player in 'NEW':
+                self.assertAlmostEqual(counts[tile][player] / n_samples, probabilities[tile][player], delta=0.04)
+
+if __name__ == '__main__':
+    unittest.main()
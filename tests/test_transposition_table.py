@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+import pickle
+import random
+import tempfile
+import tracemalloc
+import unittest
+from domino_data_types import GameState, DominoTile
+from transposition_table import TranspositionTable
+from domino_game_analyzer import load_cache, save_cache
+from get_best_move2 import count_game_stats, get_best_move_alpha_beta
+import get_best_move2
+import get_best_move_venezuelan
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_dict_interface(self):
+        table = TranspositionTable(max_bytes=10_000)
+        table[1] = (5, 2.0)
+        self.assertIn(1, table)
+        self.assertEqual(table[1], (5, 2.0))
+        self.assertEqual(table.get(2), None)
+        self.assertRaises(KeyError, lambda: table[2])
+        table[1] = (6, 3.0)
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table[1], (6, 3.0))
+
+    def test_capacity_is_bounded(self):
+        table = TranspositionTable(max_bytes=3200, entry_bytes=100)
+        self.assertEqual(table.capacity, 32)
+        for key in range(1000):
+            table[key] = (key % 7, 0)
+        self.assertEqual(len(table), table.capacity)
+        self.assertEqual(table.evictions, 1000 - table.capacity)
+        self.assertEqual(table.occupancy, 1.0)
+
+    def test_depth_preferred_slot_keeps_largest_entry(self):
+        table = TranspositionTable(max_bytes=200, entry_bytes=100)
+        self.assertEqual(table.num_buckets, 1)
+        table['big'] = (1000, 0)
+        for key in range(10):
+            table[key] = (1, 0)
+        self.assertIn('big', table)
+        self.assertIn(9, table)
+        self.assertNotIn(8, table)
+        table['bigger'] = (2000, 0)
+        self.assertIn('bigger', table)
+        self.assertIn('big', table)
+
+    def test_small_table_gives_same_results(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(5):
+            rng.shuffle(tiles)
+            hands = [tiles[i * 4:(i + 1) * 4] for i in range(4)]
+            state = GameState.new_game(hands)
+            self.assertEqual(
+                count_game_stats(state, print_stats=False, cache=TranspositionTable(max_bytes=20_000)),
+                count_game_stats(state, print_stats=False, cache={})
+            )
+            _, expected, _ = get_best_move_alpha_beta(state, 8, {}, best_path_flag=False)
+            _, score, _ = get_best_move_alpha_beta(state, 8, TranspositionTable(max_bytes=20_000), best_path_flag=False)
+            self.assertAlmostEqual(score, expected)
+
+    def test_traversal_memory_is_bounded(self):
+        rng = random.Random(2)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        rng.shuffle(tiles)
+        state = GameState.new_game([tiles[i * 4:(i + 1) * 4] for i in range(4)])
+        peaks = []
+        for cache in (lambda: {}, lambda: TranspositionTable(max_bytes=10_000)):
+            tracemalloc.start()
+            count_game_stats(state, print_stats=False, cache=cache())
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        # The table and the states of the line being counted, not the states counted so far
+        self.assertLess(peaks[1], 10_000 + 16_000)
+        self.assertLess(peaks[1], peaks[0])
+
+    def test_load_old_cache(self):
+        # Caches of older versions are keyed on GameState objects
+        state = GameState.new_game([[DominoTile(0, 0)], [DominoTile(1, 1)], [DominoTile(2, 2)], [DominoTile(3, 3)]])
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'cache.pkl')
+            with open(filename, 'wb') as f:
+                pickle.dump({state: (1, 0)}, f)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(load_cache(filename), {})
+                self.assertEqual(len(load_cache(filename, max_bytes=10_000)), 0)
+
+            cache = {state.canonical_key()[0]: (1, 0)}
+            save_cache(cache, filename)
+            self.assertEqual(load_cache(filename), cache)
+            self.assertEqual(dict(load_cache(filename, max_bytes=10_000).items()), cache)
+
+    def test_alpha_beta_entries_give_same_results(self):
+        rng = random.Random(1)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(10):
+            rng.shuffle(tiles)
+            hands = [tiles[i * 4:(i + 1) * 4] for i in range(4)]
+            state = GameState.new_game(hands)
+            depth = rng.randint(1, 20)
+            for solver in (get_best_move2, get_best_move_venezuelan):
+                _, expected, _ = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False)
+                ab_cache = TranspositionTable(max_bytes=100_000)
+                for _ in range(2):
+                    # The second search re-enters the table filled by the first one
+                    _, score, _ = solver.get_best_move_alpha_beta(state, depth, {}, best_path_flag=False, ab_cache=ab_cache)
+                    self.assertAlmostEqual(score, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import random
+import unittest
+from domino_data_types import GameState, DominoTile
+from domino_utils import list_possible_moves
+
+
+class TestZobristKey(unittest.TestCase):
+
+    def test_incremental_key_matches_full_key(self):
+        rng = random.Random(0)
+        tiles = [DominoTile(i, j) for i in range(7) for j in range(i, 7)]
+        for _ in range(50):
+            rng.shuffle(tiles)
+            state = GameState.new_game([tiles[i * 7:(i + 1) * 7] for i in range(4)])
+            while not state.is_game_over():
+                move, _, _ = rng.choice(list_possible_moves(state))
+                state = state.pass_turn() if move is None else state.play_hand(*move)
+                self.assertEqual(state.key, state.compute_key())
+                self.assertEqual(hash(state), state.key)
+
+    def test_equal_states_have_equal_keys(self):
+        hands = [[DominoTile(0, 1)], [DominoTile(1, 2)], [DominoTile(2, 3)], [DominoTile(3, 4)]]
+        state = GameState.new_game(hands).play_hand(DominoTile(0, 1), True)
+        same_state = GameState(
+            player_hands=state.player_hands,
+            current_player=state.current_player,
+            left_end=state.left_end,
+            right_end=state.right_end,
+            consecutive_passes=state.consecutive_passes
+        )
+        self.assertEqual(state, same_state)
+        self.assertEqual(state.key, same_state.key)
+        self.assertNotEqual(state.key, state.pass_turn().key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+from typing import Any, Hashable, Iterator
+
+# Rough footprint of one cached entry in CPython: the int key, the value tuple with its
+# two numbers, and the two list slots pointing at them
+ENTRY_BYTES_ESTIMATE = 160
+
+class TranspositionTable:
+    """
+    Fixed-capacity transposition table with a dict-like interface, so it can be passed
+    wherever the solvers take a `cache` dict.
+
+    Entries live in two-slot buckets. The first slot of a bucket is depth-preferred: it is
+    only replaced by an entry whose weight (value[0], i.e. the subtree game count for
+    count_game_stats entries, or the search depth for alpha-beta entries) is at least as
+    large. The second slot always takes whatever did not go into the first one, so recent
+    entries are still cached.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, entry_bytes: int = ENTRY_BYTES_ESTIMATE):
+        """
+        :param max_bytes: Memory budget for the table
+        :param entry_bytes: Estimated size of one entry, used to derive the capacity from max_bytes
+        """
+        self.num_buckets = max(1, max_bytes // (2 * entry_bytes))
+        self.capacity = 2 * self.num_buckets
+        self._keys: list[Hashable|None] = [None] * self.capacity
+        self._values: list[Any] = [None] * self.capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _slot(self, key: Hashable) -> int:
+        # Index of the depth-preferred slot, the always-replace slot is the next one
+        return (hash(key) % self.num_buckets) << 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        slot = self._slot(key)
+        keys = self._keys
+        if keys[slot] == key:
+            self.hits += 1
+            return self._values[slot]
+        if keys[slot + 1] == key:
+            self.hits += 1
+            return self._values[slot + 1]
+        self.misses += 1
+        return default
+
+    def __contains__(self, key: Hashable) -> bool:
+        slot = self._slot(key)
+        return self._keys[slot] == key or self._keys[slot + 1] == key
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        slot = self._slot(key)
+        keys = self._keys
+        values = self._values
+        self.stores += 1
+
+        # Updating an existing entry keeps it in its slot
+        if keys[slot] == key:
+            values[slot] = value
+            return
+        if keys[slot + 1] == key:
+            # (the depth-preferred slot is always filled before the always-replace one)
+            if value[0] >= values[slot][0]:
+                # Promote to the depth-preferred slot, demoting its previous occupant
+                keys[slot], keys[slot + 1] = key, keys[slot]
+                values[slot], values[slot + 1] = value, values[slot]
+            else:
+                values[slot + 1] = value
+            return
+
+        if keys[slot] is None:
+            keys[slot] = key
+            values[slot] = value
+            self.size += 1
+            return
+
+        if value[0] >= values[slot][0]:
+            # The depth-preferred entry moves down to the always-replace slot
+            demoted_key, demoted_value = keys[slot], values[slot]
+            keys[slot], values[slot] = key, value
+            key, value = demoted_key, demoted_value
+
+        if keys[slot + 1] is None:
+            self.size += 1
+        else:
+            self.evictions += 1
+        keys[slot + 1] = key
+        values[slot + 1] = value
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return (key for key in self._keys if key is not None)
+
+    def items(self) -> Iterator[tuple[Hashable, Any]]:
+        return ((key, value) for key, value in zip(self._keys, self._values) if key is not None)
+
+    def update(self, entries: Any) -> None:
+        for key, value in (entries.items() if hasattr(entries, 'items') else entries):
+            self[key] = value
+
+    def clear(self) -> None:
+        self._keys = [None] * self.capacity
+        self._values = [None] * self.capacity
+        self.size = 0
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    @property
+    def occupancy(self) -> float:
+        return self.size / self.capacity
+
+    def stats(self) -> dict[str, int|float]:
+        return {
+            'capacity': self.capacity,
+            'size': self.size,
+            'occupancy': self.occupancy,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+    def __repr__(self) -> str:
+        return (f"TranspositionTable(size={self.size}, capacity={self.capacity}, "
+                f"occupancy={self.occupancy:.1%}, evictions={self.evictions})")
+
+# Bound types of alpha-beta entries, stored as (depth, flag, value, best_move)
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+# Flag of an entry whose value is negated (a lower bound becomes an upper bound)
+NEGATED_FLAG = (EXACT, UPPER_BOUND, LOWER_BOUND)